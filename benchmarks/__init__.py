@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Бенчмарки easy_vue. Запускаются из корня репозитория:
+
+        python -m benchmarks.bench_json
+
+    Общий набор замеров основного пути запроса с сохранением в JSON и сравнением:
+
+        python -m benchmarks.suite --json before.json
+        python -m benchmarks.suite --compare before.json
+"""
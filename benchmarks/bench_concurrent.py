@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Пропускная способность RESTView с медленными внешними вызовами:
+    последовательные вызовы против RESTView.run_concurrent.
+    Клиенты - параллельные потоки, каждый вызывает view несколько раз.
+
+        python -m benchmarks.bench_concurrent [clients] [io_calls] [io_ms]
+"""
+
+import sys
+import time
+import threading
+
+from .common import setup_django
+
+setup_django()
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from easy_vue.dj_rest import RESTView
+
+
+IO_CALLS = 4
+IO_SEC = 0.05
+
+
+def slow_io(no):
+    time.sleep(IO_SEC)
+    return no
+
+
+class SequentialView(RESTView):
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("res", [slow_io(i) for i in range(IO_CALLS)])
+
+
+class ConcurrentView(RESTView):
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("res", self.run_concurrent(
+            [(slow_io, (i,)) for i in range(IO_CALLS)]))
+
+
+def throughput(view, clients, per_client=5):
+    """
+        Возвращает (запросов в секунду, среднее время запроса в мс)
+    """
+    rf = RequestFactory()
+    durations = []
+
+    def client():
+        for i in range(per_client):
+            request = rf.get("/")
+            request.user = AnonymousUser()
+            t0 = time.time()
+            response = view(request)
+            durations.append(time.time() - t0)
+            assert response.status_code == 200
+
+    threads = [threading.Thread(target=client) for i in range(clients)]
+    t0 = time.time()
+    for itm in threads:
+        itm.start()
+    for itm in threads:
+        itm.join()
+    total = time.time() - t0
+    return (len(durations) / total, 1000.0 * sum(durations) / len(durations))
+
+
+def run(clients=8):
+    print("{} clients, {} IO calls x {:.0f} ms per request".format(clients, IO_CALLS, IO_SEC * 1000))
+    for name, view in [("sequential", SequentialView.as_view()), 
+            ("run_concurrent", ConcurrentView.as_view())]:
+        rps, avg_ms = throughput(view, clients)
+        print("{:<16s} {:>8.1f} req/s  avg {:>8.1f} ms".format(name, rps, avg_ms))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        IO_CALLS = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        IO_SEC = int(sys.argv[3]) / 1000.0
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 8)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Сравнение кодирования JSON ответов: текущий путь (JsonResponse + DjangoJSONEncoder,
+    json.dumps + DecimalEncoder) и бекенды zjson на данных "таблицы" для Vue grid.
+
+        python -m benchmarks.bench_json [rows]
+"""
+
+import sys
+import json
+import datetime
+from decimal import Decimal
+
+from .common import setup_django, measure, print_row
+
+setup_django()
+
+from django.http import JsonResponse
+
+from easy_vue import zjson
+from easy_vue.lib import DecimalEncoder, ZMoment
+
+
+def grid_payload(rows=2000, zmoment=False):
+    """
+        Ответ в формате типичного RESTView для таблицы.
+    """
+    now = datetime.datetime(2020, 5, 1, 12, 30)
+    data = []
+    for i in range(rows):
+        row = dict(
+            id=i,
+            name="Позиция номер {}".format(i),
+            code="A-{:06d}".format(i),
+            qty=Decimal("{}.{:02d}".format(i % 1000, i % 100)),
+            price=i * 1.25,
+            created=now + datetime.timedelta(minutes=i),
+            active=bool(i % 2),
+            parent=None if i % 3 else i - 1,
+            tags=["t{}".format(i % 7), "t{}".format(i % 5)],
+            status="ok" if i % 4 else "wait",
+        )
+        if zmoment:
+            row["moment"] = ZMoment(row["created"])
+        data.append(row)
+    return {"answer": "success", "rows": data, "total": rows}
+
+
+def run(rows=2000):
+    payload = grid_payload(rows)
+    number = max(1, 20000 // rows)
+
+    print("Grid payload: {} rows".format(rows))
+
+    res = measure(lambda: JsonResponse(payload), number=number)
+    print_row("JsonResponse (current)", res)
+
+    float_payload = dict(payload, rows=[dict(r, created=r["created"].isoformat()) 
+        for r in payload["rows"]])
+    res = measure(lambda: json.dumps(float_payload, cls=DecimalEncoder), number=number)
+    print_row("json.dumps + DecimalEncoder", res)
+
+    for name in ["json", "simplejson"]:
+        if not zjson.BACKENDS[name].available():
+            print("{:<32s} not installed".format("zjson." + name))
+            continue
+        for compact in (False, True):
+            backend = zjson.BACKENDS[name](zjson.DefaultConverter(), compact=compact)
+            res = measure(lambda: backend.dumps(payload), number=number)
+            size = len(backend.dumps(payload))
+            print_row("zjson.{}{}".format(name, " compact" if compact else ""), res, 
+                "{} bytes".format(size))
+
+    zpayload = grid_payload(rows, zmoment=True)
+    backend = zjson.get_backend()
+    res = measure(lambda: backend.dumps(zpayload), number=number)
+    print_row("zjson.{} + ZMoment".format(backend.name), res)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
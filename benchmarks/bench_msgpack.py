@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Размер ответа и время кодирования: JSON (zjson) против MessagePack (zmsgpack)
+    на числовых массивах, как в ответах телеметрии.
+
+        python -m benchmarks.bench_msgpack [points]
+"""
+
+import sys
+import zlib
+import random
+
+from .common import setup_django, measure, print_row
+
+setup_django()
+
+from easy_vue import zjson
+from easy_vue import zmsgpack
+
+
+def telemetry_payload(points=10000, series=4):
+    """
+        Ответ с рядами измерений: метки времени (целые) и значения (float).
+    """
+    rnd = random.Random(1)
+    start = 1588336200
+    return {
+        "answer": "success",
+        "ts": [start + i * 15 for i in range(points)],
+        "series": [{
+            "name": "sensor {}".format(no),
+            "values": [round(rnd.uniform(-50, 150), 3) for i in range(points)],
+            "counts": [rnd.randint(0, 70000) for i in range(points)],
+        } for no in range(series)],
+    }
+
+
+def run(points=10000):
+    payload = telemetry_payload(points)
+    number = max(1, 200000 // points)
+
+    print("Telemetry payload: {} points x 4 series".format(points))
+
+    encoders = []
+    for name in ["json", "simplejson"]:
+        if zjson.BACKENDS[name].available():
+            backend = zjson.BACKENDS[name](zjson.DefaultConverter(), compact=True)
+            encoders.append(("zjson.{} compact".format(name), backend.dumps))
+    for name in ["python", "msgpack"]:
+        if not zmsgpack.BACKENDS[name].available():
+            print("{:<32s} not installed".format("zmsgpack." + name))
+            continue
+        backend = zmsgpack.BACKENDS[name](zjson.DefaultConverter())
+        encoders.append(("zmsgpack." + name, backend.packb))
+
+    for name, func in encoders:
+        res = measure(lambda: func(payload), number=number, repeat=3)
+        data = func(payload)
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8")
+        print_row(name, res, "{} bytes, gzip {} bytes".format(
+            len(data), len(zlib.compress(data, 6))))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
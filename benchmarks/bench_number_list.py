@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Разбор больших списков чисел (20000 элементов) с проверкой диапазона:
+        CommaListParam(IntParam) - parse и compile_params (разбор по элементам),
+        NumberListParam - строка целиком, результат array.array
+            (и numpy.ndarray с use_numpy=True, если numpy установлен).
+
+        python -m benchmarks.bench_number_list [count] [number]
+"""
+
+import sys
+import random
+
+from .common import setup_django, measure, print_row
+
+setup_django()
+
+from django.http import QueryDict
+
+from easy_vue import dj_rest_params as params
+
+
+def make_query(count):
+    rnd = random.Random(1)
+    query = QueryDict(mutable=True)
+    query["ids"] = ",".join(str(rnd.randint(1, 1000000)) for no in range(count))
+    query["coords"] = ",".join("{:.6f}".format(rnd.uniform(-180, 180)) for no in range(count))
+    return query
+
+
+def run(count=20000, number=20):
+    query = make_query(count)
+    print("{} numbers, numpy: {}".format(count, params.numpy is not None))
+
+    cases = [
+        ("int", params.CommaListParam(params.IntParam("ids", min_val=1, max_val=1000000)),
+            params.NumberListParam("ids", min_val=1, max_val=1000000)),
+        ("float", None,
+            params.NumberListParam("coords", kind="float", min_val=-180, max_val=180)),
+    ]
+    for name, old_param, new_param in cases:
+        base = None
+        if old_param is not None:
+            base = measure(lambda: old_param.parse(query, {}), number=number)
+            print_row("{} CommaListParam.parse".format(name), base)
+            validate = params.compile_params([old_param])
+            res = measure(lambda: validate(query, {}), number=number)
+            print_row("{} CommaListParam compiled".format(name), res,
+                "{:.2f}x".format(res["ops_per_sec"] / base["ops_per_sec"]))
+        res = measure(lambda: new_param.parse(query, {}), number=number)
+        print_row("{} NumberListParam".format(name), res,
+            "{:.2f}x".format(res["ops_per_sec"] / base["ops_per_sec"]) if base else "")
+        if params.numpy is not None:
+            numpy_param = params.NumberListParam(new_param.param_id, kind=new_param.kind,
+                min_val=new_param.min_val, max_val=new_param.max_val, use_numpy=True)
+            res = measure(lambda: numpy_param.parse(query, {}), number=number)
+            print_row("{} NumberListParam numpy".format(name), res,
+                "{:.2f}x".format(res["ops_per_sec"] / base["ops_per_sec"]) if base else "")
+
+
+if __name__ == "__main__":
+    run(*[int(itm) for itm in sys.argv[1:3]])
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Разбор параметров view с большим числом параметров (24):
+        legacy - разбор как до компиляции (parse с повторным do_parse значения),
+        parse - цикл по IncomingParamBase.parse (RESTView.parse_in_params),
+        compiled - функция dj_rest_params.compile_params, как в RESTView.clean_by_params.
+
+        python -m benchmarks.bench_params [number]
+"""
+
+import sys
+
+from .common import setup_django, measure, print_row
+
+setup_django()
+
+from django.http import QueryDict
+
+from easy_vue import dj_rest_params as params
+from easy_vue.dj_rest_params import EParseError, EParamNotFound
+
+
+def make_params():
+    res = []
+    for no in range(6):
+        res.append(params.UnicodeParam("name{}".format(no)))
+        res.append(params.IntParam("int{}".format(no), min_val=0, max_val=1000000))
+        res.append(params.IdParam("id{}".format(no), required=False))
+    res.append(params.JSONParam("filter"))
+    res.append(params.CommaListParam(params.IntParam("ids", min_val=1)))
+    res.append(params.IntParam("multy", do_multy=True))
+    res.append(params.IntParam("page", required=False))
+    res.append(params.UnicodeParam("sort", required=False))
+    res.append(params.UnicodeParam("search", required=False))
+    return res
+
+
+def make_query():
+    query = QueryDict(mutable=True)
+    for no in range(6):
+        query["name{}".format(no)] = "Значение {}".format(no)
+        query["int{}".format(no)] = str(no * 1000)
+        query["id{}".format(no)] = str(no + 1)
+    query["filter"] = '{"state": [1, 2], "archived": false}'
+    query["ids"] = ",".join(str(no) for no in range(1, 21))
+    query.setlist("multy", [str(no) for no in range(5)])
+    query["sort"] = "-created"
+    return query
+
+
+def legacy_parse(param, request_dict, result):
+    """
+        IncomingParamBase.parse в прежнем виде: одиночное значение разбиралось
+        в _parse_itm и еще раз в do_parse.
+    """
+    if param.param_id not in request_dict:
+        if param.required:
+            raise EParamNotFound(param.error_text("не найден"))
+        result[param.to_attribute] = [] if param.do_multy else None
+        return
+    if param.do_multy:
+        vv = [param._parse_itm(itm) for itm in request_dict.getlist(param.param_id)]
+    else:
+        vv = param._parse_itm(request_dict[param.param_id])
+        try:
+            vv = param.do_parse(request_dict[param.param_id])
+        except EParseError as e:
+            raise e
+        except Exception as e:
+            raise EParseError(param.error_text(str(e)))
+    result[param.to_attribute] = vv
+
+
+def run_loop(parse, params_list, query):
+    result = {}
+    errors = []
+    for itm in params_list:
+        try:
+            parse(itm, query, result)
+        except EParseError as e:
+            errors.append(e.u_msg)
+        except Exception as e:
+            errors.append(str(e))
+    return result
+
+
+def run(number=2000):
+    params_list = make_params()
+    query = make_query()
+    validate = params.compile_params(params_list)
+
+    print("{} params".format(len(params_list)))
+
+    legacy = measure(lambda: run_loop(legacy_parse, params_list, query), number=number)
+    print_row("legacy (double parse)", legacy)
+    res = measure(lambda: run_loop(lambda itm, qd, rs: itm.parse(qd, rs), params_list, query),
+        number=number)
+    print_row("IncomingParamBase.parse loop", res, "{:.2f}x".format(res["ops_per_sec"] / legacy["ops_per_sec"]))
+    res = measure(lambda: validate(query, {}), number=number)
+    print_row("compile_params", res, "{:.2f}x".format(res["ops_per_sec"] / legacy["ops_per_sec"]))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
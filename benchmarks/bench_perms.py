@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Проверка разрешений view: число запросов к БД и время на один HTTP запрос,
+    без кеширования (прежняя проверка has_perm по каждому разрешению)
+    и через dj_perms (кеш в запросе + кеш между запросами).
+
+    Пользователь загружается заново на каждый запрос, как в AuthenticationMiddleware,
+    поэтому кеш ModelBackend в объекте пользователя между запросами не сохраняется.
+
+        python -m benchmarks.bench_perms [requests]
+"""
+
+import sys
+
+from .common import setup_django, measure, print_row
+
+setup_django()
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User, Group, Permission
+
+from easy_vue import dj_perms
+
+
+PERMISSIONS = ["auth.add_user", "auth.change_user", "auth.change_group"]
+
+
+def check_uncached(user, permissions):
+    """
+        Проверка в том виде, как она была до dj_perms.
+    """
+    if not user.is_authenticated():
+        return False
+    res = True
+    for itm in permissions:
+        if not user.has_perm(itm):
+            res = False
+    return res
+
+
+def check_cached(user, permissions, request):
+    return dj_perms.check_user_permissions(user, permissions, request)
+
+
+def prepare():
+    call_command("migrate", verbosity=0, interactive=False)
+    group = Group.objects.create(name="editors")
+    group.permissions.add(*Permission.objects.filter(codename__in=["add_user", "change_user"]))
+    user = User.objects.create_user("bench", password="bench")
+    user.groups.add(group)
+    user.user_permissions.add(Permission.objects.get(codename="change_group"))
+    return user.pk
+
+
+def make_request_func(user_pk, check, checks_per_request):
+    """
+        Один "HTTP запрос": загрузка пользователя и checks_per_request проверок
+        (например, пакетный запрос к нескольким view).
+    """
+    rf = RequestFactory()
+
+    def func():
+        request = rf.get("/")
+        request.user = User.objects.get(pk=user_pk)
+        for i in range(checks_per_request):
+            assert check(request.user, PERMISSIONS, request)
+    return func
+
+
+def count_queries(func, requests):
+    with CaptureQueriesContext(connection) as ctx:
+        for i in range(requests):
+            func()
+    # минус загрузка пользователя
+    return float(len(ctx.captured_queries) - requests) / requests
+
+
+def run(requests=200):
+    user_pk = prepare()
+    print("{} permissions, queries per request excluding user load".format(len(PERMISSIONS)))
+    for checks in (1, 5):
+        cache.clear()
+        cases = [
+            ("uncached x{}".format(checks),
+                make_request_func(user_pk, lambda u, p, r: check_uncached(u, p), checks)),
+            ("dj_perms x{}".format(checks),
+                make_request_func(user_pk, check_cached, checks)),
+        ]
+        for name, func in cases:
+            queries = count_queries(func, requests)
+            res = measure(func, number=requests, repeat=3)
+            print_row(name, res, "queries/request {:.2f}".format(queries))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
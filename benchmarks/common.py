@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Общие утилиты бенчмарков: настройка Django, замер времени и выделений памяти.
+"""
+
+import gc
+import sys
+import time
+import json
+import platform
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2 - выделения памяти не замеряются
+    tracemalloc = None
+
+from django.conf import settings
+
+
+def setup_django(**extra):
+    """
+        Минимальная настройка Django для запуска бенчмарков вне проекта.
+        extra - дополнительные настройки.
+    """
+    if settings.configured:
+        return
+    conf = dict(
+        SECRET_KEY="bench",
+        DEBUG=False,
+        INSTALLED_APPS=["django.contrib.auth", "django.contrib.contenttypes", "easy_vue"],
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        MIDDLEWARE_CLASSES=[],
+        ROOT_URLCONF=__name__,
+    )
+    conf.update(extra)
+    settings.configure(**conf)
+
+    import django
+    django.setup()
+
+urlpatterns = []
+
+
+def percentile(sorted_vals, pct):
+    """
+        Перцентиль pct (0..100) по отсортированному списку.
+    """
+    if not sorted_vals:
+        return None
+    idx = int(round((len(sorted_vals) - 1) * pct / 100.0))
+    return sorted_vals[idx]
+
+
+def measure(func, number=100, repeat=5, warmup=1):
+    """
+        Вызывает func number*repeat раз, замеряя каждый вызов.
+        Возвращает словарь: ops_per_sec, p50_us, p99_us, calls.
+    """
+    for i in range(warmup):
+        func()
+
+    timer = time.time if not hasattr(time, "perf_counter") else time.perf_counter
+    samples = []
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        for r in range(repeat):
+            for i in range(number):
+                t0 = timer()
+                func()
+                samples.append(timer() - t0)
+    finally:
+        if gc_was:
+            gc.enable()
+
+    samples.sort()
+    total = sum(samples)
+    return dict(
+        calls=len(samples),
+        ops_per_sec=len(samples) / total if total else None,
+        p50_us=percentile(samples, 50) * 1e6,
+        p99_us=percentile(samples, 99) * 1e6,
+    )
+
+
+def measure_allocs(func, number=20):
+    """
+        Память на один вызов func (по tracemalloc), в среднем по number вызовам:
+            alloc_peak_bytes - пик выделенной за вызов памяти,
+            retained_bytes - сколько из нее осталось занято после вызова.
+        Возвращает словарь или None, если tracemalloc недоступен.
+    """
+    if tracemalloc is None:
+        return None
+    func()
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    try:
+        peak = retained = 0
+        for i in range(number):
+            # сбрасывает и учтенные блоки, и пик - дальше учитывается только этот вызов
+            tracemalloc.clear_traces()
+            func()
+            current, call_peak = tracemalloc.get_traced_memory()
+            peak += call_peak
+            retained += current
+    finally:
+        if not started:
+            tracemalloc.stop()
+    return dict(alloc_peak_bytes=float(peak) / number, retained_bytes=float(retained) / number)
+
+
+def environment():
+    """
+        Описание окружения для сохранения вместе с результатами.
+    """
+    import django
+    return dict(
+        python=sys.version.split()[0],
+        implementation=platform.python_implementation(),
+        django=django.get_version(),
+        platform=platform.platform(),
+        time=time.strftime("%Y-%m-%dT%H:%M:%S"),
+    )
+
+
+def save_results(path, results):
+    """
+        Сохраняет результаты {имя: словарь замера} с описанием окружения в JSON.
+    """
+    with open(path, "w") as ff:
+        json.dump(dict(environment=environment(), results=results), ff, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path, "r") as ff:
+        return json.load(ff)["results"]
+
+
+def print_row(name, res, extra=""):
+    print("{:<32s} {:>12.1f} ops/s  p50 {:>10.1f} us  p99 {:>10.1f} us  {}".format(
+        name, res["ops_per_sec"], res["p50_us"], res["p99_us"], extra))
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Набор бенчмарков основного пути обработки запроса: RESTView.dispatch целиком,
+    разбор параметров каждого типа, RESTFormProcessor, тег include_libs,
+    VueBaseView.get_context_data и ZMoment.
+    Данные - минимальные модели в SQLite в памяти, запросы - RequestFactory.
+
+    Для каждого замера: ops/s, p50 / p99 одного вызова и, если есть tracemalloc
+    (Python 3), память на вызов. Результаты можно сохранить в JSON и сравнить
+    с сохраненными ранее (например, до обновления Django или Python):
+
+        python -m benchmarks.suite
+        python -m benchmarks.suite --json before.json
+        python -m benchmarks.suite --compare before.json [--only params.]
+"""
+
+import argparse
+import datetime
+from decimal import Decimal
+
+from .common import (setup_django, measure, measure_allocs, print_row,
+    save_results, load_results)
+
+setup_django(
+    INSTALLED_APPS=["django.contrib.auth", "django.contrib.contenttypes", "easy_vue", "benchmarks"],
+    TEMPLATES=[{"BACKEND": "django.template.backends.django.DjangoTemplates", "APP_DIRS": True}],
+    STATIC_URL="/static/",
+    VUE_DEBUG=False,
+    VUE_LIBRARIES={
+        "vue": ("common/vue.js", "common/vue.min.js"),
+        "vuex": ("common/vuex.js", "common/vuex.min.js"),
+        "router": ("common/vue-router.js", "common/vue-router.min.js"),
+        "bootstrap_css": "common/bootstrap.min.css",
+        "cdn": "https://cdn.example.org/lib.min.js",
+    },
+)
+
+from django import forms
+from django.db import connection, models
+from django.http import QueryDict
+from django.template import Template, Context
+from django.test import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+
+from easy_vue import dj_rest_params as params
+from easy_vue.dj_rest import RESTView, VueBaseView
+from easy_vue.dj_rest_form import RESTFormProcessor
+from easy_vue.dj_model_cache import ModelCache
+from easy_vue.lib import ZMoment
+
+
+class Category(models.Model):
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        app_label = "benchmarks"
+
+    def __unicode__(self):
+        return self.name
+
+
+class Item(models.Model):
+    name = models.CharField(max_length=100)
+    code = models.CharField(max_length=20)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    qty = models.IntegerField(default=0)
+    created = models.DateTimeField()
+    category = models.ForeignKey(Category)
+
+    class Meta:
+        app_label = "benchmarks"
+
+
+def prepare(items=200, categories=20):
+    with connection.schema_editor() as editor:
+        editor.create_model(Category)
+        editor.create_model(Item)
+    # латиница: metadata_dict выгружает choices через str()
+    cats = [Category.objects.create(name="Category {}".format(no)) for no in range(categories)]
+    start = datetime.datetime(2020, 5, 1, 12, 30)
+    Item.objects.bulk_create([Item(
+        name="Позиция {}".format(no),
+        code="A-{:06d}".format(no),
+        price=Decimal("{}.{:02d}".format(no, no % 100)),
+        qty=no % 17,
+        created=start + datetime.timedelta(minutes=no),
+        category=cats[no % categories]) for no in range(items)])
+
+
+rf = RequestFactory()
+
+
+def make_request(method, path="/", data=None, **extra):
+    request = getattr(rf, method.lower())(path, data or {}, **extra)
+    request.user = AnonymousUser()
+    return request
+
+
+# ==== RESTView.dispatch
+
+class ItemsView(RESTView):
+    GET_PARAMS = [
+        params.IdParam("category"),
+        params.IntParam("limit", required=False, min_val=1, max_val=500),
+    ]
+    POST_PARAMS = [
+        params.ModelParam("item", model=Item),
+        params.IntParam("qty", min_val=0),
+        params.UnicodeParam("comment", required=False),
+    ]
+
+    def process_get(self, request, *args, **kwargs):
+        qs = Item.objects.filter(category_id=self.cleaned_params.category).values(
+            "id", "name", "code", "price", "qty", "created")
+        self.set_answer_key("items", list(qs[:self.cleaned_params.limit or 100]))
+
+    def process_post(self, request, *args, **kwargs):
+        item = self.cleaned_params.item
+        self.set_answer_key("item", dict(id=item.pk, qty=self.cleaned_params.qty))
+
+
+class PingView(RESTView):
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("pong", 1)
+
+
+def dispatch_cases():
+    ping = PingView.as_view()
+    items = ItemsView.as_view()
+    item_pk = Item.objects.values_list("pk", flat=True)[0]
+    yield "dispatch.ping", lambda: ping(make_request("get"))
+    yield "dispatch.get_items", lambda: items(make_request("get", data={"category": 1, "limit": 50}))
+    yield "dispatch.post_form", lambda: items(make_request("post",
+        data={"item": item_pk, "qty": 3, "comment": "Комментарий"}))
+    yield "dispatch.post_json", lambda: items(make_request("post",
+        data='{{"item": {}, "qty": 3, "comment": "x"}}'.format(item_pk),
+        content_type="application/json"))
+
+
+# ==== IncomingParamBase.parse
+
+def params_cases():
+    item_pk = Item.objects.values_list("pk", flat=True)[0]
+    query = QueryDict(mutable=True)
+    query.update(dict(
+        text="Строка параметра",
+        int="12345",
+        id="42",
+        item=str(item_pk),
+        json='{"a": [1, 2, 3], "b": {"c": "d"}}',
+        ids=",".join(str(no) for no in range(1, 101)),
+    ))
+    query.setlist("multy", [str(no) for no in range(20)])
+
+    cases = [
+        ("UnicodeParam", params.UnicodeParam("text")),
+        ("IntParam", params.IntParam("int", min_val=0, max_val=100000)),
+        ("IdParam", params.IdParam("id")),
+        ("ModelParam", params.ModelParam("item", model=Item)),
+        ("JSONParam", params.JSONParam("json")),
+        ("CommaListParam_100", params.CommaListParam(params.IntParam("ids"))),
+        ("IntParam_multy_20", params.IntParam("multy", do_multy=True)),
+        ("missing_optional", params.IntParam("nothing", required=False)),
+    ]
+    for name, param in cases:
+        yield "params." + name, (lambda param=param: param.parse(query, {}))
+
+    # список объектов: по запросу на ID (parse) и одним запросом (compile_params)
+    query.setlist("items", [str(pk) for pk in Item.objects.values_list("pk", flat=True)[:50]])
+    items = params.ModelParam("items", model=Item, do_multy=True)
+    validate = params.compile_params([items])
+    yield "params.ModelParam_multy_50", lambda: items.parse(query, {})
+    yield "params.ModelParam_multy_50_bulk", lambda: validate(query, {})
+
+    # справочник в кеше процесса (dj_model_cache)
+    cached = params.ModelParam("item", model=Item, cache=ModelCache(ttl=3600))
+    yield "params.ModelParam_cached", lambda: cached.parse(query, {})
+    cached_multy = params.ModelParam("items", model=Item, do_multy=True, cache=ModelCache(ttl=3600))
+    validate_cached_multy = params.compile_params([cached_multy])
+    yield "params.ModelParam_multy_50_cached", lambda: validate_cached_multy(query, {})
+
+
+# ==== RESTFormProcessor
+
+class ItemForm(forms.ModelForm):
+    class Meta:
+        model = Item
+        fields = ["name", "code", "price", "qty", "created", "category"]
+
+
+class ItemMetaForm(forms.ModelForm):
+    # metadata_dict не выгружает DateTimeField (ленивый input_formats), см. _get_obj_attrs
+    class Meta:
+        model = Item
+        fields = ["name", "code", "price", "qty", "category"]
+
+
+class KindForm(forms.Form):
+    kind = forms.ChoiceField(choices=[(no, "Вид {}".format(no)) for no in range(30)])
+    title = forms.CharField(max_length=50)
+
+
+def form_cases():
+    item = Item.objects.select_related("category")[0]
+
+    yield "form.to_dict", lambda: RESTFormProcessor(ItemForm(instance=item)).to_dict()
+    yield "form.to_dict_just_data", lambda: RESTFormProcessor(ItemForm(instance=item)).to_dict(True)
+    yield "form.to_dict_bound_errors", lambda: RESTFormProcessor(
+        ItemForm(data={"name": "", "qty": "x"})).to_dict()
+    yield "form.metadata_dict", lambda: RESTFormProcessor(ItemMetaForm()).metadata_dict()
+    yield "form.get_choices_for_model", lambda: RESTFormProcessor(
+        ItemForm(instance=item)).get_choices_for("category")
+    yield "form.get_choices_for_choice", lambda: RESTFormProcessor(
+        KindForm(initial={"kind": 3})).get_choices_for("kind")
+
+
+# ==== шаблоны и страницы
+
+class PageView(VueBaseView):
+    def get_head_scripts(self):
+        res = []
+        self.append_vues(res, ["vue", "vuex", "router"])
+        self.append_static_css(res, "app/app.css")
+        return res
+
+    def get_window_context(self):
+        return dict(user="bench", items=list(range(50)), created=ZMoment((2020, 5, 1, 12, 30)))
+
+
+def page_cases():
+    template = Template("{% load vue_templates %}{% include_libs vue vuex router bootstrap_css cdn %}")
+    template_var = Template("{% load vue_templates %}{% include_libs from libs %}")
+    context = Context({})
+    context_var = Context({"libs": ["vue", "vuex", "router", "bootstrap_css", "cdn"]})
+
+    yield "template.include_libs", lambda: template.render(context)
+    yield "template.include_libs_from_var", lambda: template_var.render(context_var)
+
+    def page_context():
+        view = PageView()
+        view.request = make_request("get")
+        view.args, view.kwargs = (), {}
+        return view.get_context_data()
+
+    yield "page.VueBaseView.get_context_data", page_context
+
+
+# ==== ZMoment
+
+def zmoment_cases():
+    moment = ZMoment((2020, 5, 1, 12, 30, 15))
+    iso = moment.to_json()
+    short = moment.to_str()
+    local = moment.to_short()
+    ts = moment.to_ts()
+
+    yield "zmoment.parse_iso", lambda: ZMoment(iso)
+    yield "zmoment.parse_str", lambda: ZMoment(short)
+    yield "zmoment.parse_fmt", lambda: ZMoment(local, fmt=ZMoment.FMT_DATE_TIME)
+    yield "zmoment.from_ts", lambda: ZMoment(ts)
+    yield "zmoment.from_tuple", lambda: ZMoment((2020, 5, 1, 12, 30))
+    yield "zmoment.to_json", moment.to_json
+    yield "zmoment.to_str", moment.to_str
+    yield "zmoment.to_short", moment.to_short
+    yield "zmoment.to_ts", moment.to_ts
+
+
+GROUPS = [dispatch_cases, params_cases, form_cases, page_cases, zmoment_cases]
+
+
+def run(only=None, number=200, repeat=5, allocs=True):
+    """
+        Выполняет замеры, имена которых начинаются с only (если задан).
+        Возвращает {имя: результат}.
+    """
+    results = {}
+    for group in GROUPS:
+        for name, func in group():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            res = measure(func, number=number, repeat=repeat)
+            mem = measure_allocs(func) if allocs else None
+            extra = ""
+            if mem is not None:
+                res.update(mem)
+                extra = "peak {:>9.0f} B  retained {:>7.0f} B".format(
+                    mem["alloc_peak_bytes"], mem["retained_bytes"])
+            print_row(name, res, extra)
+            results[name] = res
+    return results
+
+
+def compare(results, baseline):
+    """
+        Сравнение ops/s с сохраненными результатами.
+    """
+    print("")
+    print("{:<40s} {:>12s} {:>12s} {:>8s}".format("", "baseline", "current", "ratio"))
+    for name in sorted(results):
+        old = baseline.get(name)
+        if old is None or not old.get("ops_per_sec"):
+            continue
+        ratio = results[name]["ops_per_sec"] / old["ops_per_sec"]
+        mark = "  <<" if ratio < 0.9 else ("  >>" if ratio > 1.1 else "")
+        print("{:<40s} {:>12.1f} {:>12.1f} {:>7.2f}x{}".format(
+            name, old["ops_per_sec"], results[name]["ops_per_sec"], ratio, mark))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="easy_vue request pipeline benchmarks")
+    parser.add_argument("--json", help="save results to JSON file")
+    parser.add_argument("--compare", help="compare with results saved earlier")
+    parser.add_argument("--only", action="append", help="run only benchmarks with this name prefix")
+    parser.add_argument("--number", type=int, default=200, help="calls per repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-allocs", action="store_true", help="skip memory measurement")
+    args = parser.parse_args()
+
+    prepare()
+    results = run(args.only, args.number, args.repeat, not args.no_allocs)
+    if args.json:
+        save_results(args.json, results)
+    if args.compare:
+        compare(results, load_results(args.compare))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,4 +11,8 @@ class EasyVueConfig(AppConfig):
     name = 'easy_vue'
     verbose_name = "EasyVue"
 
-default_app_config = "easy_vue.EasyVueConfig"
\ No newline at end of file
+    def ready(self):
+        from . import dj_perms
+        dj_perms.connect_signals()
+
+default_app_config = "easy_vue.EasyVueConfig"
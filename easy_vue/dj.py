@@ -24,6 +24,11 @@ import collections
 
 from .lib import ExtOrderedDict, load_class
 from .lib import JSDict
+from .zjson import ZJsonResponse
+from .dj_json_body import is_json_request, get_json_body, post_params, EJSONBodyError
+from . import dj_perms
+from . import dj_jobs
+from . import dj_profile
 
 from django.db import models
 from django.contrib.auth.decorators import login_required
@@ -71,6 +76,13 @@ class CsrfEnsureMixin(object):
         return ensure_csrf_cookie(view)
 
 
+def json_body_error_response(e):
+    """
+      Ответ на некорректное JSON тело запроса (dj_json_body.EJSONBodyError).
+    """
+    return ZJsonResponse({"Error": e.u_msg}, status=422)
+
+
 class JSONViewBase(View):
     """
       Читает данные из POST, содержащие поля с JSON выражениями.
@@ -88,6 +100,10 @@ class JSONViewBase(View):
 
       Добавляется в определение класса слева от стандартных View и ..PostMixin иэ этого модуля.
 
+      Если запрос пришел JSON телом (application/json), поля json_fields берутся 
+        из уже разобранного тела (см. dj_json_body), повторно не декодируются.
+        Некорректное тело или тело не JSON объект - ответ {"Error": ...} со статусом 422.
+
     """
     post_data=None
     json_fields=[]
@@ -97,6 +113,16 @@ class JSONViewBase(View):
         Читает POST, создает post_data
         """
         self.post_data=ExtOrderedDict()
+        if is_json_request(self.request):
+            body = get_json_body(self.request)
+            if body is None:
+                body = {}
+            if not isinstance(body, dict):
+                raise EJSONBodyError(u"JSON запроса должен быть объектом.")
+            for itm in self.json_fields:
+                self.post_data[itm] = body.get(itm)
+            return
+
         for itm in self.json_fields:
             val_j = self.request.POST.get(itm, None)
             val = None
@@ -112,7 +138,10 @@ class JSONViewBase(View):
     def post(self, request, *args, **kwargs):
         """
         """
-        self.read_POST()
+        try:
+            self.read_POST()
+        except EJSONBodyError as e:
+            return json_body_error_response(e)
         return super(JSONViewBase, self).post(request, *args, **kwargs)
 
     def get(self, request, *args, **kwargs):
@@ -122,7 +151,55 @@ class JSONViewBase(View):
         return super(JSONViewBase, self).get(request, *args, **kwargs)
 
 
-class PostViewMixin(View):
+class DispatchMixin(object):
+    """
+      Общая обработка запроса PostViewMixin и JSONPostMixin.
+
+      Атрибуты класса для настройки:
+        RATE_LIMIT - dj_limits.RateLimit или None, см. PostViewMixin.
+        PROFILER - dj_profile.Profiler, None или False, см. PostViewMixin.
+    """
+
+    RATE_LIMIT = None
+    PROFILER = None
+
+    def get_rate_limited_data(self, request, *args, **kwargs):
+        """
+          Вызывается перед возвратом JSON, если вызов отклонен RATE_LIMIT
+        """
+        return {"Error":"Too many requests."}
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+          Проверяет RATE_LIMIT перед обработкой запроса.
+        """
+        if self.RATE_LIMIT is None:
+            return self.profiled_dispatch(request, *args, **kwargs)
+
+        ticket = self.RATE_LIMIT.acquire(self, request)
+        if not ticket:
+            response = ZJsonResponse(self.get_rate_limited_data(request, *args, **kwargs), status=429)
+            response["Retry-After"] = ticket.retry_after_header
+            return response
+        try:
+            return self.profiled_dispatch(request, *args, **kwargs)
+        finally:
+            ticket.release()
+
+    def profiled_dispatch(self, request, *args, **kwargs):
+        """
+          Обработка запроса, выбранные запросы - под PROFILER.
+        """
+        dispatch = super(DispatchMixin, self).dispatch
+        profiler = self.PROFILER
+        if profiler is None:
+            profiler = dj_profile.get_default_profiler()
+        if not profiler:
+            return dispatch(request, *args, **kwargs)
+        return profiler.run(self, request, dispatch, *args, **kwargs)
+
+
+class PostViewMixin(DispatchMixin, View):
     """
       Реализует метод post к обычному View.
 
@@ -133,6 +210,8 @@ class PostViewMixin(View):
 
       Определяет атрибут: 
         request_params равный request.post или get в завимости от метода.
+          Для JSON запросов (application/json) вместо request.post - dj_json_body.JSONBodyParams.
+          Некорректное тело или тело не JSON объект - ответ {"Error": ...} со статусом 422.
       
       Атрибуты класса для настройки:
         http_method_names=['get', 'post'] - варианты разрешенных обработчиков
@@ -149,6 +228,11 @@ class PostViewMixin(View):
             Для проверки вызывает check_user_permissions, который может быть переопределен.
             Работает только с registered_only=True.
             Если permissions is None - разрешения не проверяются.
+        RATE_LIMIT - dj_limits.RateLimit или None. Проверяется до всего остального,
+            отклоненный вызов получает статус 429 с заголовком Retry-After и
+            JSON из get_rate_limited_data.
+        PROFILER - dj_profile.Profiler для выборочного профилирования запросов.
+            None - по настройке settings.VUE_PROFILE, False - не профилировать.
 
 
       Использование:
@@ -192,21 +276,12 @@ class PostViewMixin(View):
             в self.permissions.
           Возвращает True, если это так, или self.permissions is None.
           Если пользователь не авторизован - возвращает False
+          Результаты кешируются в запросе и между запросами (см. dj_perms).
 
         """
-        if not user.is_authenticated():
-            return False
         if permissions is None:
             permissions = self.permissions
-        if permissions is None:
-            return True
-        if len(permissions) is None:
-            return False
-        res = True
-        for itm in permissions:
-            if not user.has_perm(itm):
-                res = False
-        return res
+        return dj_perms.check_user_permissions(user, permissions, getattr(self, "request", None))
 
     def check_user_authenticated(self, request, *args, **kwargs):
         """
@@ -218,9 +293,9 @@ class PostViewMixin(View):
                 if self.check_user_permissions(request.user):
                     return self.proc_view(request, *args, **kwargs)
                 else:
-                    return JsonResponse(self.get_forbidden_data(request,True, True, *args, **kwargs))                
+                    return ZJsonResponse(self.get_forbidden_data(request,True, True, *args, **kwargs))                
             else:
-                return JsonResponse(self.get_forbidden_data(request,True, None, *args, **kwargs))                
+                return ZJsonResponse(self.get_forbidden_data(request,True, None, *args, **kwargs))                
         else:
             return self.proc_view(request, *args, **kwargs)
 
@@ -236,9 +311,13 @@ class PostViewMixin(View):
         """
         """
         if ('post' in self.http_method_names) and ((self.ajax_only and self.request.is_ajax()) or not self.ajax_only ):
-            self.request_params = request.POST
+            self.request_params = post_params(request)
             "check_user_authenticated"
-            return self.check_user_authenticated(request, *args, **kwargs)
+            try:
+                return self.check_user_authenticated(request, *args, **kwargs)
+            except EJSONBodyError as e:
+                # тело разбирается при первом обращении к request_params
+                return json_body_error_response(e)
         else:
             raise Http404('Method unallowed')
 
@@ -252,13 +331,15 @@ class PostViewMixin(View):
             raise Http404('Method unallowed')
 
 
-class JSONPostMixin(View):
+class JSONPostMixin(DispatchMixin, View):
     """
       Реализует метод post, возвращающий JsonResponse.
       Возвращаемое значение в виде словаря генерируется в методе get_output_data.
 
       Определяет атрибут: 
         request_params равный request.post или get в завимости от метода.
+          Для JSON запросов (application/json) вместо request.post - dj_json_body.JSONBodyParams.
+          Некорректное тело или тело не JSON объект - ответ {"Error": ...} со статусом 422.
       
       Атрибуты класса для настройки:
         http_method_names=['get', 'post'] - варианты разрешенных обработчиков
@@ -275,6 +356,11 @@ class JSONPostMixin(View):
             Для проверки вызывает check_user_permissions, который может быть переопределен.
             Работает только с registered_only=True.
             Если permissions is None - разрешения не проверяются.
+        RATE_LIMIT - dj_limits.RateLimit или None. Проверяется до всего остального,
+            отклоненный вызов получает статус 429 с заголовком Retry-After и
+            JSON из get_rate_limited_data.
+        PROFILER - dj_profile.Profiler для выборочного профилирования запросов.
+            None - по настройке settings.VUE_PROFILE, False - не профилировать.
 
 
       Использование:
@@ -311,21 +397,12 @@ class JSONPostMixin(View):
             в self.permissions.
           Возвращает True, если это так, или self.permissions is None.
           Если пользователь не авторизован - возвращает False
+          Результаты кешируются в запросе и между запросами (см. dj_perms).
 
         """
-        if not user.is_authenticated():
-            return False
         if permissions is None:
             permissions = self.permissions
-        if permissions is None:
-            return True
-        if len(permissions) is None:
-            return False
-        res = True
-        for itm in permissions:
-            if not user.has_perm(itm):
-                res = False
-        return res
+        return dj_perms.check_user_permissions(user, permissions, getattr(self, "request", None))
 
     def check_user_authenticated(self, request, *args, **kwargs):
         """
@@ -337,9 +414,9 @@ class JSONPostMixin(View):
                 if self.check_user_permissions(request.user):
                     return self.proc_view(request, *args, **kwargs)
                 else:
-                    return JsonResponse(self.get_forbidden_data(request,True, True, *args, **kwargs))                
+                    return ZJsonResponse(self.get_forbidden_data(request,True, True, *args, **kwargs))                
             else:
-                return JsonResponse(self.get_forbidden_data(request,True, None, *args, **kwargs))                
+                return ZJsonResponse(self.get_forbidden_data(request,True, None, *args, **kwargs))                
         else:
             return self.proc_view(request, *args, **kwargs)
 
@@ -348,14 +425,17 @@ class JSONPostMixin(View):
           Запрашиваются данные в get_output_data, и возвращаются в JsonResponse
           Может дополнятся в потомках для стандартных предобработок данных.
         """
-        return JsonResponse(self.get_output_data(request, *args, **kwargs))
+        return ZJsonResponse(self.get_output_data(request, *args, **kwargs))
 
     def post(self, request, *args, **kwargs):
         """
         """
         if ('post' in self.http_method_names) and ((self.ajax_only and self.request.is_ajax()) or not self.ajax_only ):
-            self.request_params = request.POST
-            return self.check_user_authenticated(request, *args, **kwargs)
+            self.request_params = post_params(request)
+            try:
+                return self.check_user_authenticated(request, *args, **kwargs)
+            except EJSONBodyError as e:
+                return json_body_error_response(e)
         else:
             raise Http404()
 
@@ -440,7 +520,7 @@ class JSONPostMixin_1(PostViewMixin, View):
         """
            JsonResponse(out_data) 
         """
-        return JsonResponse(out_data)
+        return ZJsonResponse(out_data)
 
 
 class EJSONMixinErrorException(Exception):
@@ -595,7 +675,7 @@ class JSONAnswerMixin(JSONPostMixin_1):
         return self.get_answer()
 
 
-class FilePostMixin(PostViewMixin, View):
+class FilePostMixin(dj_jobs.BackgroundJobMixin, PostViewMixin, View):
     """
       Реализует метод post, возвращающий содержимое файла или файлового потока.
 
@@ -605,6 +685,13 @@ class FilePostMixin(PostViewMixin, View):
         Уточнить CONTENT_TYPE и определить get_filename
 
       get_filename вызывается после формирования данных файла.
+
+      BACKGROUND_JOB - dj_jobs.JobQueue или None. Если задан, POST не ждет формирования
+        файла: get_output_data выполняется в очереди, а клиент сразу получает
+        JSON {"job": состояние задачи} со статусом 202 (или 429 с заголовком
+        Retry-After: BACKGROUND_RETRY_AFTER, если очередь заполнена).
+        Файл забирается с dj_rest_jobs.JobStatusView с параметром download.
+        Прогресс из get_output_data - self.set_job_progress(50, u"...").
     """
 
     CONTENT_TYPE = 'application/vnd.ms-excel'
@@ -642,3 +729,26 @@ class FilePostMixin(PostViewMixin, View):
         response['Content-Disposition'] = 'attachment; filename="%s"' % (fn,)
         return response
 
+    def proc_view(self, request, *args, **kwargs):
+        """
+          При заданном BACKGROUND_JOB ставит формирование файла в очередь.
+        """
+        if self.BACKGROUND_JOB is None or request.method != "POST":
+            return super(FilePostMixin, self).proc_view(request, *args, **kwargs)
+        try:
+            job = self.submit_background_job(request, *args, **kwargs)
+        except dj_jobs.EJobRejected as e:
+            response = ZJsonResponse({"Error": e.u_msg}, status=429)
+            response["Retry-After"] = self.get_retry_after_header()
+            return response
+        return ZJsonResponse({"job": job}, status=202)
+
+    def run_background(self, job_id, request, *args, **kwargs):
+        """
+          Выполняется в фоновой задаче: формирует файл.
+        """
+        self.background_job_id = job_id
+        out_data = self.get_output_data(request, *args, **kwargs)
+        return dj_jobs.file_result(out_data, self.get_file_contenttype(request, *args, **kwargs),
+            self.get_filename(request, *args, **kwargs))
+
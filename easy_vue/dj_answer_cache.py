@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Кеширование ответов RESTView на сервере.
+
+    Кешируется накопленный ответ view (словарь) после обработчика, а не HTTP ответ,
+    поэтому выборка полей, формат (JSON / MessagePack), сжатие и ETag
+    выполняются для каждого запроса как обычно. Кешируются только успешные ответы.
+    Проверка доступа выполняется до кеша, для каждого запроса.
+
+    Защита от одновременного пересчета одного ответа:
+        - одновременные промахи по одному ключу в процессе ждут первого,
+            обработчик выполняется один раз;
+        - вероятностное раннее обновление: чем ближе окончание срока жизни и чем дольше
+            считается ответ, тем вероятнее, что очередной запрос пересчитает его заранее,
+            пока остальные получают еще действующий ответ (beta - агрессивность, 0 - выключено).
+
+    ResponseCache(ttl=60, cache="default", vary=None, beta=1.0, methods=("GET",), wait_timeout=30)
+        vary - чем различаются ответы кроме метода, адреса и параметров:
+            None - ответ общий для всех;
+            "user" - для каждого пользователя свой;
+            "role" - общий для пользователей с одинаковым набором групп
+                и признаками is_staff / is_superuser;
+            функция (view, request) -> строка.
+        wait_timeout - сколько секунд ждать пересчета, начатого другим запросом.
+
+    Счетчики (в процессе): ResponseCache.stats() -> {hits, misses, early_refreshes, coalesced, hit_ratio}.
+
+    Использование:
+        class DictView(RESTView):
+            ANSWER_CACHE = ResponseCache(ttl=300, vary="role")
+"""
+
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+
+from django.core.cache import caches
+
+
+class _Flight(object):
+    """
+        Выполняющийся в этом процессе пересчет, которого ждут остальные запросы.
+    """
+    __slots__ = ("event", "answer")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.answer = None
+
+
+class ResponseCache(object):
+    """
+        Настройка кеширования ответов view, см. описание модуля.
+    """
+
+    KEY_PREFIX = "easy_vue:answer:"
+
+    def __init__(self, ttl=60, cache="default", vary=None, beta=1.0, methods=("GET",), wait_timeout=30):
+        if vary not in (None, "user", "role") and not callable(vary):
+            raise Exception("ResponseCache: uncorrect vary '{}'.".format(vary))
+        self.ttl = ttl
+        self.alias = cache
+        self.vary = vary
+        self.beta = beta
+        self.methods = methods
+        self.wait_timeout = wait_timeout
+
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = dict(hits=0, misses=0, early_refreshes=0, coalesced=0)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        """
+            Счетчики попаданий и промахов в этом процессе.
+        """
+        with self._lock:
+            res = dict(self._counters)
+        total = res["hits"] + res["misses"]
+        res["hit_ratio"] = float(res["hits"]) / total if total else None
+        return res
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self._counters:
+                self._counters[key] = 0
+
+    def get_vary_key(self, view, request):
+        """
+            Часть ключа, зависящая от пользователя (см. vary).
+        """
+        if self.vary is None:
+            return ""
+        if callable(self.vary):
+            return self.vary(view, request)
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated():
+            return "anon"
+        if self.vary == "user":
+            return "u{}".format(user.pk)
+        groups = sorted(user.groups.values_list("pk", flat=True))
+        return "r{}{}:{}".format(int(user.is_staff), int(user.is_superuser),
+            ",".join(str(pk) for pk in groups))
+
+    def normalize_params(self, params):
+        """
+            Параметры запроса в виде, не зависящем от порядка ключей.
+        """
+        if params is None:
+            return ""
+        return json.dumps(sorted((key, params.getlist(key)) for key in params),
+            sort_keys=True, default=unicode)
+
+    def make_key(self, view, request):
+        """
+            Ключ кеша: view + метод + адрес + параметры + vary.
+        """
+        view_class = type(view)
+        hh = hashlib.md5()
+        for part in (request.method, request.path,
+                self.normalize_params(getattr(view, "request_params", None)),
+                self.get_vary_key(view, request)):
+            hh.update(part.encode("utf-8"))
+            hh.update(b"\0")
+        return "{}{}.{}:{}".format(self.KEY_PREFIX, view_class.__module__, view_class.__name__,
+            hh.hexdigest())
+
+    def is_fresh(self, entry):
+        """
+            False, если запись пора пересчитать заранее (вероятностно, по времени
+            пересчета delta и оставшемуся сроку).
+        """
+        if not self.beta:
+            return True
+        rnd = random.random() or 1e-12
+        return time.time() - entry["delta"] * self.beta * math.log(rnd) < entry["expires"]
+
+    def fetch(self, view, request, compute):
+        """
+            Возвращает ответ из кеша или вычисляет его.
+            compute() -> (answer, cacheable) выполняет обработчик view.
+            Возвращает (answer, from_cache).
+        """
+        key = self.make_key(view, request)
+        entry = self.cache.get(key)
+        if entry is not None:
+            if self.is_fresh(entry):
+                self._count("hits")
+                return (entry["answer"], True)
+            self._count("early_refreshes")
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if entry is not None:
+                # пересчет уже идет, пока отдается действующий ответ
+                self._count("hits")
+                return (entry["answer"], True)
+            flight.event.wait(self.wait_timeout)
+            if flight.answer is not None:
+                self._count("coalesced")
+                self._count("hits")
+                return (flight.answer, True)
+            # первый запрос завершился ошибкой или не дождались - считаем сами
+            self._count("misses")
+            return (compute()[0], False)
+
+        self._count("misses")
+        try:
+            start = time.time()
+            answer, cacheable = compute()
+            if cacheable:
+                now = time.time()
+                self.cache.set(key, dict(answer=answer, delta=now - start, expires=now + self.ttl),
+                    self.ttl)
+                flight.answer = answer
+            return (answer, False)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
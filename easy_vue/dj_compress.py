@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Сжатие ответов gzip / deflate по заголовку Accept-Encoding запроса.
+    В отличие от GZipMiddleware включается для отдельных view (см. RESTView.COMPRESS_ANSWER)
+    и не трогает маленькие ответы, на которых сжатие только тратит процессор.
+
+    Настройки по умолчанию:
+        settings.VUE_COMPRESS_ANSWER (= False) - сжимать ли ответы RESTView.
+        settings.VUE_COMPRESS_MIN_SIZE (= 1024) - минимальный размер ответа для сжатия, байт.
+        settings.VUE_COMPRESS_LEVEL (= 6) - степень сжатия zlib, 1..9.
+"""
+
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVEL = 6
+
+ENCODINGS = ("gzip", "deflate")
+
+# параметр wbits zlib: gzip - с заголовком gzip (без имени файла и с mtime=0),
+# deflate - в обертке zlib, как требует HTTP
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def get_settings(enabled=None, min_size=None, level=None):
+    """
+        Возвращает (enabled, min_size, level), недостающие - из настроек.
+    """
+    if enabled is None:
+        enabled = getattr(settings, "VUE_COMPRESS_ANSWER", False)
+    if min_size is None:
+        min_size = getattr(settings, "VUE_COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+    if level is None:
+        level = getattr(settings, "VUE_COMPRESS_LEVEL", DEFAULT_LEVEL)
+    return (enabled, min_size, level)
+
+
+def choose_encoding(accept_encoding, encodings=ENCODINGS):
+    """
+        Выбирает сжатие из encodings (в порядке предпочтения сервера) по заголовку
+        Accept-Encoding с учетом q. Возвращает название или None.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for itm in accept_encoding.split(","):
+        parts = itm.strip().split(";")
+        name = parts[0].strip().lower()
+        q = 1.0
+        for param in parts[1:]:
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+
+    best, best_q = None, 0.0
+    for name in encodings:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress_bytes(data, encoding, level=DEFAULT_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_iter(chunks, encoding, level=DEFAULT_LEVEL):
+    """
+        Сжимает поток частей, выдавая сжатые части по мере готовности.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    for chunk in chunks:
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode("utf-8")
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+        # части выдаются сразу, а не копятся в буфере zlib
+        data = compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_response(request, response, min_size=None, level=None, encodings=ENCODINGS):
+    """
+        Сжимает ответ, если клиент это поддерживает и ответ достаточно велик.
+        Потоковые ответы сжимаются всегда (их размер заранее неизвестен).
+        Возвращает тот же объект ответа.
+    """
+    min_size, level = get_settings(True, min_size, level)[1:]
+
+    if response.has_header("Content-Encoding") or response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if not response.streaming and len(response.content) < min_size:
+        return response
+
+    patch_vary_headers(response, ("Accept-Encoding",))
+    encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), encodings)
+    if encoding is None:
+        return response
+
+    if response.streaming:
+        response.streaming_content = compress_iter(response.streaming_content, encoding, level)
+        if response.has_header("Content-Length"):
+            del response["Content-Length"]
+    else:
+        compressed = compress_bytes(response.content, encoding, level)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+
+    response["Content-Encoding"] = encoding
+    return response
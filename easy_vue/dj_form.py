@@ -8,12 +8,15 @@
 
 import json
 
+import six
 from django.forms import Field, ValidationError
 
 
 class JSONField(Field):
     """
         Принимает на вход строку с JSON. Преобразует ее в объект.
+        Если данные формы - JSON тело запроса (dj_json_body.JSONBodyParams),
+        значение уже разобрано и используется как есть.
     """
 
     def to_python(self, value):
@@ -28,6 +31,9 @@ class JSONField(Field):
         if value in self.empty_values:
             return None
 
+        if not isinstance(value, six.string_types):
+            return value
+
         try:
             return json.loads(value)
         except Exception as e:
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Повторные запросы с заголовком Idempotency-Key выполняются один раз.
+
+    Первый завершенный ответ (статус, заголовки, содержимое) запоминается по ключу
+    пользователь + view + Idempotency-Key. Повтор получает сохраненный ответ
+    (с заголовком Idempotent-Replayed: true), а одновременный с выполнением дубль -
+    ждет окончания первого запроса, а не выполняется еще раз.
+    Ответы со статусом 5xx и кратковременные отказы (408, 409, 429) не запоминаются -
+    ключ освобождается, и повтор запроса выполняется заново.
+    Тот же ключ с другими параметрами запроса - ответ 422.
+
+    Хранилище:
+        Idempotency() - LRU в памяти процесса на max_size ответов.
+        Idempotency(cache="default") - кеш Django, общий для процессов. Одновременные
+            дубли в разных процессах ждут опросом кеша.
+
+    Использование:
+        class PayView(RESTView):
+            IDEMPOTENCY = Idempotency(ttl=3600)
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.http.request import RawPostDataException
+
+from .lib import monotonic
+
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class LRUStore(object):
+    """
+        Сохраненные ответы в памяти процесса, не более max_size, с временем жизни ttl.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            itm = self._data.pop(key, None)
+            if itm is None:
+                return None
+            expires, record = itm
+            if expires < monotonic():
+                return None
+            self._data[key] = itm
+            return record
+
+    def set(self, key, record):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (monotonic() + self.ttl, record)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def acquire(self, key, timeout):
+        # внутри процесса дубли ждут в Idempotency._flights
+        return True
+
+    def release(self, key):
+        pass
+
+
+class CacheStore(object):
+    """
+        Сохраненные ответы в кеше Django. Блокировка выполнения - через cache.add.
+    """
+
+    def __init__(self, alias, ttl):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, record):
+        self.cache.set(key, record, self.ttl)
+
+    def acquire(self, key, timeout):
+        return self.cache.add(key + ":lock", 1, timeout)
+
+    def release(self, key):
+        self.cache.delete(key + ":lock")
+
+
+class _Flight(object):
+    """
+        Выполняющийся в этом процессе запрос, которого ждут дубли.
+    """
+    __slots__ = ("event", "record")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.record = None
+
+
+class Idempotency(object):
+    """
+        Настройка обработки Idempotency-Key для view, см. описание модуля.
+            cache - имя кеша Django или None - LRU в памяти процесса.
+            max_size - размер LRU.
+            ttl - сколько секунд помнить ответ.
+            wait_timeout - сколько секунд дубль ждет окончания первого запроса,
+                после этого - ответ 409.
+            max_body - тело запроса больше этого размера не учитывается при сравнении
+                параметров дублей.
+            lock_ttl - время жизни блокировки выполнения в кеше Django (на случай,
+                если процесс, выполнявший запрос, завершился аварийно).
+    """
+
+    KEY_PREFIX = "easy_vue:idem:"
+    # 408, 409, 429 - повтор может пройти, такие ответы не запоминаются
+    TRANSIENT_STATUSES = (408, 409, 429)
+    MAX_KEY_LENGTH = 255
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, cache=None, max_size=1000, ttl=86400, wait_timeout=30, max_body=1048576,
+            lock_ttl=300):
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.max_body = max_body
+        self.lock_ttl = lock_ttl
+        if cache is None:
+            self.store = LRUStore(max_size, ttl)
+        else:
+            self.store = CacheStore(cache, ttl)
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def make_key(self, view, request, key):
+        """
+            Полный ключ: view + пользователь + Idempotency-Key.
+        """
+        view_class = type(view)
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated():
+            who = "u{}".format(user.pk)
+        else:
+            who = "ip{}".format(request.META.get("REMOTE_ADDR", ""))
+        return "{}{}.{}:{}:{}".format(self.KEY_PREFIX, view_class.__module__, view_class.__name__,
+            who, hashlib.md5(key.encode("utf-8")).hexdigest())
+
+    def fingerprint(self, request):
+        """
+            Хеш метода, адреса и параметров запроса - для проверки, что дубль тот же самый.
+        """
+        hh = hashlib.md5()
+        hh.update(request.method.encode("utf-8"))
+        hh.update(request.get_full_path().encode("utf-8"))
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > self.max_body:
+            hh.update(str(length))
+            return hh.hexdigest()
+        try:
+            hh.update(request.body)
+        except RawPostDataException:
+            # multipart уже разобран в POST / FILES
+            for key in sorted(request.POST.keys()):
+                hh.update(repr((key, request.POST.getlist(key))))
+            for key in sorted(request.FILES.keys()):
+                hh.update(repr((key, [(itm.name, itm.size) for itm in request.FILES.getlist(key)])))
+        return hh.hexdigest()
+
+    def run(self, view, request, key, func):
+        """
+            Выполняет func() -> response не более одного раза для ключа key.
+        """
+        if len(key) > self.MAX_KEY_LENGTH:
+            return view.idempotency_error_response(view.DATA_ERROR_STATUS,
+                u"Слишком длинный Idempotency-Key.")
+
+        full_key = self.make_key(view, request, key)
+        fingerprint = self.fingerprint(request)
+
+        record = self.store.get(full_key)
+        if record is not None:
+            return self.replay(view, record, fingerprint)
+
+        with self._lock:
+            flight = self._flights.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[full_key] = _Flight()
+
+        if not leader:
+            flight.event.wait(self.wait_timeout)
+            record = flight.record or self.store.get(full_key)
+            if record is None:
+                return self.conflict(view)
+            return self.replay(view, record, fingerprint)
+
+        try:
+            return self._run_leader(view, full_key, fingerprint, func, flight)
+        finally:
+            with self._lock:
+                self._flights.pop(full_key, None)
+            flight.event.set()
+
+    def _run_leader(self, view, full_key, fingerprint, func, flight):
+        deadline = monotonic() + self.wait_timeout
+        # блокировка между процессами: ее держит тот, кто выполняет запрос
+        while not self.store.acquire(full_key, self.lock_ttl):
+            record = self.store.get(full_key)
+            if record is not None:
+                return self.replay(view, record, fingerprint)
+            if monotonic() > deadline:
+                return self.conflict(view)
+            time.sleep(self.POLL_INTERVAL)
+
+        try:
+            record = self.store.get(full_key)
+            if record is not None:
+                return self.replay(view, record, fingerprint)
+
+            response = func()
+            if response.streaming:
+                response = self.materialize(response)
+            if response.status_code < 500:
+                record = self.make_record(response, fingerprint)
+                if self.is_final(response):
+                    self.store.set(full_key, record)
+                # одновременные дубли получают тот же ответ, даже кратковременный отказ
+                flight.record = record
+            return response
+        finally:
+            self.store.release(full_key)
+
+    def is_final(self, response):
+        """
+            Запоминать ли ответ: все, кроме 5xx и кратковременных отказов TRANSIENT_STATUSES.
+        """
+        return response.status_code < 500 and response.status_code not in self.TRANSIENT_STATUSES
+
+    def materialize(self, response):
+        """
+            Потоковый ответ читается целиком, что бы его можно было сохранить.
+        """
+        res = HttpResponse(b"".join(response.streaming_content), status=response.status_code)
+        res.reason_phrase = response.reason_phrase
+        for header, value in response.items():
+            res[header] = value
+        return res
+
+    def make_record(self, response, fingerprint):
+        return dict(
+            fingerprint=fingerprint,
+            status=response.status_code,
+            reason=response.reason_phrase,
+            headers=list(response.items()),
+            content=response.content,
+        )
+
+    def replay(self, view, record, fingerprint):
+        """
+            Ответ из сохраненного.
+        """
+        if record["fingerprint"] != fingerprint:
+            return view.idempotency_error_response(view.DATA_ERROR_STATUS,
+                u"Idempotency-Key уже использован для другого запроса.")
+        response = HttpResponse(record["content"], status=record["status"])
+        response.reason_phrase = record["reason"]
+        for header, value in record["headers"]:
+            response[header] = value
+        response[REPLAYED_HEADER] = "true"
+        return response
+
+    def conflict(self, view):
+        return view.idempotency_error_response(view.CONFLICT_STATUS,
+            u"Запрос с этим Idempotency-Key еще выполняется.")
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Фоновое выполнение долгих операций view (отчеты, тяжелые process_post)
+    в пуле потоков или процессов этого же сервера, без внешнего брокера.
+
+    View сразу отвечает идентификатором задачи, а результат (ответ или файл)
+    забирается с view состояния задачи (dj_rest_jobs.JobStatusView).
+
+    JobQueue(name, workers=4, kind="thread", max_queue=100, per_user=2, result_ttl=3600, cache=None)
+        name - имя очереди (без "."), входит в идентификатор задачи.
+        kind - "thread" (пул потоков) или "process" (пул процессов). В пуле процессов
+            выполняются только функции уровня модуля с параметрами, которые можно
+            передать pickle (см. RESTView.get_background_call).
+        max_queue - максимум ожидающих и выполняющихся задач очереди в процессе.
+        per_user - максимум ожидающих и выполняющихся задач одного пользователя.
+        result_ttl - сколько секунд хранится результат после завершения.
+        cache - имя кеша Django для состояния и результатов задач, общего для всех
+            процессов сервера, или None - в памяти процесса. Во втором случае
+            состояние задачи можно получить только в том процессе, где она создана.
+
+    Функция задачи возвращает answer_result(...) или file_result(...).
+
+    Использование:
+        REPORTS = JobQueue("reports", workers=2)
+
+        class ReportView(FilePostMixin, View):
+            BACKGROUND_JOB = REPORTS
+"""
+
+import copy
+import uuid
+import pickle
+import threading
+import traceback
+import multiprocessing
+
+import six
+from django.core.cache import caches
+from django.db import connections
+
+from .lib import monotonic
+from . import dj_pool
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+# задачи, которые ждут или выполняются
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+_queues = {}
+
+
+class EJobRejected(Exception):
+    """
+        Задача не принята: очередь заполнена или превышен лимит пользователя.
+    """
+
+    def __init__(self, u_msg):
+        super(EJobRejected, self).__init__(u_msg)
+        self.u_msg = u_msg
+
+
+def answer_result(answer, status=200):
+    """
+        Результат задачи - ответ view (словарь) и HTTP статус.
+    """
+    return dict(status=status, answer=answer)
+
+
+def file_result(content, content_type, filename):
+    """
+        Результат задачи - файл. content - байты или объект с методом read.
+    """
+    if hasattr(content, "read"):
+        content = content.read()
+    return dict(status=200, file=dict(content=content, content_type=content_type, filename=filename))
+
+
+def get_queue(name):
+    """
+        Возвращает очередь по имени или None.
+    """
+    return _queues.get(name)
+
+
+def get_owner_key(request):
+    """
+        Владелец задачи: пользователь или, для анонимных, сессия / IP.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated():
+        return "u{}".format(user.pk)
+    session = getattr(request, "session", None)
+    if session is not None and session.session_key:
+        return "s{}".format(session.session_key)
+    return "ip{}".format(request.META.get("REMOTE_ADDR", ""))
+
+
+class MemoryJobStore(object):
+    """
+        Состояние задач в памяти процесса.
+    """
+
+    def __init__(self, result_ttl):
+        self.result_ttl = result_ttl
+        self._jobs = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id):
+        with self._lock:
+            expires = self._expires.get(job_id)
+            if expires is not None and expires < monotonic():
+                self._jobs.pop(job_id, None)
+                self._expires.pop(job_id, None)
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def set(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            if job["state"] not in ACTIVE_STATES:
+                self._expires[job["id"]] = monotonic() + self.result_ttl
+            self._prune()
+
+    def update(self, job_id, **kwargs):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(kwargs)
+
+    def _prune(self):
+        now = monotonic()
+        for job_id in [key for key, val in self._expires.iteritems() if val < now]:
+            self._jobs.pop(job_id, None)
+            del self._expires[job_id]
+
+
+class CacheJobStore(object):
+    """
+        Состояние задач в кеше Django.
+    """
+
+    # время жизни записи еще не завершенной задачи (на случай аварийного завершения процесса)
+    ACTIVE_TTL = 86400
+    KEY_PREFIX = "easy_vue:job:"
+
+    def __init__(self, alias, result_ttl):
+        self.alias = alias
+        self.result_ttl = result_ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, job_id):
+        return self.cache.get(self.KEY_PREFIX + job_id)
+
+    def set(self, job):
+        ttl = self.ACTIVE_TTL if job["state"] in ACTIVE_STATES else self.result_ttl
+        self.cache.set(self.KEY_PREFIX + job["id"], job, ttl)
+
+    def update(self, job_id, **kwargs):
+        job = self.get(job_id)
+        if job is not None and job["state"] in ACTIVE_STATES:
+            job.update(kwargs)
+            self.set(job)
+
+
+def _run_in_process(func, args, kwargs):
+    """
+        Выполняется в процессе пула. Исключения возвращаются текстом,
+        что бы не зависеть от того, можно ли передать их через pickle.
+        Результат, который нельзя передать через pickle, - тоже ошибка задачи.
+    """
+    try:
+        res = func(*args, **kwargs)
+        pickle.dumps(res, pickle.HIGHEST_PROTOCOL)
+        return (True, res)
+    except Exception as e:
+        return (False, traceback.format_exc())
+    finally:
+        connections.close_all()
+
+
+class JobQueue(object):
+    """
+        Очередь фоновых задач, см. описание модуля.
+    """
+
+    def __init__(self, name, workers=4, kind="thread", max_queue=100, per_user=2,
+            result_ttl=3600, cache=None):
+        if kind not in ("thread", "process"):
+            raise Exception("JobQueue: uncorrect kind '{}'.".format(kind))
+        if "." in name:
+            raise Exception("JobQueue: uncorrect name '{}', '.' is not allowed.".format(name))
+        if name in _queues:
+            raise Exception("JobQueue '{}' already exists.".format(name))
+        self.name = name
+        self.workers = workers
+        self.kind = kind
+        self.max_queue = max_queue
+        self.per_user = per_user
+        self.result_ttl = result_ttl
+        if cache is None:
+            self.store = MemoryJobStore(result_ttl)
+        else:
+            self.store = CacheJobStore(cache, result_ttl)
+
+        self._pool = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._user_active = {}
+
+        _queues[name] = self
+
+    def get_pool(self):
+        """
+            Пул создается при первой задаче.
+        """
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "thread":
+                        self._pool = dj_pool.get_pool("jobs:" + self.name, self.workers)
+                    else:
+                        # дочерние процессы не должны наследовать соединения с БД
+                        connections.close_all()
+                        self._pool = multiprocessing.Pool(self.workers)
+        return self._pool
+
+    def submit(self, request, call, view_name=""):
+        """
+            Ставит в очередь вызов call. Для пула потоков - функция call(job_id),
+            для пула процессов - (func, args, kwargs). Возвращает словарь состояния задачи.
+            Если очередь заполнена - вызывает EJobRejected.
+        """
+        owner = get_owner_key(request)
+        with self._lock:
+            if self._active >= self.max_queue:
+                raise EJobRejected(u"Очередь задач заполнена, повторите позже.")
+            if self.per_user and self._user_active.get(owner, 0) >= self.per_user:
+                raise EJobRejected(u"Слишком много выполняющихся задач.")
+            self._active += 1
+            self._user_active[owner] = self._user_active.get(owner, 0) + 1
+
+        job = dict(id="{}.{}".format(self.name, uuid.uuid4().hex), owner=owner, view=view_name,
+            state=QUEUED, progress=None, message=None, status=None, answer=None, file=None)
+        try:
+            self.store.set(job)
+            pool = self.get_pool()
+            if self.kind == "thread":
+                pool.apply_async(dj_pool._call_closing_db,
+                    (self._run_thread, (job["id"], owner, call), {}))
+            else:
+                func, args, kwargs = dj_pool._normalize_call(call)
+                # ошибка pickle в пуле не вызывает callback (в Python 2 нет error_callback),
+                # поэтому задача, которую нельзя передать в процесс, отклоняется здесь
+                pickle.dumps((func, args, kwargs), pickle.HIGHEST_PROTOCOL)
+                options = {}
+                if six.PY3:
+                    options["error_callback"] = lambda e: self._finish(job["id"], owner, False,
+                        "".join(traceback.format_exception_only(type(e), e)))
+                # момент начала выполнения в процессе неизвестен, до окончания задача - QUEUED
+                pool.apply_async(_run_in_process, (func, args, kwargs),
+                    callback=lambda res: self._finish(job["id"], owner, res[0], res[1]), **options)
+        except Exception as e:
+            # задача - в состоянии ошибки, место в очереди освобождается
+            self._finish(job["id"], owner, False, traceback.format_exc())
+            raise
+        return self.public_state(job)
+
+    def _run_thread(self, job_id, owner, call):
+        # owner передается из submit: запись задачи в кеше могла быть уже вытеснена
+        self.store.update(job_id, state=RUNNING)
+        try:
+            res = call(job_id)
+        except Exception as e:
+            self._finish(job_id, owner, False, traceback.format_exc())
+        else:
+            self._finish(job_id, owner, True, res)
+
+    def _finish(self, job_id, owner, ok, res):
+        try:
+            job = self.store.get(job_id)
+            if job is None:
+                return
+            if ok and not isinstance(res, dict):
+                # задача должна вернуть answer_result / file_result
+                ok, res = False, "Job result must be dict, got {!r}.".format(type(res))
+            if ok:
+                job.update(state=DONE, status=res.get("status", 200),
+                    answer=res.get("answer"), file=res.get("file"))
+            else:
+                job.update(state=ERROR, message=u"Ошибка выполнения задачи.", error=res)
+            self.store.set(job)
+        finally:
+            self._release(owner)
+
+    def _release(self, owner):
+        with self._lock:
+            self._active -= 1
+            cnt = self._user_active.get(owner, 0) - 1
+            if cnt > 0:
+                self._user_active[owner] = cnt
+            else:
+                self._user_active.pop(owner, None)
+
+    def set_progress(self, job_id, progress=None, message=None):
+        """
+            Обновляет прогресс выполняющейся задачи (вызывается из самой задачи).
+        """
+        self.store.update(job_id, progress=progress, message=message)
+
+    def get(self, job_id):
+        """
+            Полное состояние задачи (с результатом) или None.
+        """
+        return self.store.get(job_id)
+
+    @staticmethod
+    def public_state(job):
+        """
+            Состояние задачи для выдачи клиенту, без результата и служебных полей.
+        """
+        res = dict(id=job["id"], state=job["state"], progress=job.get("progress"),
+            message=job.get("message"))
+        if job.get("file") is not None:
+            res["file"] = dict(filename=job["file"]["filename"],
+                content_type=job["file"]["content_type"], size=len(job["file"]["content"]))
+        return res
+
+
+def find_job(job_id):
+    """
+        Ищет задачу по идентификатору во всех очередях. Возвращает (очередь, задача) или (None, None).
+    """
+    queue = get_queue(job_id.rsplit(".", 1)[0])
+    if queue is None:
+        return (None, None)
+    return (queue, queue.get(job_id))
+
+
+class BackgroundJobMixin(object):
+    """
+        Постановка обработки view в очередь задач, общее для RESTView и dj.FilePostMixin.
+        Класс view определяет run_background(job_id, request, *args, **kwargs),
+        возвращающий answer_result / file_result.
+
+        Атрибуты класса для настройки:
+            BACKGROUND_JOB - JobQueue или None.
+            BACKGROUND_RETRY_AFTER - заголовок Retry-After (секунды) ответа 429,
+                если очередь заполнена.
+    """
+
+    BACKGROUND_JOB = None
+    BACKGROUND_RETRY_AFTER = 5
+
+    background_job_id = None
+
+    def get_background_view(self, request):
+        """
+            Копия view для фоновой задачи с копией request: ответ клиенту формируется
+            этим экземпляром одновременно с выполнением задачи.
+        """
+        worker = copy.copy(self)
+        worker.request = copy.copy(request)
+        return worker
+
+    def get_background_call(self, request, *args, **kwargs):
+        """
+            Вызов для фоновой задачи BACKGROUND_JOB. По умолчанию - run_background копии
+            view в пуле потоков. Для пула процессов нужно переопределить и вернуть
+            (func, args, kwargs) - функцию уровня модуля, возвращающую результат задачи.
+        """
+        if self.BACKGROUND_JOB.kind != "thread":
+            raise Exception("{}: override get_background_call for process JobQueue.".format(
+                type(self).__name__))
+        worker = self.get_background_view(request)
+        kwargs = dict(kwargs)
+        return lambda job_id: worker.run_background(job_id, worker.request, *args, **kwargs)
+
+    def submit_background_job(self, request, *args, **kwargs):
+        """
+            Ставит задачу в BACKGROUND_JOB, возвращает ее состояние для клиента.
+            Если очередь заполнена - EJobRejected.
+        """
+        return self.BACKGROUND_JOB.submit(request,
+            self.get_background_call(request, *args, **kwargs), type(self).__name__)
+
+    def get_retry_after_header(self):
+        return str(self.BACKGROUND_RETRY_AFTER)
+
+    def set_job_progress(self, progress=None, message=None):
+        """
+            Из фоновой задачи: сообщает прогресс (например, процент) и текст состояния.
+        """
+        if self.background_job_id is not None:
+            self.BACKGROUND_JOB.set_progress(self.background_job_id, progress, message)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Чтение тела запроса в формате application/json.
+
+    Тело декодируется не более одного раза за запрос, при первом обращении,
+    и запоминается в самом request. Все потребители (параметры RESTView,
+    JSONViewBase, формы с JSONField) получают один и тот же разобранный объект.
+
+    Ограничения проверяются до разбора:
+        settings.VUE_JSON_BODY_MAX_SIZE (= 2.5 Мб) - максимальный размер тела, байт.
+        settings.VUE_JSON_BODY_MAX_DEPTH (= 32) - максимальная вложенность.
+"""
+
+import re
+import json
+
+from django.conf import settings
+
+from .dj_rest_params import EParseError
+
+
+JSON_CONTENT_TYPES = ("application/json", "text/json")
+
+DEFAULT_MAX_SIZE = 2621440
+DEFAULT_MAX_DEPTH = 32
+
+_JSON_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+_NOT_READ = object()
+
+
+class EJSONBodyError(EParseError):
+    """
+        Тело запроса не является корректным JSON или превышает ограничения.
+    """
+
+
+def is_json_request(request):
+    """
+        True, если тело запроса - JSON (по Content-Type).
+    """
+    content_type = request.META.get("CONTENT_TYPE", "")
+    if not content_type:
+        return False
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    return content_type in JSON_CONTENT_TYPES or content_type.endswith("+json")
+
+
+def get_limits(max_size=None, max_depth=None):
+    """
+        Возвращает (max_size, max_depth), недостающие - из настроек.
+    """
+    if max_size is None:
+        max_size = getattr(settings, "VUE_JSON_BODY_MAX_SIZE", DEFAULT_MAX_SIZE)
+    if max_depth is None:
+        max_depth = getattr(settings, "VUE_JSON_BODY_MAX_DEPTH", DEFAULT_MAX_DEPTH)
+    return (max_size, max_depth)
+
+
+def body_size_allowed(request, max_size=None):
+    """
+        Проверяет заявленный размер тела (Content-Length), не читая его.
+    """
+    max_size = get_limits(max_size)[0]
+    if max_size is None:
+        return True
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return True
+    return length <= max_size
+
+
+def check_depth(text, max_depth):
+    """
+        Вызывает EJSONBodyError, если вложенность массивов/объектов в text больше max_depth.
+        Строки пропускаются целиком регулярным выражением, json при этом не разбирается.
+    """
+    if text.count("[") + text.count("{") <= max_depth:
+        return
+
+    depth = 0
+    for mm in _JSON_TOKENS.finditer(text):
+        ch = text[mm.start()]
+        if ch == "[" or ch == "{":
+            depth += 1
+            if depth > max_depth:
+                raise EJSONBodyError(u"Слишком большая вложенность JSON (максимум {}).".format(max_depth))
+        elif ch == "]" or ch == "}":
+            depth -= 1
+
+
+def get_json_body(request, max_size=None, max_depth=None):
+    """
+        Возвращает разобранное тело запроса. Разбор выполняется один раз,
+        результат сохраняется в request.
+        При ошибке или превышении ограничений вызывает EJSONBodyError.
+    """
+    body = getattr(request, "_easy_vue_json_body", _NOT_READ)
+    if body is not _NOT_READ:
+        return body
+
+    max_size, max_depth = get_limits(max_size, max_depth)
+    if not body_size_allowed(request, max_size):
+        raise EJSONBodyError(u"Слишком большой запрос (максимум {} байт).".format(max_size))
+
+    raw = request.body
+    if max_size is not None and len(raw) > max_size:
+        raise EJSONBodyError(u"Слишком большой запрос (максимум {} байт).".format(max_size))
+
+    try:
+        text = raw.decode(request.encoding or settings.DEFAULT_CHARSET)
+    except UnicodeDecodeError as e:
+        raise EJSONBodyError(u"Некорректная кодировка запроса.")
+
+    if max_depth is not None:
+        check_depth(text, max_depth)
+
+    if not text.strip():
+        body = None
+    else:
+        try:
+            body = json.loads(text)
+        except ValueError as e:
+            raise EJSONBodyError(u"Некорректный JSON в запросе.")
+
+    request._easy_vue_json_body = body
+    return body
+
+
+def post_params(request, max_size=None, max_depth=None):
+    """
+        Параметры тела запроса: JSONBodyParams для JSON запросов, иначе request.POST.
+    """
+    if is_json_request(request):
+        return JSONBodyParams(request, max_size, max_depth)
+    return request.POST
+
+
+class JSONBodyParams(object):
+    """
+        Словарь параметров запроса из JSON тела с интерфейсом QueryDict
+        (get, getlist, in, []), как request.POST.
+        Тело разбирается при первом обращении. Тело должно быть JSON объектом.
+
+        Значения - уже разобранные объекты JSON (числа, списки, словари),
+        getlist для списка возвращает сам список, для остального - [значение].
+    """
+
+    def __init__(self, request, max_size=None, max_depth=None):
+        """
+        """
+        self.request = request
+        self.max_size = max_size
+        self.max_depth = max_depth
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            body = get_json_body(self.request, self.max_size, self.max_depth)
+            if body is None:
+                body = {}
+            if not isinstance(body, dict):
+                raise EJSONBodyError(u"JSON запроса должен быть объектом.")
+            self._data = body
+        return self._data
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def getlist(self, key, default=None):
+        if key not in self.data:
+            return [] if default is None else default
+        val = self.data[key]
+        return val if isinstance(val, list) else [val]
+
+    def keys(self):
+        return self.data.keys()
+
+    def items(self):
+        return self.data.items()
+
+    def iteritems(self):
+        return self.data.iteritems()
+
+    def dict(self):
+        return dict(self.data)
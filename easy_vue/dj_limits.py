@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Ограничение частоты и параллельности вызовов view.
+
+    RateLimit задается атрибутом класса view (RATE_LIMIT у RESTView, PostViewMixin
+    и потомков) и проверяется до разбора параметров, так что отклоненный вызов
+    почти ничего не стоит: ответ 429 с заголовком Retry-After.
+
+        rate, burst - частота вызовов в секунду и допустимая "пачка" (token bucket)
+            на ключ by. burst по умолчанию = max(1, rate).
+        concurrent - максимум одновременно выполняемых вызовов view (семафор).
+        by - ключ частоты: "user" (пользователь, для анонимных - IP), "ip",
+            "view" (общий для всех) или функция by(view, request) -> строка.
+        cache - имя кеша Django для общего между процессами состояния, или None -
+            состояние в памяти процесса. В кеше частота считается окнами по
+            burst / rate секунд, а не точным token bucket.
+
+    Использование:
+        class ReportView(RESTView):
+            RATE_LIMIT = RateLimit(rate=0.5, burst=3, concurrent=4)
+
+    !! Для потоковых ответов (StreamingHttpResponse) место в concurrent
+    освобождается при возврате ответа из view, а не по окончании выдачи.
+"""
+
+import math
+import time
+import threading
+
+from django.core.cache import caches
+
+from .lib import monotonic
+
+
+class LimitTicket(object):
+    """
+        Результат RateLimit.acquire.
+        Приводится к bool: True - вызов разрешен. Тогда после вызова нужно вызвать release.
+        retry_after - через сколько секунд имеет смысл повторить отклоненный вызов.
+    """
+    __slots__ = ("allowed", "retry_after", "_release")
+
+    def __init__(self, allowed, retry_after=0, release=None):
+        self.allowed = allowed
+        self.retry_after = retry_after
+        self._release = release
+
+    def __nonzero__(self):
+        return self.allowed
+
+    __bool__ = __nonzero__
+
+    def release(self):
+        if self._release is not None:
+            release, self._release = self._release, None
+            release()
+
+    @property
+    def retry_after_header(self):
+        """
+            Значение заголовка Retry-After - целое число секунд.
+        """
+        return str(max(1, int(math.ceil(self.retry_after))))
+
+
+class TokenBucket(object):
+    """
+        Token bucket в памяти процесса: на каждый ключ - не более burst вызовов
+        "пачкой", восполняется rate вызовами в секунду.
+    """
+
+    # при таком числе ключей удаляются полностью восполнившиеся
+    PRUNE_SIZE = 10000
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None):
+        """
+            Берет один токен для key. Возвращает 0, если получилось, иначе -
+            сколько секунд ждать до следующего токена.
+        """
+        if now is None:
+            now = monotonic()
+        with self._lock:
+            tokens, last = self._state.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._state[key] = (tokens - 1, now)
+                res = 0
+            else:
+                self._state[key] = (tokens, now)
+                res = (1 - tokens) / self.rate
+            if len(self._state) > self.PRUNE_SIZE:
+                self._prune(now)
+        return res
+
+    def _prune(self, now):
+        full = [key for key, (tokens, last) in self._state.iteritems()
+            if tokens + (now - last) * self.rate >= self.burst]
+        for key in full:
+            del self._state[key]
+
+
+class RateLimit(object):
+    """
+        Ограничение частоты и параллельности вызовов view, см. описание модуля.
+    """
+
+    CACHE_PREFIX = "easy_vue:rl:"
+    # время жизни счетчика concurrent в кеше, на случай "потерянных" release
+    CONCURRENT_TTL = 600
+
+    def __init__(self, rate=None, burst=None, concurrent=None, by="user", cache=None):
+        if rate is None and concurrent is None:
+            raise Exception("RateLimit: rate or concurrent required.")
+        self.rate = rate
+        self.burst = burst if burst is not None else (max(1, rate) if rate else None)
+        self.concurrent = concurrent
+        self.by = by
+        self.cache = cache
+
+        self._bucket = TokenBucket(self.rate, self.burst) if rate else None
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def get_view_key(self, view):
+        view_class = type(view)
+        return "{}.{}".format(view_class.__module__, view_class.__name__)
+
+    def get_client_key(self, view, request):
+        """
+            Ключ, по которому считается частота вызовов.
+        """
+        if callable(self.by):
+            return self.by(view, request)
+        if self.by == "view":
+            return ""
+        if self.by == "user":
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated():
+                return "u{}".format(user.pk)
+        return "ip{}".format(request.META.get("REMOTE_ADDR", ""))
+
+    def acquire(self, view, request):
+        """
+            Проверяет ограничения для вызова view. Возвращает LimitTicket.
+        """
+        view_key = self.get_view_key(view)
+        if self.rate:
+            key = "{}:{}".format(view_key, self.get_client_key(view, request))
+            wait = self._take_shared(key) if self.cache else self._bucket.take(key)
+            if wait:
+                return LimitTicket(False, wait)
+
+        if self.concurrent:
+            if self.cache:
+                release = self._enter_shared(view_key)
+            else:
+                release = self._enter_local(view_key)
+            if release is None:
+                return LimitTicket(False, 1)
+            return LimitTicket(True, release=release)
+        return LimitTicket(True)
+
+    # ==== в памяти процесса
+
+    def _enter_local(self, view_key):
+        sem = self._semaphores.get(view_key)
+        if sem is None:
+            with self._lock:
+                sem = self._semaphores.setdefault(view_key, threading.BoundedSemaphore(self.concurrent))
+        if not sem.acquire(False):
+            return None
+        return sem.release
+
+    # ==== в кеше Django
+
+    def _take_shared(self, key):
+        cache = caches[self.cache]
+        window = max(1.0, self.burst / float(self.rate))
+        now = time.time()
+        window_no = int(now // window)
+        cache_key = "{}{}:{}".format(self.CACHE_PREFIX, key, window_no)
+        cache.add(cache_key, 0, int(math.ceil(window)) + 1)
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            # ключ вытеснен из кеша между add и incr
+            return 0
+        if count <= self.burst:
+            return 0
+        return (window_no + 1) * window - now
+
+    def _enter_shared(self, view_key):
+        cache = caches[self.cache]
+        cache_key = "{}conc:{}".format(self.CACHE_PREFIX, view_key)
+        cache.add(cache_key, 0, self.CONCURRENT_TTL)
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            return lambda: None
+
+        def release():
+            try:
+                cache.decr(cache_key)
+            except ValueError:
+                pass
+
+        if count > self.concurrent:
+            release()
+            return None
+        return release
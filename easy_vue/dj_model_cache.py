@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Кеш экземпляров моделей в процессе для ModelParam (параметр cache).
+
+    Предназначен для справочников, которые меняются редко (единицы измерения, статусы,
+    подразделения): повторные запросы с теми же ID не обращаются к БД.
+
+    ModelCache(ttl=300, max_size=1000)
+        ttl - срок жизни записи в секундах.
+        max_size - не больше max_size объектов, при переполнении вытесняются
+            давно не использованные.
+
+    Сброс: при post_save / post_delete любого объекта модели (и ее потомков) все записи
+    модели становятся недействительными, а также записи, в которых объекты этой модели
+    загружены через select_related. Сигналы приходят только из этого процесса,
+    изменения из других процессов и через QuerySet.update() видны не позже чем через ttl.
+
+    Выдаются копии объектов (поверхностные - связанные объекты select_related общие),
+    изменять их можно, но сохранять изменения в кеш нельзя.
+
+    Счетчики: ModelCache.stats() -> {hits, misses, hit_ratio, size, evictions,
+        invalidations, models: {"app.model": {hits, misses, hit_ratio, invalidations}}}.
+
+    Общий кеш по умолчанию (ModelParam(..., cache=True)) настраивается
+    settings.VUE_MODEL_CACHE = dict(<параметры ModelCache>).
+
+    Использование:
+        UNITS = ModelCache(ttl=600, max_size=200)
+
+        class ItemView(RESTView):
+            POST_PARAMS = [
+                dj_rest_params.ModelParam("unit", model=Unit, cache=UNITS),
+                dj_rest_params.ModelParam("state", model=State, cache=True, only=["id", "name"]),
+            ]
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models.signals import post_save, post_delete
+
+from .lib import monotonic
+
+
+_default = None
+
+
+def model_label(model):
+    return "{}.{}".format(model._meta.app_label, model._meta.model_name)
+
+
+def related_models(model, select_related, max_depth=5):
+    """
+        Модели, объекты которых загружаются вместе с model через select_related:
+        список связей ("a", "a__b") или True - все обязательные прямые связи
+        на глубину max_depth, как QuerySet.select_related().
+    """
+    res = []
+
+    def add(related):
+        related = related._meta.concrete_model
+        if related not in res:
+            res.append(related)
+        return related
+
+    def walk(model, depth):
+        if depth > max_depth:
+            return
+        for field in model._meta.concrete_fields:
+            if field.is_relation and field.related_model is not None and not field.null:
+                walk(add(field.related_model), depth + 1)
+
+    if select_related is True:
+        walk(model, 1)
+    elif select_related:
+        for path in select_related:
+            current = model
+            for name in path.split("__"):
+                related = current._meta.get_field(name).related_model
+                if related is None:
+                    break
+                current = add(related)
+    return res
+
+
+def copy_instance(obj):
+    """
+        Поверхностная копия экземпляра модели.
+    """
+    res = obj.__class__.__new__(obj.__class__)
+    res.__dict__.update(obj.__dict__)
+    res._state = copy.copy(obj._state)
+    return res
+
+
+class ModelCache(object):
+    """
+        Кеш экземпляров моделей, см. описание модуля.
+
+        Записи хранятся по (lookup_key, ID), lookup_key - ключ ModelParam.lookup_key()
+        (модель, поле, select_related, only), поэтому объекты с разными select_related / only
+        хранятся раздельно. Запись действительна, пока не изменились поколения модели
+        и моделей ее select_related.
+    """
+
+    def __init__(self, ttl=300, max_size=1000):
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries = OrderedDict()
+        # поколение модели увеличивается при каждом изменении, записи прошлых поколений не выдаются
+        self._generations = {}
+        # lookup_key -> модели, от которых зависят записи: сама модель и ее select_related
+        self._dependencies = {}
+        self._lock = threading.Lock()
+        self._counters = dict(evictions=0)
+        self._model_counters = {}
+
+        post_save.connect(self._on_change, dispatch_uid=("easy_vue.model_cache.save", id(self)))
+        post_delete.connect(self._on_change, dispatch_uid=("easy_vue.model_cache.delete", id(self)))
+
+    def _on_change(self, sender, **kwargs):
+        models = [sender._meta.concrete_model] + list(sender._meta.get_parent_list())
+        with self._lock:
+            for model in models:
+                if model in self._generations:
+                    self._generations[model] += 1
+                    self._model_counter(model)["invalidations"] += 1
+
+    def _model_counter(self, model):
+        label = model_label(model)
+        res = self._model_counters.get(label)
+        if res is None:
+            res = self._model_counters[label] = dict(hits=0, misses=0, invalidations=0)
+        return res
+
+    def invalidate(self, model=None):
+        """
+            Сбрасывает записи модели или (model не задана) все.
+        """
+        with self._lock:
+            if model is None:
+                self._entries.clear()
+                # загружаемые сейчас объекты тоже не должны попасть в кеш
+                for model in self._generations:
+                    self._generations[model] += 1
+                return
+            model = model._meta.concrete_model
+            if model in self._generations:
+                self._generations[model] += 1
+                self._model_counter(model)["invalidations"] += 1
+
+    def get_dependencies(self, lookup_key):
+        """
+            Модели, при изменении которых записи lookup_key недействительны.
+        """
+        res = self._dependencies.get(lookup_key)
+        if res is None:
+            model = lookup_key[0]._meta.concrete_model
+            res = tuple([model] + [itm for itm in related_models(model, lookup_key[2])
+                if itm is not model])
+            self._dependencies[lookup_key] = res
+        return res
+
+    def get_generation(self, lookup_key):
+        return tuple(self._generations.setdefault(model, 0)
+            for model in self.get_dependencies(lookup_key))
+
+    def get_many(self, lookup_key, keys):
+        """
+            Возвращает ({ID: копия объекта} найденных в кеше, поколение).
+            Поколение (модели и ее select_related) передается в set_many: объекты,
+            загруженные до изменения этих моделей, в кеш не попадут.
+        """
+        model = lookup_key[0]._meta.concrete_model
+        now = monotonic()
+        res = {}
+        with self._lock:
+            generation = self.get_generation(lookup_key)
+            for key in keys:
+                entry_key = (lookup_key, key)
+                entry = self._entries.pop(entry_key, None)
+                if entry is None:
+                    continue
+                if entry[0] < now or entry[1] != generation:
+                    continue
+                # в конец - недавно использованные
+                self._entries[entry_key] = entry
+                res[key] = entry[2]
+            counter = self._model_counter(model)
+            counter["hits"] += len(res)
+            counter["misses"] += len(keys) - len(res)
+        return (dict((key, copy_instance(obj)) for key, obj in res.items()), generation)
+
+    def set_many(self, lookup_key, objects, generation):
+        """
+            Записывает {ID: объект}, загруженные при поколении generation.
+        """
+        if not objects:
+            return
+        expires = monotonic() + self.ttl
+        with self._lock:
+            if self.get_generation(lookup_key) != generation:
+                return
+            for key, obj in objects.items():
+                self._entries[(lookup_key, key)] = (expires, generation, copy_instance(obj))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def stats(self):
+        """
+            Счетчики попаданий и промахов в этом процессе, всего и по моделям.
+        """
+        with self._lock:
+            models = dict((label, dict(itm)) for label, itm in self._model_counters.items())
+            res = dict(self._counters, size=len(self._entries))
+        for itm in models.values():
+            total = itm["hits"] + itm["misses"]
+            itm["hit_ratio"] = float(itm["hits"]) / total if total else None
+        res["hits"] = sum(itm["hits"] for itm in models.values())
+        res["misses"] = sum(itm["misses"] for itm in models.values())
+        res["invalidations"] = sum(itm["invalidations"] for itm in models.values())
+        total = res["hits"] + res["misses"]
+        res["hit_ratio"] = float(res["hits"]) / total if total else None
+        res["models"] = models
+        return res
+
+    def reset_stats(self):
+        with self._lock:
+            self._counters["evictions"] = 0
+            self._model_counters.clear()
+
+
+def get_default_model_cache():
+    """
+        Общий ModelCache по settings.VUE_MODEL_CACHE.
+    """
+    global _default
+    if _default is None:
+        _default = ModelCache(**getattr(settings, "VUE_MODEL_CACHE", {}))
+    return _default
+
+
+def _on_setting_changed(setting, **kwargs):
+    global _default
+    if setting == "VUE_MODEL_CACHE":
+        _default = None
+
+setting_changed.connect(_on_setting_changed)
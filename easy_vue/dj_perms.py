@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Проверка разрешений пользователя с кешированием.
+
+    Результаты user.has_perm запоминаются на двух уровнях:
+        1. В самом запросе - словарь {разрешение: bool} на пользователя.
+        2. Между запросами - в кеше Django на пользователя, с временем жизни.
+            По умолчанию отключен, включается явно:
+            settings.VUE_PERMS_CACHE_TTL (= 0) - время жизни, секунд. 0 или None -
+                второй уровень отключен.
+            settings.VUE_PERMS_CACHE (= "default") - имя кеша.
+            Сбрасывается сигналами: изменение пользователя, его групп и разрешений -
+            для этого пользователя (номер версии пользователя); изменение групп
+            и разрешений - для всех (общий номер версии). Обе версии входят в ключ
+            записи, поэтому права, вычисленные до сброса, под новым ключом не сохранятся.
+
+            Устаревшие права выдаются до VUE_PERMS_CACHE_TTL секунд, если:
+            - кеш локальный для процесса (LocMemCache) при нескольких процессах
+              или серверах - сигналы сбрасывают кеш только в процессе, где было
+              изменение. Нужен общий кеш (memcached, redis, БД);
+            - права меняются без сигналов моделей: QuerySet.update(), raw SQL,
+              изменения в другой системе;
+            - используются собственные auth backends, у которых права зависят не
+              только от пользователя, групп и разрешений (LDAP, объектные права,
+              время суток).
+
+    Сигналы подключаются в EasyVueConfig.ready.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+VERSION_KEY = "easy_vue:perms:version"
+USER_VERSION_KEY = "easy_vue:perms:user_version:{}"
+USER_KEY = "easy_vue:perms:user:{}:{}:{}"
+
+REQUEST_ATTR = "_easy_vue_perms"
+
+
+class UserPerms(object):
+    """
+        Закешированные результаты has_perm одного пользователя.
+        version - (общая версия, версия пользователя) или None, если кеш отключен.
+    """
+    __slots__ = ("user_pk", "version", "perms")
+
+    def __init__(self, user_pk, version=None, perms=None):
+        self.user_pk = user_pk
+        self.version = version
+        self.perms = {} if perms is None else perms
+
+
+def get_perms_cache():
+    """
+        Возвращает кеш второго уровня или None, если он отключен.
+    """
+    if not getattr(settings, "VUE_PERMS_CACHE_TTL", 0):
+        return None
+    return caches[getattr(settings, "VUE_PERMS_CACHE", "default")]
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def _get_version(cache, key, vals):
+    version = vals.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # версии нет в кеше
+        cache.set(key, _new_version(), None)
+
+
+def load_user_perms(user_pk):
+    """
+        Загружает UserPerms из кеша второго уровня (или пустой, если там нет или устарел).
+    """
+    cache = get_perms_cache()
+    if cache is None:
+        return UserPerms(user_pk)
+
+    user_version_key = USER_VERSION_KEY.format(user_pk)
+    vals = cache.get_many([VERSION_KEY, user_version_key])
+    version = (_get_version(cache, VERSION_KEY, vals), _get_version(cache, user_version_key, vals))
+
+    perms = cache.get(USER_KEY.format(user_pk, *version))
+    return UserPerms(user_pk, version, perms)
+
+
+def save_user_perms(user_perms):
+    """
+        Сохраняет UserPerms в кеш второго уровня.
+    """
+    cache = get_perms_cache()
+    if cache is None or user_perms.version is None:
+        return
+    cache.set(USER_KEY.format(user_perms.user_pk, *user_perms.version), user_perms.perms,
+        getattr(settings, "VUE_PERMS_CACHE_TTL", 0))
+
+
+def get_user_perms(user, request=None):
+    """
+        Возвращает UserPerms пользователя: из запроса, или из кеша второго уровня.
+    """
+    store = None
+    if request is not None:
+        store = request.__dict__.get(REQUEST_ATTR)
+        if store is None:
+            store = request.__dict__[REQUEST_ATTR] = {}
+        user_perms = store.get(user.pk)
+        if user_perms is not None:
+            return user_perms
+
+    user_perms = load_user_perms(user.pk)
+    if store is not None:
+        store[user.pk] = user_perms
+    return user_perms
+
+
+def check_user_permissions(user, permissions, request=None):
+    """
+        Проверяет, что у пользователя есть все разрешения permissions.
+        Не авторизованный пользователь - False. permissions is None - True.
+        Проверка прекращается на первом отсутствующем разрешении.
+        request - запрос, для кеша первого уровня (может быть None).
+    """
+    if not user.is_authenticated():
+        return False
+    if not permissions:
+        return True
+
+    user_perms = get_user_perms(user, request)
+    perms = user_perms.perms
+    changed = False
+    res = True
+    for itm in permissions:
+        allowed = perms.get(itm)
+        if allowed is None:
+            allowed = perms[itm] = bool(user.has_perm(itm))
+            changed = True
+        if not allowed:
+            res = False
+            break
+
+    if changed:
+        save_user_perms(user_perms)
+    return res
+
+
+def invalidate_user(user_pk):
+    """
+        Сбрасывает кеш второго уровня для пользователя (меняет версию пользователя).
+    """
+    cache = get_perms_cache()
+    if cache is not None:
+        _bump_version(cache, USER_VERSION_KEY.format(user_pk))
+
+
+def invalidate_all():
+    """
+        Сбрасывает кеш второго уровня для всех пользователей (меняет версию).
+    """
+    cache = get_perms_cache()
+    if cache is not None:
+        _bump_version(cache, VERSION_KEY)
+
+
+# ==== сигналы
+
+def _on_user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+def _on_any_changed(sender, **kwargs):
+    invalidate_all()
+
+
+def _on_user_m2m_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        # изменения со стороны группы / разрешения - затрагивают многих пользователей
+        invalidate_all()
+    else:
+        invalidate_user(instance.pk)
+
+
+def connect_signals():
+    """
+        Подключает сброс кеша к изменениям пользователей, групп и разрешений.
+    """
+    from django.apps import apps
+    if not apps.is_installed("django.contrib.auth"):
+        return
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Group, Permission
+    from django.db.models.signals import post_save, post_delete, m2m_changed
+
+    User = get_user_model()
+    uid = "easy_vue.dj_perms"
+
+    post_save.connect(_on_user_changed, sender=User, dispatch_uid=uid)
+    post_delete.connect(_on_user_changed, sender=User, dispatch_uid=uid)
+    for model in (Group, Permission):
+        post_save.connect(_on_any_changed, sender=model, dispatch_uid=uid)
+        post_delete.connect(_on_any_changed, sender=model, dispatch_uid=uid)
+
+    for field in ("groups", "user_permissions"):
+        through = getattr(getattr(User, field, None), "through", None)
+        if through is not None:
+            m2m_changed.connect(_on_user_m2m_changed, sender=through, dispatch_uid=uid)
+    m2m_changed.connect(_on_any_changed, sender=Group.permissions.through, dispatch_uid=uid)
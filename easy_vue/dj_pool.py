@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Пул потоков для параллельного выполнения медленных операций ввода-вывода
+    (запросы к внешним сервисам и т.п.) внутри обработки одного запроса Django.
+
+    Пулы создаются по имени, один раз на процесс. Размер - settings.VUE_THREAD_POOL_SIZE
+    (по умолчанию 10) или явно при первом обращении.
+    Соединения с БД, открытые в потоке пула, закрываются после каждого вызова.
+
+    !! Задачи, выполняемые в пуле, не должны сами ждать задач того же пула -
+    при исчерпании потоков это взаимоблокировка. Для вложенного использования
+    берите пул с другим именем.
+
+    Использование:
+        a, b = run_concurrent([
+            lambda: load_weather(city),
+            (load_rates, ("USD",), {}),
+            ])
+"""
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
+from django.db import connections
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name="default", size=None):
+    """
+        Возвращает пул потоков с именем name, создавая его при первом обращении.
+    """
+    pool = _pools.get(name)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            if size is None:
+                size = getattr(settings, "VUE_THREAD_POOL_SIZE", 10)
+            pool = ThreadPool(size)
+            _pools[name] = pool
+    return pool
+
+
+def _call_closing_db(func, args, kwargs):
+    """
+        Выполняет func в потоке пула и закрывает соединения с БД этого потока.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connections.close_all()
+
+
+def _normalize_call(call):
+    """
+        call - функция без параметров или кортеж (func, args, kwargs)
+    """
+    if callable(call):
+        return (call, (), {})
+    func = call[0]
+    args = call[1] if len(call) > 1 else ()
+    kwargs = call[2] if len(call) > 2 else {}
+    return (func, args, kwargs)
+
+
+def run_concurrent(calls, timeout=None, pool_name="default"):
+    """
+        Выполняет вызовы calls параллельно в пуле pool_name.
+        Возвращает список результатов в порядке calls.
+        Если какой-то вызов завершился исключением - оно вызывается здесь
+        (после того, как дождались всех остальных).
+        timeout - максимальное время ожидания каждого результата, секунд.
+    """
+    calls = [_normalize_call(itm) for itm in calls]
+    if len(calls) == 1:
+        func, args, kwargs = calls[0]
+        return [func(*args, **kwargs)]
+
+    pool = get_pool(pool_name)
+    pending = [pool.apply_async(_call_closing_db, itm) for itm in calls]
+
+    results = []
+    error = None
+    for itm in pending:
+        try:
+            results.append(itm.get(timeout))
+        except Exception as e:
+            if error is None:
+                error = e
+            results.append(None)
+
+    if error is not None:
+        raise error
+    return results
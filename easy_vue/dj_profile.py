@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Выборочное профилирование запросов view на рабочем сервере.
+
+    Профилируется не каждый запрос, а каждый N-ый (случайно), запросы с заголовком
+    и запросы указанных пользователей. Остальные запросы идут без накладных расходов.
+
+    Profiler(every=None, header="X-Profile", token=None, users=None, mode="cprofile",
+            out_dir=None, interval=0.005)
+        every - профилировать в среднем 1 из every запросов.
+        header - заголовок запроса, включающий профилирование. Учитывается, если его
+            значение равно token, или (token не задан) у пользователя is_staff.
+        users - список имен или pk пользователей, запросы которых профилируются всегда.
+        mode - "cprofile": cProfile, файл .prof для pstats / snakeviz;
+               "sample": снимки стека раз в interval секунд, файл .folded -
+                   свернутые стеки для flamegraph.pl / speedscope. Накладные расходы
+                   значительно меньше, чем у cProfile.
+        out_dir - каталог для файлов, по умолчанию settings.VUE_PROFILE_DIR или
+            <tmp>/easy_vue_profiles.
+
+    Имя файла: <модуль>.<класс view>.<метод HTTP>.<дата-время>.<pid>.<номер>.prof|.folded
+    Профилируется формирование ответа; потоковый ответ (STREAM_ANSWER) выдается
+    уже после окончания профилирования.
+
+    Настройка по умолчанию для всех view - settings.VUE_PROFILE = dict(<параметры Profiler>).
+
+    Использование:
+        class ReportView(RESTView):
+            PROFILER = Profiler(every=100, mode="sample")
+"""
+
+import os
+import sys
+import time
+import random
+import signal
+import tempfile
+import itertools
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.signals import setting_changed
+
+try:
+    import cProfile as profile_module
+except ImportError:
+    import profile as profile_module
+
+
+MODES = ("cprofile", "sample")
+
+# сигнальный таймер один на процесс, остальные одновременные запросы - потоковым опросом
+_signal_lock = threading.Lock()
+
+_default = None
+
+
+def frame_label(code):
+    return "{} ({}:{})".format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+class StackSampler(object):
+    """
+        Снимки стека одного потока раз в interval секунд, подсчет одинаковых стеков.
+        Если поток - главный, снимки делаются по сигналу SIGPROF (таймер процессорного
+        времени), иначе - из вспомогательного потока через sys._current_frames().
+        На время снимков по сигналу прерванные SIGPROF системные вызовы перезапускаются
+        (signal.siginterrupt), после stop восстанавливается поведение signal.signal().
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = Counter()
+        self._thread_id = None
+        self._stop = None
+        self._uses_signal = False
+        self._prev_handler = None
+
+    def start(self):
+        self._thread_id = threading.current_thread().ident
+        if (hasattr(signal, "setitimer") and isinstance(threading.current_thread(), threading._MainThread)
+                and _signal_lock.acquire(False)):
+            self._uses_signal = True
+            self._prev_handler = signal.signal(signal.SIGPROF, self._on_signal)
+            # системные вызовы запроса (чтение сокета, БД) перезапускаются, а не
+            # прерываются с EINTR при каждом снимке
+            signal.siginterrupt(signal.SIGPROF, False)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._stop = threading.Event()
+            poller = threading.Thread(target=self._poll, name="easy_vue-sampler")
+            poller.daemon = True
+            poller.start()
+
+    def stop(self):
+        if self._uses_signal:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._prev_handler or signal.SIG_DFL)
+            # как после signal.signal(): прерывать системные вызовы
+            signal.siginterrupt(signal.SIGPROF, True)
+            self._uses_signal = False
+            _signal_lock.release()
+        elif self._stop is not None:
+            self._stop.set()
+
+    def _on_signal(self, signum, frame):
+        self.sample(frame)
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                return
+            self.sample(frame)
+
+    def sample(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(frame_label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        self.counts[";".join(stack)] += 1
+
+    def collapsed(self):
+        """
+            Свернутые стеки: строка "корень;...;вершина число" на стек.
+        """
+        return "".join("{} {}\n".format(stack, cnt) for stack, cnt in sorted(self.counts.items()))
+
+
+class Profiler(object):
+    """
+        Настройка профилирования запросов, см. описание модуля.
+    """
+
+    def __init__(self, every=None, header="X-Profile", token=None, users=None, mode="cprofile",
+            out_dir=None, interval=0.005):
+        if mode not in MODES:
+            raise Exception("Profiler: uncorrect mode '{}'.".format(mode))
+        self.every = every
+        self.header = header
+        self.meta_header = "HTTP_" + header.upper().replace("-", "_") if header else None
+        self.token = token
+        self.users = set("{}".format(itm) for itm in users) if users else set()
+        self.mode = mode
+        self.out_dir = out_dir
+        self.interval = interval
+        self._seq = itertools.count(1)
+
+    def get_out_dir(self):
+        out_dir = self.out_dir
+        if out_dir is None:
+            out_dir = getattr(settings, "VUE_PROFILE_DIR", None)
+        if out_dir is None:
+            out_dir = os.path.join(tempfile.gettempdir(), "easy_vue_profiles")
+        if not os.path.isdir(out_dir):
+            try:
+                os.makedirs(out_dir)
+            except OSError:
+                # создан параллельным запросом
+                if not os.path.isdir(out_dir):
+                    raise
+        return out_dir
+
+    def is_selected(self, request):
+        """
+            Нужно ли профилировать запрос.
+        """
+        user = getattr(request, "user", None)
+        if self.meta_header and self.meta_header in request.META:
+            if self.token is not None:
+                if request.META[self.meta_header] == self.token:
+                    return True
+            elif user is not None and user.is_authenticated() and user.is_staff:
+                return True
+        if self.users and user is not None and user.is_authenticated():
+            if "{}".format(user.pk) in self.users or user.get_username() in self.users:
+                return True
+        return bool(self.every) and random.random() * self.every < 1
+
+    def make_filename(self, view, request, ext):
+        view_class = type(view)
+        return "{}.{}.{}.{}.{}.{}.{}".format(view_class.__module__, view_class.__name__, request.method,
+            time.strftime("%Y%m%d-%H%M%S"), os.getpid(), next(self._seq), ext)
+
+    def run(self, view, request, func, *args, **kwargs):
+        """
+            Вызывает func(request, *args, **kwargs), профилируя выбранные запросы.
+        """
+        if not self.is_selected(request):
+            return func(request, *args, **kwargs)
+
+        if self.mode == "cprofile":
+            prof = profile_module.Profile()
+            try:
+                return prof.runcall(func, request, *args, **kwargs)
+            finally:
+                prof.dump_stats(os.path.join(self.get_out_dir(), self.make_filename(view, request, "prof")))
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            return func(request, *args, **kwargs)
+        finally:
+            sampler.stop()
+            with open(os.path.join(self.get_out_dir(), self.make_filename(view, request, "folded")), "wb") as ff:
+                ff.write(sampler.collapsed().encode("utf-8"))
+
+
+def get_default_profiler():
+    """
+        Profiler по settings.VUE_PROFILE или None.
+    """
+    global _default
+    if _default is None:
+        conf = getattr(settings, "VUE_PROFILE", None)
+        _default = Profiler(**conf) if conf else False
+    return _default or None
+
+
+def _on_setting_changed(setting, **kwargs):
+    global _default
+    if setting in ("VUE_PROFILE", "VUE_PROFILE_DIR"):
+        _default = None
+
+setting_changed.connect(_on_setting_changed)
@@ -9,25 +9,49 @@
     RESTful easy Django extension.
 
     View than support any HTTP methods and returs JSON with any status
+
+    JSON кодируется через zjson (см. настройки VUE_JSON_*).
 """
 
 from __future__ import unicode_literals
 
 import six
 import json
+import hashlib
+import weakref
+import threading
+from calendar import timegm
+from collections import namedtuple, Iterator
 
-from .lib import JSDict
+from .lib import JSDict, ZMoment, PhaseTimer, NULL_TIMER, load_class
 
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.http import (Http404, JsonResponse, FileResponse, HttpResponse, 
-    HttpResponseRedirect, HttpResponseForbidden)
+from django.http import (Http404, FileResponse, HttpResponse, 
+    HttpResponseRedirect, HttpResponseForbidden, StreamingHttpResponse, 
+    HttpResponseNotModified)
+from django.http.response import HttpResponseBase
+from django.db.models.query import QuerySet
 from django.views.generic.base import ContextMixin, TemplateView, View
 from django.utils.encoding import iri_to_uri
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, parse_etags, quote_etag
 from django.utils.six.moves.urllib.parse import urljoin
 
 from . import dj_rest_params
+from . import dj_pool
+from . import dj_perms
+from . import dj_compress
+from . import dj_jobs
+from . import dj_profile
+from . import dj_schema
+from .dj_rest_fields import FieldsParam, Projection
+from .dj_json_body import is_json_request, body_size_allowed, JSONBodyParams, EJSONBodyError
+from . import zjson
+from .zjson import ZJsonResponse
+from . import zmsgpack
 
 
 class ViewAccessParams(object):
@@ -46,7 +70,7 @@ class ViewAccessParams(object):
         self.ajax_only = kwargs.get("ajax_only", False)
         self.registered_only = kwargs.get("registered_only", False)
         self.active_only = kwargs.get("active_only", True)
-        self.permissions = kwargs.get("ajax_only", None)
+        self.permissions = kwargs.get("permissions", None)
 
 
 class UseAccessParams(ViewAccessParams):
@@ -59,18 +83,142 @@ class UseAccessParams(ViewAccessParams):
         """
 
         """
-        super(UseViewAccessParams, self).__init__()
+        super(UseAccessParams, self).__init__()
         self.use_method = method
 
     def load(self, access_defs):
         try:
-            src = access_defs[self._method]
+            src = access_defs[self.use_method]
         except KeyError as e:
-            raise Exception("Unknown method for ViewAccessParams: ''".format(self._method))
+            raise Exception("Unknown method for ViewAccessParams: '{}'".format(self.use_method))
         self.ajax_only = src.ajax_only
         self.registered_only = src.registered_only
         self.active_only = src.active_only
-        self.permissions = src.ajax_only
+        self.permissions = src.permissions
+
+
+class DispatchPlan(namedtuple("DispatchPlan", ["allowed", "access", "params", "handler", "validator"])):
+    """
+        Заранее вычисленный план обработки одного HTTP метода в RESTView.
+            allowed -- метод разрешен в http_method_names
+            access -- ViewAccessParams, действующий для метода
+            params -- кортеж параметров COMMON_PARAMS + <METHOD>_PARAMS
+            handler -- process_<method> или process (не связанный с экземпляром)
+            validator -- params, скомпилированные dj_rest_params.compile_params, или None
+    """
+    __slots__ = ()
+
+
+class RequestSettings(namedtuple("RequestSettings", ["profiler", "server_timing", "timing_sink",
+        "compress"])):
+    """
+        Настройки обработки запроса RESTView по атрибутам view и settings.VUE_*:
+            profiler -- dj_profile.Profiler или None
+            server_timing, timing_sink -- см. RESTView.get_timing_settings
+            compress -- (enabled, min_size, level), см. dj_compress.get_settings
+    """
+    __slots__ = ()
+
+
+# планы обработки, у которых при изменении настроек сбрасываются request_settings
+_view_plans = weakref.WeakValueDictionary()
+
+
+class ViewPlan(dict):
+    """
+        План обработки view: {<METHOD>: DispatchPlan}.
+        request_settings -- RequestSettings, вычисляются при первом запросе
+            и сбрасываются при изменении настроек VUE_*.
+    """
+
+    request_settings = None
+
+    def __init__(self, *args, **kwargs):
+        super(ViewPlan, self).__init__(*args, **kwargs)
+        _view_plans[id(self)] = self
+
+
+def _on_setting_changed(setting, **kwargs):
+    if setting.startswith("VUE_"):
+        for plan in _view_plans.values():
+            plan.request_settings = None
+
+setting_changed.connect(_on_setting_changed)
+
+
+def is_lazy_value(val):
+    """
+        True, если значение ответа - итератор (генератор) или QuerySet,
+        то есть может быть выдано в ответ потоком, без построения списка в памяти.
+    """
+    return isinstance(val, (QuerySet, Iterator))
+
+
+def materialize_answer(data):
+    """
+        Возвращает словарь ответа, в котором итераторы и QuerySet верхнего уровня 
+        заменены списками. Если таких значений нет - возвращает сам data.
+    """
+    if not any(is_lazy_value(val) for val in data.itervalues()):
+        return data
+    return dict((key, list(val) if is_lazy_value(val) else val) 
+        for key, val in data.iteritems())
+
+
+def iter_json_chunks(data, chunk_items=500):
+    """
+        Генератор, выдающий словарь data в виде JSON по частям.
+        Значения - итераторы и QuerySet кодируются как JSON массивы поэлементно,
+        по chunk_items элементов на часть. QuerySet читается через iterator(),
+        без кеширования результатов.
+        Остальные значения кодируются целиком.
+        Кодирование - текущим бекендом zjson.
+    """
+    dumps = zjson.get_backend().dumps
+    buf = ["{"]
+    sep = ""
+    for key, val in data.iteritems():
+        buf.append(sep)
+        sep = ", "
+        buf.append(dumps(key))
+        buf.append(": ")
+        if not is_lazy_value(val):
+            buf.append(dumps(val))
+            continue
+
+        if isinstance(val, QuerySet):
+            val = val.iterator()
+        buf.append("[")
+        isep = ""
+        cnt = 0
+        for itm in val:
+            buf.append(isep)
+            isep = ", "
+            buf.append(dumps(itm))
+            cnt += 1
+            if cnt >= chunk_items:
+                yield "".join(buf)
+                buf = []
+                cnt = 0
+        buf.append("]")
+
+    buf.append("}")
+    yield "".join(buf)
+
+
+_timing_sinks = {}
+
+
+def get_timing_sink(sink):
+    """
+        Возвращает функцию - приемник замеров. sink - функция или путь к ней строкой.
+    """
+    if not isinstance(sink, six.string_types):
+        return sink
+    func = _timing_sinks.get(sink)
+    if func is None:
+        func = _timing_sinks[sink] = load_class(sink)
+    return func
 
 
 class EResponseForbidden(Exception):
@@ -85,7 +233,7 @@ class EResponseDataError(Exception):
     """
 
 
-class RESTView(View):
+class RESTView(dj_jobs.BackgroundJobMixin, View):
     """
       Реализует метод post к обычному View, обеспечивая возврат ответа в виде JSON,
       возможно со статусом, отличным от 200.
@@ -127,6 +275,11 @@ class RESTView(View):
 
         Определяет атрибут: 
             request_params равный request.post или get в завимости от метода.
+            Для JSON запросов (Content-Type: application/json) методов DATA_POST_METHODS -
+            dj_json_body.JSONBodyParams: тело разбирается один раз, при первом обращении.
+            JSON_BODY_MAX_SIZE, JSON_BODY_MAX_DEPTH - ограничения тела, None - из настроек
+            VUE_JSON_BODY_MAX_SIZE / VUE_JSON_BODY_MAX_DEPTH. Превышение размера по
+            Content-Length - ответ TOO_LARGE_STATUS еще до чтения тела.
 
         Атрибуты класса для настройки:
             http_method_names=['get', 'post'] - варианты разрешенных обработчиков
@@ -145,6 +298,120 @@ class RESTView(View):
                 Для проверки вызывает check_user_permissions, который может быть переопределен.
                 Работает только с registered_only=True.
                 Если permissions is None - разрешения не проверяются.
+            access_params - словарь {<метод>: ViewAccessParams | UseAccessParams} для 
+                настройки доступа отдельно по методам ('get', 'post', ...).
+                Для методов, не указанных в словаре, используются атрибуты выше.
+
+        Потоковая выдача больших ответов:
+            STREAM_ANSWER (= False) - если True, и в ответе есть значения - итераторы 
+                (генераторы) или QuerySet, то ответ выдается StreamingHttpResponse, 
+                JSON формируется по частям по мере чтения данных (STREAM_CHUNK_ITEMS 
+                элементов на часть). Если False - такие значения преобразуются в списки.
+            Значения-итераторы можно передавать в set_answer_key в любом режиме.
+            Статус и ключи ответа/ошибки формируются как обычно, но ошибка, возникшая
+            уже во время выдачи потока, не может изменить статус ответа.
+
+        Условные GET запросы (ETag / Last-Modified / 304):
+            Можно определить дешевые методы get_etag и/или get_last_modified, например
+            max(updated_at) по таблице. Они вызываются после разбора параметров, и если 
+            If-None-Match / If-Modified-Since запроса совпадают - сразу возвращается 304, 
+            process не вызывается. Иначе значения выдаются в заголовках ETag / Last-Modified.
+            ETAG_BY_BODY (= False) - если True и get_etag ничего не вернул, ETag вычисляется
+                как хеш сформированного ответа. Это не экономит вычисления, но экономит передачу.
+            CONDITIONAL_METHODS - методы, для которых это работает (GET, HEAD).
+            HEAD обрабатывается так же, как GET: process_get и GET_PARAMS, если 
+                не определены process_head и HEAD_PARAMS.
+
+        Двоичный формат ответа (MessagePack), см. zmsgpack:
+            BINARY_ANSWER (= True) - если в заголовке Accept запроса явно указан 
+                application/msgpack (и он не хуже application/json по q), ответ
+                кодируется в MessagePack вместо JSON. Содержание, статусы и ошибки - те же.
+                Потоковая выдача (STREAM_ANSWER) в этом режиме не используется.
+            Декодер для браузера - z_msgpack в z_utils.js.
+
+        Сжатие ответов (gzip / deflate по Accept-Encoding), см. dj_compress:
+            COMPRESS_ANSWER - сжимать ли ответы, None - settings.VUE_COMPRESS_ANSWER.
+            COMPRESS_MIN_SIZE - ответы меньше этого размера (байт) не сжимаются, 
+                None - settings.VUE_COMPRESS_MIN_SIZE. Потоковые ответы сжимаются всегда.
+            COMPRESS_LEVEL - степень сжатия 1..9, None - settings.VUE_COMPRESS_LEVEL.
+            ETag сжатого ответа выдается слабым (W/).
+
+        Медленные внешние вызовы (сервисы, API) внутри process_* можно выполнить 
+            параллельно в пуле потоков: self.run_concurrent([...]), см. dj_pool.
+            CONCURRENT_POOL - имя пула.
+            Изменения ответа в вызовах (set_answer_key, set_answer_error и т.п.)
+            выполняются после завершения всех вызовов в потоке запроса, в порядке вызовов.
+
+        Замер времени этапов обработки:
+            Этапы access (allow_user_access), params (clean_input_params, включая 
+            запросы ModelParam), validators (get_etag / get_last_modified), 
+            process (process_*), encode (формирование JSON в create_responce), compress (сжатие ответа).
+            SERVER_TIMING - выдавать замеры в заголовке Server-Timing (видно в devtools браузера).
+                None - по настройке settings.VUE_SERVER_TIMING (по умолчанию False).
+            TIMING_SINK - функция sink(view, request, response, timings) или путь к ней,
+                куда передаются замеры timings = [(<этап>, <мс>), ...].
+                None - по настройке settings.VUE_TIMING_SINK.
+            PROFILER - dj_profile.Profiler: профилирование каждого N-го запроса или
+                запросов с заголовком / от заданных пользователей в файлы pstats
+                или свернутых стеков. None - по настройке settings.VUE_PROFILE,
+                False - не профилировать.
+            Если оба выключены - замеры не выполняются.
+            Для выдачи замеров в другое место можно переопределить report_timings.
+
+        Кеширование ответов на сервере:
+            ANSWER_CACHE - dj_answer_cache.ResponseCache или None. Для методов
+                ANSWER_CACHE.methods (GET) успешный ответ обработчика запоминается
+                по методу, адресу, параметрам и (по настройке) пользователю или роли.
+                Проверка доступа, выборка полей, формат и сжатие - для каждого запроса.
+                Одновременные промахи выполняют обработчик один раз,
+                счетчики - ANSWER_CACHE.stats().
+                Ответы с ANSWER_CACHE не выдаются потоком (STREAM_ANSWER).
+
+        Фоновое выполнение долгих операций:
+            BACKGROUND_JOB - dj_jobs.JobQueue или None. Для методов BACKGROUND_METHODS 
+                (POST) после разбора параметров обработчик ставится в очередь, а клиент
+                сразу получает ACCEPTED_STATUS (202) с состоянием задачи в ключе JOB_KEY.
+                Если очередь заполнена - TOO_MANY_REQUESTS_STATUS (429) с заголовком
+                Retry-After: BACKGROUND_RETRY_AFTER (= 5) секунд.
+                Результат забирается с dj_rest_jobs.JobStatusView.
+                Из обработчика можно сообщать прогресс: self.set_job_progress(50, u"...").
+                Для пула процессов нужно переопределить get_background_call.
+
+        Повторы запросов с заголовком Idempotency-Key:
+            IDEMPOTENCY - dj_idempotency.Idempotency или None. Для методов IDEMPOTENT_METHODS
+                запрос с тем же Idempotency-Key (от того же пользователя к тому же view) 
+                выполняется один раз, повторы получают сохраненный ответ, а одновременные
+                дубли ждут первый запрос. Ключ проверяется после проверки доступа.
+
+        Выборка полей ответа клиентом:
+            FIELD_PROJECTION (= False) - если True, ко всем методам добавляются параметры
+                FIELDS_PARAM (= "fields") и EXCLUDE_PARAM (= "exclude") - списки путей
+                через ",", вложенные через "." (rows.author.name). Ответ после process 
+                сокращается до запрошенных полей. Служебные ключи ответа и 
+                PROJECTION_KEEP_KEYS сохраняются всегда.
+                Работает только со списками параметров, а не с PARAMS_FORM_CLASS.
+            В process_* запрошенная выборка доступна как self.projection 
+                (dj_rest_fields.Projection или None), например для сокращения запроса:
+                    fields = self.projection and self.projection.fields_for("rows")
+                    if fields: qs = qs.only(*fields)
+
+        Ограничение частоты и параллельности вызовов:
+            RATE_LIMIT - dj_limits.RateLimit или None. Проверяется первым, до проверки 
+                доступа и разбора параметров. Отклоненный вызов получает ответ 
+                TOO_MANY_REQUESTS_STATUS (429) с заголовком Retry-After.
+
+        Описание параметров (JSON Schema / OpenAPI), см. dj_schema:
+            SCHEMA_OPTIONS (= True) - если не определен process_options, на OPTIONS
+                выдается схема параметров view по методам, с заголовком Allow и строгим ETag
+                (If-None-Match -> 304). Схема строится один раз в процессе, доступ
+                проверяется как для остальных методов, параметры запроса не разбираются.
+            SCHEMA_HIDDEN (= False) - не включать view в документ OpenAPI
+                (dj_rest_schema.OpenAPIView).
+
+        Разрешенность метода, параметры доступа, список параметров и обработчик
+            вычисляются один раз в as_view (см. compile_dispatch_plan), а не на каждый запрос.
+            Профайлер, настройки замеров и сжатия - при первом запросе (get_request_settings).
+            Поэтому менять эти атрибуты у экземпляра в процессе обработки бессмысленно.
 
         Использование:
             class MyView(RESTView)
@@ -152,6 +419,7 @@ class RESTView(View):
         Для реализации бизнеслогики можно определить методы process_get, process_post,... для
             всех нужных вариантов. Если конкретного варианта нет - будет вызван метод process.
             Сигнатура вызова всех методов одинакова с process
+            Если метод вернул HttpResponse - он выдается как есть, вместо накопленного ответа.
     """
 
     http_method_names = ['get', 'post', 'put', 'patch', 'delete', 'head', 'options', ]
@@ -162,6 +430,7 @@ class RESTView(View):
     registered_only=False
     active_only=True
     permissions = None
+    access_params = None
 
     PARAMS_FORM_CLASS = None
     CLEAN_RAISE_ERROR = True
@@ -182,10 +451,62 @@ class RESTView(View):
     NOT_ALLOWED_STATUS = (405, "Method Not Allowed")
     EXCEPTION_STATUS = (500, "Internal Server Error")
     UNACCEPTABLE_STATUS = (501, "Not Implemented")
+    TOO_LARGE_STATUS = (413, "Request Entity Too Large")
+    TOO_MANY_REQUESTS_STATUS = (429, "Too Many Requests")
+    CONFLICT_STATUS = (409, "Conflict")
+    ACCEPTED_STATUS = (202, "Accepted")
+    RATE_LIMITED_MESSAGE = u"Слишком много запросов, повторите позже."
 
     DATA_POST_METHODS = ('POST', 'PUT', 'PATCH',)
     DATA_GET_METHODS = ('GET', 'HEAD', 'PATCH', 'OPTIONS',)
 
+    JSON_BODY_MAX_SIZE = None
+    JSON_BODY_MAX_DEPTH = None
+
+    STREAM_ANSWER = False
+    STREAM_CHUNK_ITEMS = 500
+
+    CONDITIONAL_METHODS = ('GET', 'HEAD',)
+    ETAG_BY_BODY = False
+
+    CONCURRENT_POOL = "default"
+    # threading.local: изменения ответа вызова run_concurrent в потоке пула
+    _concurrent_local = None
+
+    BINARY_ANSWER = True
+
+    COMPRESS_ANSWER = None
+    COMPRESS_MIN_SIZE = None
+    COMPRESS_LEVEL = None
+
+    SERVER_TIMING = None
+    TIMING_SINK = None
+    PROFILER = None
+
+    RATE_LIMIT = None
+
+    IDEMPOTENCY = None
+
+    ANSWER_CACHE = None
+
+    BACKGROUND_METHODS = ('POST',)
+    JOB_KEY = "job"
+    IDEMPOTENT_METHODS = ('POST', 'PUT', 'PATCH',)
+
+    FIELD_PROJECTION = False
+    FIELDS_PARAM = "fields"
+    EXCLUDE_PARAM = "exclude"
+    PROJECTION_KEEP_KEYS = ()
+
+    SCHEMA_OPTIONS = True
+    SCHEMA_HIDDEN = False
+
+    projection = None
+
+    timer = NULL_TIMER
+
+    _dispatch_plan = None
+
     def process(self, request, *args, **kwargs):
         """
             Место для реализации "бизнесс-логики" view.
@@ -208,14 +529,32 @@ class RESTView(View):
             Может быть переопределен в потомках.
             Дефолтовая реализация использует настройки access_params.
         """
-        if self.registered_only:
-            if request.user.is_authenticated() and (request.user.is_active or not self.active_only):
-                return self.check_user_permissions(request.user)
+        access = self.method_plan.access
+        if access.registered_only:
+            if request.user.is_authenticated() and (request.user.is_active or not access.active_only):
+                return self.check_user_permissions(request.user, access.permissions)
             else:
                 return False
         else:
             return True
 
+    def get_etag(self, request, *args, **kwargs):
+        """
+            Возвращает строку - ETag текущего состояния ресурса или None.
+            Вызывается до process, уже с cleaned_params, поэтому должен быть дешевым.
+            Определяется в потомках.
+        """
+        return None
+
+    def get_last_modified(self, request, *args, **kwargs):
+        """
+            Возвращает datetime (или ZMoment) последнего изменения ресурса или None.
+            Вызывается до process, уже с cleaned_params, поэтому должен быть дешевым.
+            Например: Model.objects.aggregate(lm=Max("updated_at"))["lm"]
+            Определяется в потомках.
+        """
+        return None
+
     def get_param_form(self, request, *args, **kwargs):
         """
             Возвращает форму для проверки входящих параметров.
@@ -227,6 +566,7 @@ class RESTView(View):
 
     @classmethod
     def as_view(cls, **initkwargs):
+        initkwargs["_dispatch_plan"] = cls.get_dispatch_plan(initkwargs)
         view = super(RESTView, cls).as_view(**initkwargs)
         if cls.ensure_csrf:
             return ensure_csrf_cookie(view)
@@ -241,8 +581,12 @@ class RESTView(View):
 
     def set_answer_key(self, key, val):
         """
-            Добваляет в накопленный ответ знчение в ключ key
+            Добваляет в накопленный ответ знчение в ключ key.
+            val может быть итератором или QuerySet - тогда в ответе он будет 
+            массивом, при STREAM_ANSWER выдаваемым потоком.
         """
+        if self.defer_answer_change("set_answer_key", key, val):
+            return
         self._answer[key] = val
 
     def get_answer_key(self, key, *args, **kwargs):
@@ -264,6 +608,8 @@ class RESTView(View):
         """
             Добваляет в накопленный ответ словарь val_dict
         """
+        if self.defer_answer_change("append_answer_key", val_dict):
+            return
         self._answer.update(val_dict)
 
     def set_answer_error(self, err_msg, err_code=None, do_clear=True, data=None, _except_class=None, do_raise=True):
@@ -279,6 +625,13 @@ class RESTView(View):
             _except_class - служебный параметр
         """
 
+        if self.defer_answer_change("set_answer_error", err_msg, err_code=err_code, 
+                do_clear=do_clear, data=data, _except_class=_except_class, do_raise=do_raise):
+            if do_raise:
+                # прерывает вызов в потоке пула, ошибка установится в потоке запроса
+                raise (_except_class or EResponseDataError)()
+            return
+
         if do_clear:
             self._answer = {}
 
@@ -325,10 +678,67 @@ class RESTView(View):
         self.set_answer_error(err_mes, err_code=err_code, data=data, do_clear=False, 
             do_raise=do_raise, _except_class=EResponseDataError)
 
+    def run_concurrent(self, calls, timeout=None):
+        """
+            Параллельно выполняет вызовы calls в пуле потоков CONCURRENT_POOL.
+            Возвращает список результатов в порядке calls.
+            calls - функции без параметров или кортежи (func, args, kwargs).
+            Ошибки, установленные в вызовах через set_answer_error / set_user_error,
+            обрабатываются как обычно.
+            Изменения ответа из вызовов запоминаются и выполняются здесь, в потоке
+            запроса, после завершения всех вызовов - в порядке calls.
+        """
+        if self._concurrent_local is None:
+            self._concurrent_local = threading.local()
+        calls = [dj_pool._normalize_call(itm) for itm in calls]
+        changes = [[] for itm in calls]
+        deferred = [(self._run_deferred, (itm_changes, call), {})
+            for itm_changes, call in zip(changes, calls)]
+        try:
+            results = dj_pool.run_concurrent(deferred, timeout=timeout,
+                pool_name=self.CONCURRENT_POOL)
+        except (EResponseDataError, EResponseForbidden) as e:
+            # ошибка ответа вызывается повтором set_answer_error
+            self.apply_answer_changes(changes)
+            raise
+        self.apply_answer_changes(changes)
+        return results
+
+    def _run_deferred(self, changes, call):
+        func, args, kwargs = call
+        self._concurrent_local.changes = changes
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._concurrent_local.changes = None
+
+    def defer_answer_change(self, name, *args, **kwargs):
+        """
+            Внутри вызова run_concurrent запоминает изменение ответа (метод name
+            с параметрами) и возвращает True. Иначе - False.
+        """
+        if self._concurrent_local is None:
+            return False
+        changes = getattr(self._concurrent_local, "changes", None)
+        if changes is None:
+            return False
+        changes.append((name, args, kwargs))
+        return True
+
+    def apply_answer_changes(self, changes):
+        """
+            Выполняет изменения ответа, запомненные в вызовах run_concurrent.
+        """
+        for itm_changes in changes:
+            for name, args, kwargs in itm_changes:
+                getattr(self, name)(*args, **kwargs)
+
     def clear_answer(self):
         """
             Очищает накопленный ответ
         """
+        if self.defer_answer_change("clear_answer"):
+            return
         self._answer = {}
 
     def get_answer(self):
@@ -361,16 +771,18 @@ class RESTView(View):
 
     def clean_by_params(self, request, *args, **kwargs):
         """
+            Разбирает параметры COMMON_PARAMS + <METHOD>_PARAMS
+            функцией, скомпилированной в плане метода.
         """
         self.input_errors = []
 
-        common_params = getattr(self, "COMMON_PARAMS", None)
-        if common_params:
-            self.parse_in_params(common_params,self.request_params)
-
-        det_params = getattr(self, "{}_PARAMS".format(request.method), None)
-        if det_params:
-            self.parse_in_params(det_params,self.request_params)
+        validator = self.method_plan.validator
+        if validator is not None:
+            errors = validator(self.request_params, self.cleaned_params, self.CLEAN_RAISE_ERROR)
+            if errors:
+                if self.CLEAN_RAISE_ERROR:
+                    self.set_answer_error(errors[0], do_clear=False)
+                self.input_errors = errors
 
         self.cleaned_params = JSDict(self.cleaned_params.iteritems())
 
@@ -425,31 +837,183 @@ class RESTView(View):
         return u"Некорректные входные параметры: ({}).".format(err_mes)
 
     def dispatch(self, request, *args, **kwargs):
+        """
+            Проверяет RATE_LIMIT и обрабатывает запрос в handle_request.
+        """
+        if self.RATE_LIMIT is None:
+            return self.profiled_handle_request(request, *args, **kwargs)
+
+        ticket = self.RATE_LIMIT.acquire(self, request)
+        if not ticket:
+            return self.rate_limited_response(request, ticket)
+        try:
+            return self.profiled_handle_request(request, *args, **kwargs)
+        finally:
+            ticket.release()
+
+    def profiled_handle_request(self, request, *args, **kwargs):
+        """
+            Обрабатывает запрос в timed_handle_request, выбранные запросы - под PROFILER.
+        """
+        profiler = self.get_request_settings().profiler
+        if profiler is None:
+            return self.timed_handle_request(request, *args, **kwargs)
+        return profiler.run(self, request, self.timed_handle_request, *args, **kwargs)
+
+    def rate_limited_response(self, request, ticket):
+        """
+            Ответ на вызов, отклоненный RATE_LIMIT.
+        """
+        self.set_answer_error(self.RATE_LIMITED_MESSAGE, do_raise=False)
+        return self.create_responce(True, data=self.get_answer(), 
+            status=self.TOO_MANY_REQUESTS_STATUS,
+            heads={"Retry-After": ticket.retry_after_header})
+
+    def timed_handle_request(self, request, *args, **kwargs):
+        """
+            Обрабатывает запрос в handle_request.
+            Если включены замеры времени - замеряет этапы и выдает их в report_timings.
+        """
+        request_settings = self.get_request_settings()
+        server_timing, sink = request_settings.server_timing, request_settings.timing_sink
+        if not server_timing and sink is None:
+            return self.handle_request(request, *args, **kwargs)
+
+        self.timer = PhaseTimer()
+        response = self.handle_request(request, *args, **kwargs)
+        self.timer.stop()
+        self.report_timings(request, response, server_timing, sink)
+        return response
+
+    def get_dispatch_plan_instance(self):
+        """
+            План обработки этого view (из as_view или общий для класса).
+        """
+        plan = self._dispatch_plan
+        if plan is None:
+            plan = self._dispatch_plan = type(self).get_dispatch_plan()
+        return plan
+
+    def get_request_settings(self):
+        """
+            RequestSettings плана обработки: вычисляются при первом запросе,
+            а не на каждый запрос.
+        """
+        plan = self.get_dispatch_plan_instance()
+        res = plan.request_settings
+        if res is None:
+            profiler = self.PROFILER
+            if profiler is None:
+                profiler = dj_profile.get_default_profiler()
+            server_timing, sink = self.get_timing_settings()
+            res = plan.request_settings = RequestSettings(profiler=profiler or None,
+                server_timing=server_timing, timing_sink=sink,
+                compress=dj_compress.get_settings(
+                    self.COMPRESS_ANSWER, self.COMPRESS_MIN_SIZE, self.COMPRESS_LEVEL))
+        return res
+
+    def get_timing_settings(self):
+        """
+            Возвращает (выдавать ли Server-Timing, функция-приемник или None)
+        """
+        server_timing = self.SERVER_TIMING
+        if server_timing is None:
+            server_timing = getattr(settings, "VUE_SERVER_TIMING", False)
+        sink = self.TIMING_SINK
+        if getattr(sink, "__self__", None) is self:
+            # функция, присвоенная атрибуту класса, становится методом
+            sink = sink.__func__
+        if sink is None:
+            sink = getattr(settings, "VUE_TIMING_SINK", None)
+        if sink is not None:
+            sink = get_timing_sink(sink)
+        return (server_timing, sink)
+
+    def report_timings(self, request, response, server_timing, sink):
+        """
+            Выдает замеры этапов self.timer: в заголовок Server-Timing и/или в sink.
+        """
+        timings = [(name, dur * 1000.0) for name, dur in self.timer.phases]
+        timings.append(("total", self.timer.total * 1000.0))
+        if server_timing:
+            response["Server-Timing"] = ", ".join(
+                "{};dur={:.2f}".format(name, dur) for name, dur in timings)
+        if sink is not None:
+            sink(self, request, response, timings)
+
+    def handle_request(self, request, *args, **kwargs):
         """
             Проверяет допустимость метода, AJAX, пользователя и т.п.
+            Разбирает параметры, вызывает process_* и формирует ответ.
         """
 
-        if not ((request.method.lower() in self.http_method_names) and ((self.ajax_only and self.request.is_ajax()) or not self.ajax_only)):
+        plan = self.get_dispatch_plan_instance()
+
+        self.method_plan = plan.get(request.method)
+        if (self.method_plan is None or not self.method_plan.allowed 
+            or (self.method_plan.access.ajax_only and not request.is_ajax())):
             return self.http_method_not_allowed(request, *args, **kwargs)
 
-        if not self.allow_user_access(request, *args, **kwargs):
+        with self.timer.phase("access"):
+            allowed = self.allow_user_access(request, *args, **kwargs)
+        if not allowed:
             self.set_user_error(do_raise=False)
             return self.create_responce(self.USER_ERROR_BY_STATUS,
                 data=self.get_answer(),
                 status=self.FORBIDDEN_STATUS)
 
+        if self.method_plan.handler == type(self).options_schema:
+            return self.options_schema(request, *args, **kwargs)
+
         if request.method in self.DATA_POST_METHODS:
-            self.request_params = request.POST
+            if is_json_request(request):
+                if not body_size_allowed(request, self.JSON_BODY_MAX_SIZE):
+                    self.set_answer_error(u"Слишком большой запрос.", do_raise=False)
+                    return self.create_responce(True, data=self.get_answer(), 
+                        status=self.TOO_LARGE_STATUS)
+                self.request_params = JSONBodyParams(request, 
+                    self.JSON_BODY_MAX_SIZE, self.JSON_BODY_MAX_DEPTH)
+            else:
+                self.request_params = request.POST
         elif request.method in self.DATA_GET_METHODS:
             self.request_params = request.GET
         else:
             self.request_params = None
 
+        if self.IDEMPOTENCY is not None and request.method in self.IDEMPOTENT_METHODS:
+            key = request.META.get("HTTP_IDEMPOTENCY_KEY")
+            if key:
+                return self.IDEMPOTENCY.run(self, request, key,
+                    lambda: self.process_request(request, *args, **kwargs))
+
+        return self.process_request(request, *args, **kwargs)
+
+    def process_request(self, request, *args, **kwargs):
+        """
+            Разбирает параметры, вызывает process_* и формирует ответ.
+            Вызывается из handle_request после проверок доступа.
+        """
         self.init_answer()
+        self._validators = None
+        self.projection = None
         try:
-            self.clean_input_params(request, *args, **kwargs)
-            process = getattr(self, "process_"+request.method.lower(), self.process)
-            process(request, *args, **kwargs)
+            with self.timer.phase("params"):
+                self.clean_input_params(request, *args, **kwargs)
+                self.projection = self.get_projection()
+            if request.method in self.CONDITIONAL_METHODS:
+                with self.timer.phase("validators"):
+                    response = self.check_not_modified(request, *args, **kwargs)
+                if response is not None:
+                    return response
+            with self.timer.phase("process"):
+                if self.BACKGROUND_JOB is not None and request.method in self.BACKGROUND_METHODS:
+                    return self.submit_background(request, *args, **kwargs)
+                if self.ANSWER_CACHE is not None and request.method in self.ANSWER_CACHE.methods:
+                    result = self.process_cached(request, *args, **kwargs)
+                else:
+                    result = self.method_plan.handler(self, request, *args, **kwargs)
+            if isinstance(result, HttpResponseBase):
+                return result
         except EResponseForbidden as e:
             return self.create_responce(self.USER_ERROR_BY_STATUS,
                 data=self.get_answer(),
@@ -458,10 +1022,204 @@ class RESTView(View):
             return self.create_responce(self.DATA_ERROR_BY_STATUS,
                 data=self.get_answer(), 
                 status=self.DATA_ERROR_STATUS)
+        except EJSONBodyError as e:
+            self.set_answer_error(e.u_msg, do_raise=False)
+            return self.create_responce(self.DATA_ERROR_BY_STATUS,
+                data=self.get_answer(), 
+                status=self.DATA_ERROR_STATUS)
         except Exception as e:
             raise
 
-        return self.create_responce(data=self.get_answer())
+        return self.finalize_response(request, 
+            self.create_responce(data=self.project_answer(self.get_answer())))
+
+    def process_cached(self, request, *args, **kwargs):
+        """
+            Обработчик метода через кеш ответов ANSWER_CACHE.
+            Кешируется только успешный ответ, ленивые значения читаются в списки.
+        """
+        def compute():
+            result = self.method_plan.handler(self, request, *args, **kwargs)
+            if isinstance(result, HttpResponseBase):
+                return (result, False)
+            answer = materialize_answer(self.get_answer())
+            return (answer, answer.get(self.ANSWER_KEY) != self.ERROR_WORD)
+
+        answer = self.ANSWER_CACHE.fetch(self, request, compute)[0]
+        if isinstance(answer, HttpResponseBase):
+            return answer
+        self._answer = dict(answer)
+
+    def get_background_view(self, request):
+        """
+            Копия view для фоновой задачи: свой накопленный ответ, свои разобранные
+            параметры и копия request. Ответ 202 формируется этим экземпляром
+            одновременно с выполнением задачи, общего состояния у них быть не должно.
+        """
+        worker = super(RESTView, self).get_background_view(request)
+        if isinstance(self.cleaned_params, dict):
+            worker.cleaned_params = JSDict(self.cleaned_params)
+        worker.timer = NULL_TIMER
+        worker.init_answer()
+        return worker
+
+    def submit_background(self, request, *args, **kwargs):
+        """
+            Ставит обработку в очередь BACKGROUND_JOB и отвечает ACCEPTED_STATUS
+            с состоянием задачи в ключе JOB_KEY.
+        """
+        try:
+            job = self.submit_background_job(request, *args, **kwargs)
+        except dj_jobs.EJobRejected as e:
+            self.set_answer_error(e.u_msg, do_raise=False)
+            return self.create_responce(True, data=self.get_answer(), 
+                status=self.TOO_MANY_REQUESTS_STATUS,
+                heads={"Retry-After": self.get_retry_after_header()})
+        self.set_answer_key(self.JOB_KEY, job)
+        return self.create_responce(True, data=self.get_answer(), status=self.ACCEPTED_STATUS)
+
+    def run_background(self, job_id, request, *args, **kwargs):
+        """
+            Выполняется в фоновой задаче: вызывает обработчик метода и
+            возвращает результат задачи (ответ и статус).
+        """
+        self.background_job_id = job_id
+        try:
+            self.method_plan.handler(self, request, *args, **kwargs)
+        except EResponseForbidden as e:
+            return dj_jobs.answer_result(self.get_answer(), 
+                self.FORBIDDEN_STATUS[0] if self.USER_ERROR_BY_STATUS else 200)
+        except EResponseDataError as e:
+            return dj_jobs.answer_result(self.get_answer(), 
+                self.DATA_ERROR_STATUS[0] if self.DATA_ERROR_BY_STATUS else 200)
+        return dj_jobs.answer_result(self.project_answer(materialize_answer(self.get_answer())))
+
+    def idempotency_error_response(self, status, err_msg):
+        """
+            Ответ на ошибку обработки Idempotency-Key.
+        """
+        self.set_answer_error(err_msg, do_raise=False)
+        return self.create_responce(True, data=self.get_answer(), status=status)
+
+    def get_projection(self):
+        """
+            Выборка полей, запрошенная клиентом (Projection), или None.
+        """
+        if not self.FIELD_PROJECTION:
+            return None
+        include = self.cleaned_params.get("projection_fields")
+        exclude = self.cleaned_params.get("projection_exclude")
+        if include is None and exclude is None:
+            return None
+        return Projection(include, exclude)
+
+    def get_projection_keep_keys(self):
+        """
+            Ключи ответа, которые не удаляются выборкой полей.
+        """
+        return (self.ANSWER_KEY, self.ERROR_MESSAGE_KEY, self.ERROR_CODE_KEY) + tuple(self.PROJECTION_KEEP_KEYS)
+
+    def project_answer(self, data):
+        """
+            Применяет к ответу выборку полей self.projection.
+        """
+        if self.projection is None:
+            return data
+        return self.projection.apply(data, self.get_projection_keep_keys())
+
+    def finalize_response(self, request, response):
+        """
+            Последняя обработка успешного ответа перед выдачей.
+            Проставляет ETag / Last-Modified, при ETAG_BY_BODY вычисляет ETag по ответу.
+        """
+        if self._validators is None:
+            return response
+
+        etag, last_modified = self._validators
+        if (etag is None and self.ETAG_BY_BODY and response.status_code == 200 
+                and not response.streaming):
+            etag = quote_etag(hashlib.md5(response.content).hexdigest())
+            if self.is_not_modified(request, etag, None):
+                return self.not_modified_response(etag, last_modified)
+
+        if etag is not None:
+            if response.has_header("Content-Encoding") and not etag.startswith("W/"):
+                etag = "W/" + etag
+            response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def check_not_modified(self, request, *args, **kwargs):
+        """
+            Вычисляет валидаторы get_etag / get_last_modified и сравнивает их
+            с заголовками запроса. Возвращает ответ 304 или None - продолжать обработку.
+        """
+        etag = self.get_etag(request, *args, **kwargs)
+        if etag is not None:
+            etag = quote_etag(etag)
+
+        last_modified = self.get_last_modified(request, *args, **kwargs)
+        if isinstance(last_modified, ZMoment):
+            last_modified = last_modified.dt
+        if last_modified is not None:
+            last_modified = timegm(last_modified.utctimetuple())
+
+        self._validators = (etag, last_modified)
+        if self.is_not_modified(request, etag, last_modified):
+            return self.not_modified_response(etag, last_modified)
+        return None
+
+    def is_not_modified(self, request, etag, last_modified):
+        """
+            Проверяет If-None-Match / If-Modified-Since запроса.
+            etag - в кавычках, last_modified - unix timestamp.
+            If-None-Match, если есть, имеет приоритет.
+        """
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match is not None:
+            if etag is None:
+                return False
+            etags = parse_etags(if_none_match)
+            return "*" in etags or parse_etags(etag)[0] in etags
+
+        if_modified_since = request.META.get("HTTP_IF_MODIFIED_SINCE")
+        if if_modified_since and last_modified is not None:
+            if_modified_since = parse_http_date_safe(if_modified_since)
+            return if_modified_since is not None and int(last_modified) <= if_modified_since
+
+        return False
+
+    def not_modified_response(self, etag, last_modified):
+        """
+            Формирует ответ 304 с валидаторами.
+        """
+        response = HttpResponseNotModified()
+        if etag is not None:
+            response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def options_schema(self, request, *args, **kwargs):
+        """
+            Ответ на OPTIONS при SCHEMA_OPTIONS: схема параметров view.
+        """
+        entry = dj_schema.get_view_schema(type(self), self._dispatch_plan)
+        return self.schema_response(request, entry, heads={"Allow": ", ".join(entry.data["allow"])})
+
+    def schema_response(self, request, entry, heads=None):
+        """
+            Выдает готовый JSON dj_schema.SchemaEntry со строгим ETag или 304.
+        """
+        if self.is_not_modified(request, entry.etag, None):
+            return self.not_modified_response(entry.etag, None)
+        response = HttpResponse(entry.content, content_type="application/json; charset=utf-8")
+        response["ETag"] = entry.etag
+        if heads:
+            for itm in heads:
+                response[itm] = heads[itm]
+        return response
 
     def http_method_not_allowed(self, request, *args, **kwargs):
         return self.create_responce(True, data={}, 
@@ -473,12 +1231,21 @@ class RESTView(View):
             by_status если False, то статус 200, иначе status
             status: (<код>, <текст>). Если не указан - то 200
             data:   dict. Если не указан - формируется обычный ответ, а не JSON
+                Значения верхнего уровня могут быть итераторами или QuerySet (см. STREAM_ANSWER)
             heads - значения заголовков
         """
         if data is None:
             response = HttpResponse()
+        elif self.BINARY_ANSWER and zmsgpack.accepts_msgpack(self.request.META.get("HTTP_ACCEPT")):
+            with self.timer.phase("encode"):
+                response = zmsgpack.MsgpackResponse(materialize_answer(data))
+        elif self.STREAM_ANSWER and any(is_lazy_value(val) for val in data.itervalues()):
+            response = StreamingHttpResponse(
+                iter_json_chunks(data, chunk_items=self.STREAM_CHUNK_ITEMS),
+                content_type="application/json")
         else:
-            response = JsonResponse(data)
+            with self.timer.phase("encode"):
+                response = ZJsonResponse(materialize_answer(data))
 
         if heads:
             for itm in heads:
@@ -486,6 +1253,13 @@ class RESTView(View):
         if by_status and status:
             response.status_code = status[0]
             response.reason_phrase = status[1]
+        if self.BINARY_ANSWER and data is not None:
+            patch_vary_headers(response, ("Accept",))
+
+        compress, min_size, level = self.get_request_settings().compress
+        if compress:
+            with self.timer.phase("compress"):
+                response = dj_compress.compress_response(self.request, response, min_size, level)
 
         return response
 
@@ -503,25 +1277,99 @@ class RESTView(View):
 
     # ====
 
-    def get_active_access_params(self, method):
+    @classmethod
+    def get_dispatch_plan(cls, initkwargs=None):
+        """
+            Возвращает план обработки ViewPlan {<METHOD>: DispatchPlan}.
+            Без initkwargs план вычисляется один раз и запоминается в самом классе.
+        """
+        if initkwargs:
+            return cls.compile_validators(cls.compile_dispatch_plan(initkwargs))
+
+        plan = cls.__dict__.get("_class_dispatch_plan")
+        if plan is None:
+            plan = cls.compile_validators(cls.compile_dispatch_plan({}))
+            cls._class_dispatch_plan = plan
+        return plan
+
+    @staticmethod
+    def compile_validators(plan):
+        """
+            Компилирует окончательные списки параметров плана в функции разбора.
+        """
+        return ViewPlan((method, itm._replace(validator=dj_rest_params.compile_params(itm.params)))
+            for method, itm in plan.items())
+
+    @classmethod
+    def compile_dispatch_plan(cls, initkwargs):
+        """
+            Вычисляет для каждого HTTP метода DispatchPlan: разрешен ли метод, 
+            действующие ViewAccessParams, список параметров и обработчик.
+            initkwargs - параметры as_view, переопределяющие атрибуты класса.
+        """
+        attr = lambda name: initkwargs.get(name, getattr(cls, name, None))
+
+        http_method_names = attr("http_method_names")
+        access_params = attr("access_params")
+        default_access = ViewAccessParams(ajax_only=attr("ajax_only"), 
+            registered_only=attr("registered_only"), active_only=attr("active_only"),
+            permissions=attr("permissions"))
+
+        plan = {}
+        for method in View.http_method_names:
+            access = cls.get_active_access_params(method, access_params)
+            method_params = attr("{}_PARAMS".format(method.upper()))
+            handler = getattr(cls, "process_"+method, None)
+            if method == "head":
+                if method_params is None:
+                    method_params = attr("GET_PARAMS")
+                if handler is None:
+                    handler = getattr(cls, "process_get", None)
+            schema_options = method == "options" and handler is None and attr("SCHEMA_OPTIONS")
+            if schema_options:
+                handler = cls.options_schema
+            if handler is None:
+                handler = cls.process
+            params = tuple(attr("COMMON_PARAMS") or ()) + tuple(method_params or ())
+            if attr("FIELD_PROJECTION"):
+                params += (
+                    FieldsParam(attr("FIELDS_PARAM"), to_attribute="projection_fields", required=False),
+                    FieldsParam(attr("EXCLUDE_PARAM"), to_attribute="projection_exclude", required=False),
+                )
+            if schema_options:
+                # отвечает схемой, параметры OPTIONS не разбираются
+                params = ()
+            plan[method.upper()] = DispatchPlan(
+                allowed=method in http_method_names,
+                access=access if access is not None else default_access,
+                params=params,
+                handler=handler,
+                validator=None)
+        return plan
+
+    @classmethod
+    def get_active_access_params(cls, method, access_params=None):
         """
             Вычисляет объект класса ViewAccessParams, соотвествующий переданному методу.
+            Если для метода ничего не задано - возвращает None.
         """
-        if not self.access_params:
-            return ViewAccessParams()
+        if access_params is None:
+            access_params = cls.access_params
+        if not access_params:
+            return None
 
+        access_params = dict((key.lower(), val) for key, val in access_params.items())
         viewed = set()
-        chk = [method]
 
-        cm = method
+        cm = method.lower()
         while True:
             if cm in viewed:
                 raise Exception("Circular reference in 'access_params' method '{}'".format(cm))
-            ap = self.access_params.get(cm)
+            ap = access_params.get(cm)
             viewed.add(cm)
             if ap is not None:
                 if isinstance(ap, UseAccessParams):
-                    cm = ap.use_method
+                    cm = ap.use_method.lower()
                     continue
                 elif isinstance(ap, ViewAccessParams):
                     return ap
@@ -536,21 +1384,12 @@ class RESTView(View):
             в self.permissions.
           Возвращает True, если это так, или self.permissions is None.
           Если пользователь не авторизован - возвращает False
+          Результаты кешируются в запросе и между запросами (см. dj_perms).
 
         """
-        if not user.is_authenticated():
-            return False
         if permissions is None:
             permissions = self.permissions
-        if permissions is None:
-            return True
-        if len(permissions) is None:
-            return False
-        res = True
-        for itm in permissions:
-            if not user.has_perm(itm):
-                res = False
-        return res
+        return dj_perms.check_user_permissions(user, permissions, getattr(self, "request", None))
 
     def check_user_authenticated(self, request, *args, **kwargs):
         """
@@ -562,9 +1401,9 @@ class RESTView(View):
                 if self.check_user_permissions(request.user):
                     return self.proc_view(request, *args, **kwargs)
                 else:
-                    return JsonResponse(self.get_forbidden_data(request,True, True, *args, **kwargs))                
+                    return ZJsonResponse(self.get_forbidden_data(request,True, True, *args, **kwargs))                
             else:
-                return JsonResponse(self.get_forbidden_data(request,True, None, *args, **kwargs))                
+                return ZJsonResponse(self.get_forbidden_data(request,True, None, *args, **kwargs))                
         else:
             return self.proc_view(request, *args, **kwargs)
 
@@ -775,7 +1614,7 @@ class VueBaseView(TemplateView):
         self.process()
 
         if self.context["window_context"] is not None:
-            self.context["window_context"] = json.dumps(self.context["window_context"])
+            self.context["window_context"] = zjson.dumps(self.context["window_context"])
         else:
             self.context["window_context"] = None
 
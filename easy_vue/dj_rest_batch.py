@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+"""
+    RESTful easy Django extension.
+    Пакетный вызов нескольких RESTView за один HTTP запрос.
+"""
+
+from __future__ import unicode_literals
+
+import copy
+import json
+import logging
+
+from django.core.urlresolvers import resolve, Resolver404
+from django.http import QueryDict
+from django.utils.six.moves.urllib.parse import urlsplit
+
+from .dj_rest import RESTView
+from . import dj_rest_params
+from . import dj_pool
+
+
+class RESTBatchView(RESTView):
+    """
+        Выполняет пакет подзапросов к другим RESTView внутри одного HTTP запроса,
+        с общими пользователем, сессией и заголовками исходного запроса.
+        Подзапросы не проходят middleware повторно, но проходят декораторы view
+        (login_required и т.п.) и все проверки доступа самих RESTView.
+
+        Вход (POST):
+            requests - JSON список [{url, method, params}, ...]
+                url - адрес view, можно с query string
+                method - HTTP метод, по умолчанию GET
+                params - словарь параметров {имя: значение | [значения]}
+            parallel - JSON true, если подзапросы независимы и их можно выполнять
+                параллельно в пуле потоков BATCH_POOL.
+
+        Ответ:
+            results - список [{status, answer}, ...] в порядке requests.
+                answer - разобранный JSON ответа подзапроса, или None.
+            Исключение в подзапросе не прерывает пакет: его результат - статус 500
+            с сообщением об ошибке, исключение пишется в лог django.request.
+
+        Атрибуты класса для настройки:
+            MAX_BATCH_SIZE - максимум подзапросов в пакете.
+            ALLOWED_VIEWS - None (любые RESTView) или список классов view,
+                которые разрешено вызывать.
+            BATCH_POOL - имя пула потоков для parallel. Отдельный от CONCURRENT_POOL,
+                что бы подзапросы могли сами использовать run_concurrent.
+
+        !! При parallel каждый подзапрос работает в своем потоке со своим соединением
+        с БД, общей транзакции (ATOMIC_REQUESTS) у них нет.
+
+        Использование:
+            url(r'^batch/$', RESTBatchView.as_view())
+            На клиенте - z_batch из z_utils.js
+    """
+
+    http_method_names = ['post', ]
+
+    POST_PARAMS = [
+        dj_rest_params.JSONParam("requests"),
+        dj_rest_params.JSONParam("parallel", required=False),
+    ]
+
+    MAX_BATCH_SIZE = 50
+    ALLOWED_VIEWS = None
+    BATCH_POOL = "batch"
+
+    NOT_FOUND_STATUS = (404, "Not Found")
+    SERVER_ERROR_STATUS = (500, "Internal Server Error")
+
+    # Заголовки исходного запроса, которые относятся к самому пакету, а не к подзапросам
+    SUB_REQUEST_SKIP_HEADERS = ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE", 
+        "HTTP_ACCEPT", "HTTP_ACCEPT_ENCODING", "CONTENT_TYPE", "CONTENT_LENGTH")
+
+    def process_post(self, request, *args, **kwargs):
+        """
+        """
+        sub_requests = self.cleaned_params.requests
+        if not isinstance(sub_requests, list):
+            self.set_answer_error(u"'requests' должен быть списком.")
+        if len(sub_requests) > self.MAX_BATCH_SIZE:
+            self.set_answer_error(u"Слишком много запросов в пакете: {} (максимум {}).".format(
+                len(sub_requests), self.MAX_BATCH_SIZE))
+
+        calls = [(self.safe_sub_request, (request, itm)) for itm in sub_requests]
+        if self.cleaned_params.parallel:
+            results = dj_pool.run_concurrent(calls, pool_name=self.BATCH_POOL)
+        else:
+            results = [func(*args) for func, args in calls]
+
+        self.set_answer_key("results", results)
+
+    def safe_sub_request(self, request, sub_def):
+        """
+            run_sub_request, исключение которого становится результатом подзапроса.
+        """
+        try:
+            return self.run_sub_request(request, sub_def)
+        except Exception as e:
+            logging.getLogger("django.request").exception("Batch sub-request failed: %s",
+                sub_def.get("url") if isinstance(sub_def, dict) else sub_def)
+            return self.sub_error(self.SERVER_ERROR_STATUS, u"Ошибка выполнения запроса.")
+
+    def run_sub_request(self, request, sub_def):
+        """
+            Выполняет один подзапрос. Возвращает словарь {status, answer}.
+            Ошибки описания подзапроса не прерывают пакет, а попадают в его результат.
+        """
+        if not isinstance(sub_def, dict) or not sub_def.get("url"):
+            return self.sub_error(self.DATA_ERROR_STATUS, u"Некорректное описание запроса.")
+
+        url = urlsplit(sub_def["url"])
+        method = sub_def.get("method", "GET").upper()
+
+        try:
+            match = resolve(url.path)
+        except Resolver404 as e:
+            return self.sub_error(self.NOT_FOUND_STATUS, u"Адрес не найден.")
+
+        view_class = getattr(match.func, "view_class", None)
+        if not self.is_allowed_view(view_class):
+            return self.sub_error(self.FORBIDDEN_STATUS, u"Адрес недоступен для пакетного вызова.")
+
+        sub = self.make_sub_request(request, url, method, sub_def.get("params") or {})
+        sub.resolver_match = match
+        response = match.func(sub, *match.args, **match.kwargs)
+        return dict(status=response.status_code, answer=self.read_sub_answer(response))
+
+    def is_allowed_view(self, view_class):
+        """
+            Можно ли вызывать view этого класса в пакете.
+        """
+        if view_class is None or not issubclass(view_class, RESTView):
+            return False
+        if issubclass(view_class, RESTBatchView):
+            return False
+        if self.ALLOWED_VIEWS is None:
+            return True
+        return issubclass(view_class, tuple(self.ALLOWED_VIEWS))
+
+    def make_sub_request(self, request, url, method, params):
+        """
+            Создает копию исходного запроса с другими адресом, методом и параметрами.
+            Пользователь, сессия, cookies и заголовки - общие с исходным.
+        """
+        sub = copy.copy(request)
+        sub.method = method
+        sub.path = sub.path_info = url.path
+        sub.META = request.META.copy()
+        sub.META["REQUEST_METHOD"] = method
+        sub.META["QUERY_STRING"] = url.query
+        for key in self.SUB_REQUEST_SKIP_HEADERS:
+            sub.META.pop(key, None)
+
+        query = QueryDict(url.query, mutable=True)
+        data = QueryDict(mutable=True)
+        for key, val in params.items():
+            vals = val if isinstance(val, list) else [val]
+            data.setlist(key, [self.param_to_text(itm) for itm in vals])
+
+        if method in self.DATA_POST_METHODS:
+            sub.GET = query
+            sub.POST = data
+        else:
+            query.update(data)
+            sub.GET = query
+            sub.POST = QueryDict()
+        return sub
+
+    def param_to_text(self, val):
+        """
+            Значения параметров в подзапросе - строки, как в обычном запросе.
+            Вложенные структуры передаются как JSON (для JSONParam).
+        """
+        if isinstance(val, (dict, list)):
+            return json.dumps(val)
+        if isinstance(val, bool):
+            return "true" if val else "false"
+        if val is None:
+            return ""
+        return unicode(val)
+
+    def read_sub_answer(self, response):
+        """
+            Разбирает JSON ответа подзапроса. Для не JSON ответов - None.
+        """
+        if not response.get("Content-Type", "").startswith("application/json"):
+            return None
+        if response.streaming:
+            content = b"".join(response.streaming_content)
+        else:
+            content = response.content
+        if not content:
+            return None
+        return json.loads(content)
+
+    def sub_error(self, status, err_msg):
+        """
+            Результат подзапроса, который не удалось выполнить.
+        """
+        return dict(status=status[0], answer={
+            self.ANSWER_KEY: self.ERROR_WORD,
+            self.ERROR_MESSAGE_KEY: err_msg})
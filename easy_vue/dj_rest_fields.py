@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+"""
+    RESTful easy Django extension.
+    Выборка полей ответа по запросу клиента (?fields=... / ?exclude=...).
+
+    Пути полей разделяются ".", списки в ответе проходятся поэлементно:
+        fields=rows.id,rows.name,total  - из каждого элемента rows только id и name.
+        exclude=rows.author.email
+"""
+
+from __future__ import unicode_literals
+
+from itertools import imap
+
+from . import dj_rest_params
+
+
+WHOLE = True
+
+
+def add_path(tree, path):
+    """
+        Добавляет путь ["rows", "name"] в дерево {"rows": {"name": WHOLE}}.
+        Более короткий путь поглощает более длинные.
+    """
+    node = tree
+    for name in path[:-1]:
+        sub = node.get(name)
+        if sub is WHOLE:
+            return
+        if sub is None:
+            sub = node[name] = {}
+        node = sub
+    node[path[-1]] = WHOLE
+
+
+def parse_fields(value, separator=","):
+    """
+        "a,b.c" или ["a", "b.c"] -> дерево {"a": WHOLE, "b": {"c": WHOLE}}.
+        Пустое значение - None.
+    """
+    items = value if isinstance(value, (list, tuple)) else value.split(separator)
+    tree = {}
+    for itm in items:
+        itm = itm.strip()
+        if not itm:
+            continue
+        path = itm.split(".")
+        if not all(path):
+            raise ValueError(itm)
+        add_path(tree, path)
+    return tree or None
+
+
+def _is_sequence(val):
+    return isinstance(val, (list, tuple))
+
+
+def _is_lazy(val):
+    return (not isinstance(val, (dict, list, tuple, basestring))
+        and hasattr(val, "__iter__"))
+
+
+def include_fields(val, tree):
+    """
+        Оставляет в val только пути из tree.
+    """
+    if tree is WHOLE:
+        return val
+    if isinstance(val, dict):
+        return dict((key, include_fields(val[key], sub)) for key, sub in tree.iteritems() if key in val)
+    if _is_sequence(val):
+        return [include_fields(itm, tree) for itm in val]
+    if _is_lazy(val):
+        return imap(lambda itm: include_fields(itm, tree), val)
+    return val
+
+
+def exclude_fields(val, tree):
+    """
+        Удаляет из val пути из tree.
+    """
+    if isinstance(val, dict):
+        res = {}
+        for key, itm in val.iteritems():
+            sub = tree.get(key)
+            if sub is WHOLE:
+                continue
+            res[key] = itm if sub is None else exclude_fields(itm, sub)
+        return res
+    if _is_sequence(val):
+        return [exclude_fields(itm, tree) for itm in val]
+    if _is_lazy(val):
+        return imap(lambda itm: exclude_fields(itm, tree), val)
+    return val
+
+
+def _flatten(tree, prefix=""):
+    res = []
+    for key, sub in tree.iteritems():
+        if sub is WHOLE:
+            res.append(prefix + key)
+        else:
+            res.extend(_flatten(sub, prefix + key + "__"))
+    return res
+
+
+def _subtree(tree, path):
+    """
+        Поддерево по пути. WHOLE - путь запрошен целиком, None - путь не упоминается.
+    """
+    node = tree
+    for name in path:
+        if node is WHOLE or node is None:
+            return node
+        node = node.get(name)
+    return node
+
+
+class Projection(object):
+    """
+        Запрошенная клиентом выборка полей ответа.
+            include - дерево fields или None (все поля)
+            exclude - дерево exclude или None
+    """
+
+    def __init__(self, include=None, exclude=None):
+        self.include = include
+        self.exclude = exclude
+
+    def apply(self, data, keep_keys=()):
+        """
+            Возвращает ответ data после выборки. Ключи верхнего уровня keep_keys
+            (служебные: статус, ошибка) сохраняются всегда.
+        """
+        res = data
+        if self.include is not None:
+            res = include_fields(res, self.include)
+            for key in keep_keys:
+                if key in data:
+                    res[key] = data[key]
+        if self.exclude is not None:
+            kept = dict((key, res[key]) for key in keep_keys if key in res)
+            res = exclude_fields(res, self.exclude)
+            res.update(kept)
+        return res
+
+    def is_requested(self, path):
+        """
+            Нужен ли клиенту путь "rows.author" (или ["rows", "author"]).
+        """
+        path = path.split(".") if isinstance(path, basestring) else path
+        if self.exclude is not None:
+            for no in range(1, len(path) + 1):
+                if _subtree(self.exclude, path[:no]) is WHOLE:
+                    return False
+        if self.include is None:
+            return True
+        node = self.include
+        for name in path:
+            if node is WHOLE:
+                return True
+            node = node.get(name)
+            if node is None:
+                return False
+        return True
+
+    def fields_for(self, path=None, available=None):
+        """
+            Имена полей для .only() / values() строк, выдаваемых по пути path
+            (например "rows"). Вложенные пути - через "__" (author__name).
+            available - все поля строки; нужен, что бы учесть exclude без fields.
+            Возвращает None, если ограничений нет.
+        """
+        path = (path.split(".") if isinstance(path, basestring) else path) if path else []
+
+        names = None
+        if self.include is not None:
+            node = _subtree(self.include, path)
+            if node is None:
+                return []
+            if node is not WHOLE:
+                names = _flatten(node)
+        if names is None and available is not None:
+            names = list(available)
+
+        if self.exclude is not None and names is not None:
+            node = _subtree(self.exclude, path)
+            if node is WHOLE:
+                return []
+            if node is not None:
+                excluded = set(_flatten(node))
+                names = [itm for itm in names
+                    if not any(itm == ex or itm.startswith(ex + "__") for ex in excluded)]
+        return names
+
+
+class FieldsParam(dj_rest_params.IncomingParamBase):
+    """
+        Список путей полей через "," (или JSON список). Значение - дерево путей.
+    """
+
+    def do_parse(self, in_value):
+        """
+            Собственно разбор. Возвращает разобранное значение.
+        """
+        try:
+            return parse_fields(in_value)
+        except (ValueError, AttributeError) as e:
+            raise dj_rest_params.EParseError(self.error_text(u"некорректный список полей"))
+
+    def value_schema(self):
+        return {"type": "string"}
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""
+    RESTful easy Django extension.
+    Состояние и результат фоновых задач (dj_jobs).
+"""
+
+from __future__ import unicode_literals
+
+from django.http import HttpResponse
+
+from .dj_rest import RESTView
+from . import dj_rest_params
+from . import dj_jobs
+
+
+class JobStatusView(RESTView):
+    """
+        Состояние фоновой задачи, поставленной RESTView или FilePostMixin с BACKGROUND_JOB.
+        Задачу видит только тот, кто ее поставил (тот же пользователь, сессия или IP).
+
+        Вход (GET):
+            job - идентификатор задачи из ответа на постановку.
+            download - если задан и задача сформировала файл - выдается сам файл.
+
+        Ответ:
+            job - {id, state, progress, message[, file]},
+                state - "queued" | "running" | "done" | "error".
+            result - ответ view, когда задача выполнена (state == "done").
+            result_status - HTTP статус, с которым был бы выдан ответ view.
+
+        Использование:
+            url(r'^jobs/$', JobStatusView.as_view())
+    """
+
+    http_method_names = ['get', ]
+
+    GET_PARAMS = [
+        dj_rest_params.UnicodeParam("job"),
+        dj_rest_params.UnicodeParam("download", required=False),
+    ]
+
+    NOT_FOUND_STATUS = (404, "Not Found")
+
+    def process_get(self, request, *args, **kwargs):
+        """
+        """
+        job = dj_jobs.find_job(self.cleaned_params.job)[1]
+        if job is None or job["owner"] != dj_jobs.get_owner_key(request):
+            self.set_answer_error(u"Задача не найдена.", do_raise=False)
+            return self.create_responce(True, data=self.get_answer(), status=self.NOT_FOUND_STATUS)
+
+        if job["state"] == dj_jobs.DONE and job["file"] is not None and self.cleaned_params.download:
+            return self.file_response(job["file"])
+
+        self.set_answer_key("job", dj_jobs.JobQueue.public_state(job))
+        if job["state"] == dj_jobs.DONE:
+            self.set_answer_key("result", job["answer"])
+            self.set_answer_key("result_status", job["status"])
+
+    def file_response(self, file_info):
+        """
+            Выдача файла, сформированного задачей.
+        """
+        response = HttpResponse(file_info["content"], content_type=file_info["content_type"])
+        response['Content-Disposition'] = 'attachment; filename="%s"' % (file_info["filename"],)
+        return response
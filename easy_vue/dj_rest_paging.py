@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+"""
+    RESTful easy Django extension.
+    Постраничная выдача списков по ключу (keyset / cursor pagination).
+
+    Вместо OFFSET/LIMIT следующая страница выбирается условием "после последней
+    строки предыдущей страницы" по полям сортировки, поэтому стоимость страницы
+    не зависит от ее номера (при наличии индекса по полям сортировки).
+"""
+
+from __future__ import unicode_literals
+
+import json
+from collections import namedtuple
+
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from . import dj_rest_params
+
+
+class PageCursor(namedtuple("PageCursor", ["direction", "values"])):
+    """
+        Разобранный курсор: direction - NEXT или PREV, values - значения полей
+        сортировки строки, от которой считается страница.
+    """
+    __slots__ = ()
+
+    NEXT = "n"
+    PREV = "p"
+
+
+class CursorSerializer(object):
+    """
+        Сериализатор для signing: JSON с датами, Decimal и UUID.
+    """
+
+    def dumps(self, obj):
+        return json.dumps(obj, cls=DjangoJSONEncoder, separators=(b",", b":")).encode("latin-1")
+
+    def loads(self, data):
+        return json.loads(data.decode("latin-1"))
+
+
+CURSOR_SALT = "easy_vue.dj_rest_paging"
+
+
+def encode_cursor(cursor):
+    """
+        Возвращает непрозрачную подписанную строку курсора.
+    """
+    return signing.dumps([cursor.direction, list(cursor.values)],
+        salt=CURSOR_SALT, serializer=CursorSerializer)
+
+
+def decode_cursor(text):
+    """
+        Разбирает строку курсора. При ошибке вызывает ValueError.
+    """
+    try:
+        direction, values = signing.loads(text, salt=CURSOR_SALT, serializer=CursorSerializer)
+    except (signing.BadSignature, TypeError, ValueError) as e:
+        raise ValueError("bad cursor")
+    if direction not in (PageCursor.NEXT, PageCursor.PREV) or not isinstance(values, list):
+        raise ValueError("bad cursor")
+    return PageCursor(direction, values)
+
+
+class CursorParam(dj_rest_params.IncomingParamBase):
+    """
+        Курсор страницы, выданный KeysetPaginationMixin. Значение - PageCursor.
+    """
+
+    def do_parse(self, in_value):
+        """
+            Собственно разбор. Возвращает разобранное значение.
+        """
+        try:
+            return decode_cursor(in_value)
+        except ValueError as e:
+            raise dj_rest_params.EParseError(self.error_text(u"некорректный курсор"))
+
+    def value_schema(self):
+        return {"type": "string"}
+
+
+def parse_ordering(ordering):
+    """
+        ("-created", "name") -> [("created", True), ("name", False)]
+        Если среди полей нет pk - он добавляется последним, для однозначности.
+    """
+    res = []
+    for itm in ordering:
+        if itm.startswith("-"):
+            res.append((itm[1:], True))
+        else:
+            res.append((itm, False))
+    if not any(field == "pk" for field, desc in res):
+        res.append(("pk", res[-1][1] if res else False))
+    return res
+
+
+def get_row_value(row, field):
+    """
+        Значение поля сортировки из строки: объекта модели или словаря (values()).
+    """
+    if isinstance(row, dict):
+        return row[field]
+    for name in field.split("__"):
+        row = getattr(row, name)
+    return row
+
+
+def keyset_filter(ordering, values, forward):
+    """
+        Q условие "строго после values" (forward) или "строго до values"
+        при сортировке ordering = [(поле, по убыванию), ...].
+        (a > x) | (a = x & b > y) | (a = x & b = y & c > z) ...
+    """
+    res = None
+    for no, (field, desc) in enumerate(ordering):
+        op = "gt" if desc != forward else "lt"
+        cond = Q(**{"{}__{}".format(field, op): values[no]})
+        for prev_no in range(no):
+            cond &= Q(**{ordering[prev_no][0]: values[prev_no]})
+        res = cond if res is None else res | cond
+    return res
+
+
+class KeysetPaginationMixin(object):
+    """
+        Примесь к RESTView для постраничной выдачи по курсору.
+
+        Атрибуты класса для настройки:
+            PAGE_ORDERING - поля сортировки, как для order_by. Поля должны быть NOT NULL,
+                pk добавляется в конец автоматически. Желателен индекс по этим полям.
+            PAGE_SIZE - размер страницы по умолчанию.
+            PAGE_MAX_SIZE - максимальный размер страницы, который может запросить клиент.
+            PAGE_CURSOR_PARAM, PAGE_SIZE_PARAM - имена входящих параметров.
+            PAGE_NEXT_KEY, PAGE_PREV_KEY - ключи ответа с курсорами следующей и
+                предыдущей страниц (None - страницы нет).
+            PAGE_METHODS - методы, для которых добавляются параметры страницы.
+
+        Параметры страницы добавляются к <METHOD>_PARAMS автоматически.
+
+        Использование:
+            class ItemsView(KeysetPaginationMixin, RESTView):
+                PAGE_ORDERING = ("-created", )
+
+                def process_get(self, request, *args, **kwargs):
+                    rows = self.paginate(Item.objects.filter(owner=request.user).values("pk", "created", "name"))
+                    self.set_answer_key("rows", rows)
+
+            Для values() в строках должны быть все поля PAGE_ORDERING и "pk".
+    """
+
+    PAGE_ORDERING = ("pk", )
+    PAGE_SIZE = 50
+    PAGE_MAX_SIZE = 500
+    PAGE_CURSOR_PARAM = "cursor"
+    PAGE_SIZE_PARAM = "page_size"
+    PAGE_NEXT_KEY = "next"
+    PAGE_PREV_KEY = "prev"
+    PAGE_METHODS = ("GET", "HEAD", )
+
+    @classmethod
+    def compile_dispatch_plan(cls, initkwargs):
+        """
+            Добавляет параметры страницы в план методов PAGE_METHODS.
+        """
+        plan = super(KeysetPaginationMixin, cls).compile_dispatch_plan(initkwargs)
+        page_params = cls.get_page_params()
+        for method in cls.PAGE_METHODS:
+            itm = plan.get(method)
+            if itm is not None:
+                plan[method] = itm._replace(params=itm.params + page_params)
+        return plan
+
+    @classmethod
+    def get_page_params(cls):
+        """
+            Описания входящих параметров страницы.
+        """
+        return (
+            CursorParam(cls.PAGE_CURSOR_PARAM, to_attribute="page_cursor", required=False),
+            dj_rest_params.IntParam(cls.PAGE_SIZE_PARAM, to_attribute="page_size",
+                required=False, min_val=1, max_val=cls.PAGE_MAX_SIZE),
+        )
+
+    def get_projection_keep_keys(self):
+        """
+            Курсоры страниц не удаляются выборкой полей (FIELD_PROJECTION).
+        """
+        return super(KeysetPaginationMixin, self).get_projection_keep_keys() + (
+            self.PAGE_NEXT_KEY, self.PAGE_PREV_KEY)
+
+    def get_page_ordering(self):
+        return parse_ordering(self.PAGE_ORDERING)
+
+    def get_page_size(self):
+        size = self.cleaned_params.get("page_size")
+        return size if size else self.PAGE_SIZE
+
+    def paginate(self, queryset):
+        """
+            Выбирает из queryset одну страницу по курсору из запроса.
+            Возвращает список строк, курсоры соседних страниц выставляет в ответ.
+        """
+        ordering = self.get_page_ordering()
+        size = self.get_page_size()
+        cursor = self.cleaned_params.get("page_cursor")
+        if cursor is not None and len(cursor.values) != len(ordering):
+            self.set_answer_error(u"'{}' некорректный курсор.".format(self.PAGE_CURSOR_PARAM))
+
+        order_by = ["-" + field if desc else field for field, desc in ordering]
+        backward = cursor is not None and cursor.direction == PageCursor.PREV
+        if backward:
+            order_by = [itm[1:] if itm.startswith("-") else "-" + itm for itm in order_by]
+
+        if cursor is not None:
+            queryset = queryset.filter(keyset_filter(ordering, cursor.values, not backward))
+        rows = list(queryset.order_by(*order_by)[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if backward:
+            rows.reverse()
+
+        next_cursor = prev_cursor = None
+        if rows:
+            if has_more or backward:
+                next_cursor = self.make_cursor(PageCursor.NEXT, rows[-1], ordering)
+            if (has_more and backward) or (cursor is not None and not backward):
+                prev_cursor = self.make_cursor(PageCursor.PREV, rows[0], ordering)
+
+        self.set_answer_key(self.PAGE_NEXT_KEY, next_cursor)
+        self.set_answer_key(self.PAGE_PREV_KEY, prev_cursor)
+        return rows
+
+    def make_cursor(self, direction, row, ordering):
+        """
+            Курсор (строка) от строки row в направлении direction.
+        """
+        return encode_cursor(PageCursor(direction,
+            [get_row_value(row, field) for field, desc in ordering]))
@@ -7,9 +7,24 @@
 
 from __future__ import unicode_literals
 
+import re
 import json
+import math
+import array
+import bisect
+import itertools
+from collections import namedtuple, OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from django.apps import apps as django_apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+from . import dj_model_cache
 
 
 class EUncorrectDefenition(Exception):
@@ -38,6 +53,16 @@ class EParamNotFound(EParseError):
     """
 
 
+def _is_overridden(obj, name, base_class=None):
+    """
+        True, если метод name переопределен в классе obj относительно base_class
+        (по умолчанию IncomingParamBase).
+    """
+    func = getattr(type(obj), name)
+    base = getattr(base_class or IncomingParamBase, name)
+    return getattr(func, "__func__", func) is not getattr(base, "__func__", base)
+
+
 class IncomingParamBase(object):
     """
         При создании экземпляра класса описывается имя входящего параметра из request
@@ -89,23 +114,87 @@ class IncomingParamBase(object):
                 return
 
         if self.do_multy:
-            vv=[]
-            for itm in request_dict.getlist(self.param_id):
-                vv.append(self._parse_itm(itm))
+            vv = [self._parse_itm(itm) for itm in request_dict.getlist(self.param_id)]
         else:
             vv = self._parse_itm(request_dict[self.param_id])
-            try:
-                vv = self.do_parse(request_dict[self.param_id])
-            except EParseError as e:
-                raise e
-            except Exception as e:
-                raise EParseError(self.error_text(str(e)))
 
         if result is not None:
             result[self.to_attribute] = vv
 
         return vv
 
+    def compile(self):
+        """
+            Возвращает функцию parse(request_dict, result) - разбор параметра с тем же
+            результатом, что и метод parse, но с ветками, выбранными заранее
+            (обязательность, do_multy, наличие do_check). Значение разбирается один раз.
+            Ошибки - EParseError, как в parse.
+        """
+        if _is_overridden(self, "parse"):
+            parse = self.parse
+            return lambda request_dict, result: parse(request_dict, result)
+
+        param_id = self.param_id
+        to_attribute = self.to_attribute
+        parse_itm = self.compile_itm()
+        not_found = self.error_text(u"не найден") if self.required else None
+
+        if self.do_multy:
+            def parse(request_dict, result):
+                if param_id in request_dict:
+                    result[to_attribute] = [parse_itm(itm) for itm in request_dict.getlist(param_id)]
+                elif not_found is not None:
+                    raise EParamNotFound(not_found)
+                else:
+                    result[to_attribute] = []
+        else:
+            def parse(request_dict, result):
+                if param_id in request_dict:
+                    result[to_attribute] = parse_itm(request_dict[param_id])
+                elif not_found is not None:
+                    raise EParamNotFound(not_found)
+                else:
+                    result[to_attribute] = None
+        return parse
+
+    def compile_itm(self):
+        """
+            Функция разбора одного значения, равносильная _parse_itm.
+        """
+        if _is_overridden(self, "_parse_itm"):
+            return self._parse_itm
+
+        do_parse = self.compile_do_parse()
+        do_check = self.do_check if _is_overridden(self, "do_check") else None
+        error_text = self.error_text
+
+        def parse_itm(in_value):
+            try:
+                vv = do_parse(in_value)
+            except EParseError:
+                raise
+            except Exception as e:
+                raise EParseError(error_text(str(e)))
+            if do_check is not None:
+                err = do_check(vv)
+                if err:
+                    raise EParseError(error_text(err))
+            return vv
+        return parse_itm
+
+    def compile_do_parse(self):
+        """
+            Функция, равносильная do_parse. Потомки могут вернуть более быструю.
+        """
+        return self.do_parse
+
+    def resolves_in_bulk(self):
+        """
+            True, если compile() записывает в результат ModelRef, которые
+            compile_params потом загружает общими запросами.
+        """
+        return False
+
     def do_parse(self, in_value):
         """
             Собственно разбор. Возвращает разобранное значение.
@@ -134,7 +223,7 @@ class IncomingParamBase(object):
 
         err = self.do_check(vv)
         if err:
-            raise EParseError(self.error_text(str(e)))
+            raise EParseError(self.error_text(err))
 
         return vv
 
@@ -143,6 +232,31 @@ class IncomingParamBase(object):
         """
         return u"'{}' {}.".format(self.param_label, err_msg)
 
+    def item_error(self, index, err_msg):
+        """
+            Ошибка в элементе списка index (с 0), номер - в detail["index"].
+        """
+        return EParseError(self.error_text(u"элемент {}: {}".format(index, err_msg)),
+            detail=dict(index=index))
+
+    def value_schema(self):
+        """
+            JSON Schema одного значения (в варианте OpenAPI 3.0 / draft-04).
+            Переопределяется в потомках.
+        """
+        return {}
+
+    def json_schema(self):
+        """
+            JSON Schema параметра для dj_schema: значение, с do_multy - массив.
+        """
+        res = self.value_schema()
+        if self.do_multy:
+            res = {"type": "array", "items": res}
+        if self.param_label != self.param_id:
+            res = dict(res, description="{}".format(self.param_label))
+        return res
+
 
 class CommaListParam(IncomingParamBase):
     """
@@ -164,6 +278,7 @@ class CommaListParam(IncomingParamBase):
         self.param_id = self.param_object.param_id 
         self.to_attribute = self.param_object.to_attribute
         self.param_label = self.param_object.param_label
+        self.required = self.param_object.required
 
         self.do_multy = False
 
@@ -172,7 +287,10 @@ class CommaListParam(IncomingParamBase):
             Собственно разбор. Возвращает разобранное значение.
             Определяется в потомках
         """
-        lst = in_value.split(self.separator)
+        if isinstance(in_value, list):
+            lst = in_value  # уже список из JSON тела запроса
+        else:
+            lst = in_value.split(self.separator)
         res=[]
         for itm in lst:
             vv = self.param_object.parse({self.param_id: itm}, None)
@@ -180,6 +298,56 @@ class CommaListParam(IncomingParamBase):
 
         return res
 
+    def resolves_in_bulk(self):
+        return self.param_object.resolves_in_bulk()
+
+    def value_schema(self):
+        return {"type": "array", "items": self.param_object.value_schema()}
+
+    def compile(self):
+        """
+            Список ID модели (param_object - ModelParam) загружается одним запросом.
+        """
+        if not self.resolves_in_bulk():
+            return super(CommaListParam, self).compile()
+
+        model_param = self.param_object
+        param_id = self.param_id
+        to_attribute = self.to_attribute
+        separator = self.separator
+        clean_key = model_param.compile_key()
+        not_found = self.error_text(u"не найден") if self.required else None
+
+        def parse(request_dict, result):
+            if param_id in request_dict:
+                in_value = request_dict[param_id]
+                if not isinstance(in_value, list):
+                    try:
+                        in_value = in_value.split(separator)
+                    except Exception as e:
+                        raise EParseError(model_param.error_text(str(e)))
+                result[to_attribute] = ModelRef(model_param, [clean_key(itm) for itm in in_value], True)
+            elif not_found is not None:
+                raise EParamNotFound(not_found)
+            else:
+                result[to_attribute] = None
+        return parse
+
+    def compile_do_parse(self):
+        """
+            Элементы разбираются скомпилированной функцией param_object.
+        """
+        parse_elem = self.param_object.compile_itm()
+        separator = self.separator
+
+        def do_parse(in_value):
+            if isinstance(in_value, list):
+                lst = in_value
+            else:
+                lst = in_value.split(separator)
+            return [parse_elem(itm) for itm in lst]
+        return do_parse
+
 
 #====
 
@@ -194,6 +362,9 @@ class UnicodeParam(IncomingParamBase):
         """
         return unicode(in_value)
 
+    def value_schema(self):
+        return {"type": "string"}
+
 
 class IntParam(IncomingParamBase):
     """
@@ -242,6 +413,24 @@ class IntParam(IncomingParamBase):
         if self.max_val is not None and value > self.max_val:
             return u"Значение меньше максимального"
 
+    def value_schema(self):
+        # для целых граница "исключая" - та же граница "включая", сдвинутая на 1
+        lower = [self.min_val]
+        if self.ex_min_val is not None:
+            lower.append(self.ex_min_val + 1)
+        upper = [self.max_val]
+        if self.ex_max_val is not None:
+            upper.append(self.ex_max_val - 1)
+        lower = [itm for itm in lower if itm is not None]
+        upper = [itm for itm in upper if itm is not None]
+
+        res = {"type": "integer"}
+        if lower:
+            res["minimum"] = max(lower)
+        if upper:
+            res["maximum"] = min(upper)
+        return res
+
 
 class IdParam(IncomingParamBase):
     """
@@ -263,6 +452,312 @@ class IdParam(IncomingParamBase):
 
         return res
 
+    def value_schema(self):
+        return {"type": "integer", "minimum": 1}
+
+
+class NumberListParam(IncomingParamBase):
+    """
+        Большой список чисел через separator (точки карт, ряды графиков).
+        В отличие от CommaListParam(IntParam(...)) строка разбирается и проверяется
+        на диапазон целиком, без разбора каждого элемента отдельным параметром.
+
+        Результат - array.array (typecode "l" - целые, "d" - дробные), с use_numpy=True -
+        numpy.ndarray с тем же типом элементов. Оба кодируются в ответ
+        zjson / zmsgpack как список.
+        Ошибка содержит номер (с 0) первого некорректного элемента, он же в detail["index"].
+        Для kind="int" дробные и логические значения из JSON тела - ошибка, а не
+        отбрасывание дробной части.
+
+        Доп атрибуты:
+            kind - "int" | "float".
+            min_val, max_val -- диапазон включая границы.
+            max_count -- не больше элементов.
+            typecode -- тип элементов array.array, например "i" - экономнее по памяти.
+            use_numpy -- True - результат numpy.ndarray (numpy обязателен),
+                по умолчанию - array.array при любом окружении.
+            separator
+    """
+
+    KINDS = {"int": (int, "l"), "float": (float, "d")}
+
+    def __init__(self, *args, **kwargs):
+        super(NumberListParam, self).__init__(*args, **kwargs)
+        self.do_multy = False
+
+        self.kind = kwargs.get("kind", "int")
+        if self.kind not in self.KINDS:
+            raise EUncorrectDefenition(u"Некорректный kind '{}'".format(self.kind))
+        self.convert, typecode = self.KINDS[self.kind]
+        self.typecode = str(kwargs.get("typecode") or typecode)
+        self.min_val = kwargs.get("min_val")
+        self.max_val = kwargs.get("max_val")
+        self.max_count = kwargs.get("max_count")
+        self.separator = kwargs.get("separator", ",")
+
+        self.use_numpy = bool(kwargs.get("use_numpy", False))
+        if self.use_numpy and numpy is None:
+            raise EUncorrectDefenition(u"numpy не установлен")
+
+    def first_bad_index(self, items):
+        """
+            Номер первого элемента, который не преобразуется в число typecode.
+        """
+        values = array.array(self.typecode)
+        for index, itm in enumerate(items):
+            try:
+                values.append(self.convert(itm))
+            except Exception as e:
+                return index
+        return None
+
+    def do_parse(self, in_value):
+        """
+            Собственно разбор. Возвращает разобранное значение.
+            Определяется в потомках
+        """
+        if isinstance(in_value, list):
+            items = in_value  # уже список из JSON тела запроса
+            if self.kind == "int":
+                for index, itm in enumerate(items):
+                    if isinstance(itm, (bool, float)):
+                        raise self.item_error(index, u"некорректный формат")
+        else:
+            items = in_value.split(self.separator)
+        if self.max_count is not None and len(items) > self.max_count:
+            raise EParseError(self.error_text(u"больше {} значений".format(self.max_count)))
+
+        try:
+            values = array.array(self.typecode, map(self.convert, items))
+        except Exception as e:
+            index = self.first_bad_index(items)
+            if index is None:
+                raise EParseError(self.error_text(u"некорректный формат"))
+            raise self.item_error(index, u"некорректный формат")
+
+        if values:
+            self.check_values(values)
+
+        if self.use_numpy:
+            return numpy.frombuffer(values, dtype=numpy.dtype(self.typecode))
+        return values
+
+    def value_schema(self):
+        items = {"type": "integer" if self.kind == "int" else "number"}
+        if self.min_val is not None:
+            items["minimum"] = self.min_val
+        if self.max_val is not None:
+            items["maximum"] = self.max_val
+        res = {"type": "array", "items": items}
+        if self.max_count is not None:
+            res["maxItems"] = self.max_count
+        return res
+
+    def check_values(self, values):
+        """
+            Проверка всех значений: min / max (и сумма для дробных) считаются
+            без цикла в Python, по элементам - только если есть ошибка.
+        """
+        if self.kind == "float":
+            total = sum(values)
+            if math.isnan(total) or math.isinf(total):
+                for index, itm in enumerate(values):
+                    if math.isnan(itm) or math.isinf(itm):
+                        raise self.item_error(index, u"некорректное значение")
+
+        if self.min_val is not None and min(values) < self.min_val:
+            min_val = self.min_val
+            index = next(index for index, itm in enumerate(values) if itm < min_val)
+            raise self.item_error(index, u"Значение больше минимального")
+        if self.max_val is not None and max(values) > self.max_val:
+            max_val = self.max_val
+            index = next(index for index, itm in enumerate(values) if itm > max_val)
+            raise self.item_error(index, u"Значение меньше максимального")
+
+
+class IdRangeSet(object):
+    """
+        Множество целых ID, хранимое как отсортированные непересекающиеся
+        диапазоны [start, end] (включая границы). Значения не разворачиваются:
+        проверка "id in ids" - двоичный поиск по диапазонам, перебор - ленивый.
+
+        IdRangeSet([(1, 500), (730, 730), (900, 1200)])
+        IdRangeSet.from_ids([5, 1, 2, 3])  -> "1-3,5"
+        ids.count() - число ID (long). len() не определен: в Python 2 он ограничен
+            sys.maxsize, а открытый диапазон "5-" содержит почти 2 ** 63 ID.
+        ids.filter(queryset, field="pk") / ids.as_q(field) - условие
+            field__range для длинных диапазонов и field__in для остальных ID.
+    """
+
+    # диапазоны короче - в field__in
+    MIN_SQL_RANGE = 4
+
+    def __init__(self, ranges=()):
+        self.starts = array.array(str("l"))
+        self.ends = array.array(str("l"))
+        for start, end in sorted(ranges):
+            if self.ends and start <= self.ends[-1] + 1:
+                # пересекается или примыкает к предыдущему
+                if end > self.ends[-1]:
+                    self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+        self._count = sum((long(end) - start + 1 for start, end in zip(self.starts, self.ends)), long(0))
+
+    @classmethod
+    def from_ids(cls, ids):
+        return cls((itm, itm) for itm in ids)
+
+    def __contains__(self, value):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return False
+        index = bisect.bisect_right(self.starts, value) - 1
+        return index >= 0 and value <= self.ends[index]
+
+    def count(self):
+        """
+            Число ID (long).
+        """
+        return self._count
+
+    def __nonzero__(self):
+        return bool(self.starts)
+
+    __bool__ = __nonzero__
+
+    def __iter__(self):
+        for start, end in zip(self.starts, self.ends):
+            for value in itertools.islice(itertools.count(start), end - start + 1):
+                yield value
+
+    def __eq__(self, other):
+        return isinstance(other, IdRangeSet) and self.starts == other.starts and self.ends == other.ends
+
+    def __ne__(self, other):
+        return not self == other
+
+    def ranges(self):
+        """
+            Список (start, end).
+        """
+        return list(zip(self.starts, self.ends))
+
+    def encode(self):
+        """
+            Компактная запись "1-500,730,900-1200" (как z_id_ranges.encode в z_utils.js).
+        """
+        return ",".join("{}".format(start) if start == end else "{}-{}".format(start, end)
+            for start, end in zip(self.starts, self.ends))
+
+    def __unicode__(self):
+        return self.encode()
+
+    def __str__(self):
+        return self.encode().encode("utf-8")
+
+    def __repr__(self):
+        return str("IdRangeSet('{}')").format(self)
+
+    def as_q(self, field="pk"):
+        """
+            Условие для filter: OR из field__range по длинным диапазонам
+            и одного field__in по остальным ID.
+        """
+        res = None
+        singles = []
+        for start, end in zip(self.starts, self.ends):
+            if end - start + 1 < self.MIN_SQL_RANGE:
+                singles.extend(range(start, end + 1))
+                continue
+            cond = Q(**{field + "__range": (start, end)})
+            res = cond if res is None else res | cond
+        if singles or res is None:
+            cond = Q(**{field + "__in": singles})
+            res = cond if res is None else res | cond
+        return res
+
+    def filter(self, queryset, field="pk"):
+        return queryset.filter(self.as_q(field))
+
+
+class IdRangeParam(IncomingParamBase):
+    """
+        Список ID в сжатом виде: диапазоны и отдельные ID через separator,
+        например "1-500,730,900-1200" (на клиенте - z_id_ranges.encode из z_utils.js).
+        Открытый диапазон "5-" - от 5 до MAX_ID.
+        Из JSON тела можно передать и список: [1, "5-10", 20].
+        Значение - IdRangeSet (ID не разворачиваются в список).
+
+        Доп атрибуты:
+            max_count -- не больше ID всего.
+            max_ranges -- не больше элементов в записи.
+            separator
+        Ошибка содержит номер (с 0) первого некорректного элемента, он же в detail["index"].
+    """
+
+    # наибольший ID - bigint
+    MAX_ID = 2 ** 63 - 1
+
+    def __init__(self, *args, **kwargs):
+        super(IdRangeParam, self).__init__(*args, **kwargs)
+        self.do_multy = False
+
+        self.max_count = kwargs.get("max_count")
+        self.max_ranges = kwargs.get("max_ranges")
+        self.separator = kwargs.get("separator", ",")
+
+    def value_schema(self):
+        item = r"\d+(-\d*)?"
+        return {"type": "string",
+            "pattern": r"^{0}({1}{0})*$".format(item, re.escape(self.separator))}
+
+    def parse_range(self, itm):
+        """
+            Элемент записи -> (start, end). ValueError, если некорректный.
+        """
+        if isinstance(itm, (int, long)) and not isinstance(itm, bool):
+            return (itm, itm)
+        if not isinstance(itm, (str, unicode)):
+            raise ValueError()
+        start, sep, end = itm.partition("-")
+        if not sep:
+            start = end = int(start)
+            return (start, end)
+        return (int(start), int(end) if end else self.MAX_ID)
+
+    def do_parse(self, in_value):
+        """
+            Собственно разбор. Возвращает разобранное значение.
+            Определяется в потомках
+        """
+        if isinstance(in_value, list):
+            items = in_value  # уже список из JSON тела запроса
+        else:
+            items = in_value.split(self.separator)
+        if self.max_ranges is not None and len(items) > self.max_ranges:
+            raise EParseError(self.error_text(u"больше {} элементов".format(self.max_ranges)))
+
+        ranges = []
+        for index, itm in enumerate(items):
+            try:
+                start, end = self.parse_range(itm)
+            except ValueError as e:
+                raise self.item_error(index, u"некорректный формат")
+            if not 0 < start <= end <= self.MAX_ID:
+                raise self.item_error(index, u"некорректное значение")
+            ranges.append((start, end))
+
+        res = IdRangeSet(ranges)
+        if self.max_count is not None and res.count() > self.max_count:
+            raise EParseError(self.error_text(u"больше {} ID".format(self.max_count)))
+        return res
+
+
+ModelRef = namedtuple("ModelRef", ["param", "keys", "multy"])
+
 
 class ModelParam(IncomingParamBase):
     """
@@ -272,8 +767,26 @@ class ModelParam(IncomingParamBase):
         Класс модели указывается при инициализации в атрибуте model.
             model  может быть и класс, и название класса в виде "application.model"
             Так же можно указать другое имя поля для поиска в атрибуте field 
+
+        Загрузка объектов:
+            select_related - список связей для select_related или True - все связи.
+            only - список загружаемых полей (поле поиска добавляется само).
+            cache - ModelCache (dj_model_cache) или True - общий кеш по умолчанию:
+                объекты берутся из кеша в процессе, без запроса к БД. Только если
+                field - pk или уникальное поле модели.
+
+        В RESTView (compile_params) значения do_multy и CommaListParam(ModelParam(...)),
+        а также все ModelParam одной модели и поля в запросе, загружаются одним
+        запросом filter(<field>__in=...), в порядке ID запроса. Если каких-то объектов
+        нет - ошибка со списком ненайденных ID.
+        Это работает, если field - pk или уникальное поле модели, иначе - запрос на каждый ID.
     """
 
+    # больше ID в одном запросе (ограничение числа параметров SQLite - 999)
+    BULK_CHUNK_SIZE = 900
+    # сколько ненайденных ID перечислять в тексте ошибки
+    MAX_REPORTED_MISSING = 50
+
     def __init__(self, *args, **kwargs):
         super(ModelParam, self).__init__(*args, **kwargs)
 
@@ -292,23 +805,192 @@ class ModelParam(IncomingParamBase):
 
         self.model = model
 
+        select_related = kwargs.get("select_related")
+        if select_related and select_related is not True:
+            select_related = tuple(sorted(select_related))
+        self.select_related = select_related or None
+        self.only = tuple(sorted(kwargs["only"])) if kwargs.get("only") else None
+        self.cache = kwargs.get("cache")
+
     def do_parse(self, in_value):
         """
             Собственно разбор. Возвращает разобранное значение.
             Определяется в потомках
         """
+        if self.get_cache() is not None:
+            key = self.compile_key()(in_value)
+            obj = self.load_objects([key]).get(key)
+            if obj is None:
+                raise EParseError(self.error_text(u"Объект не найден"))
+            return obj
 
         try:
-            return self.model.objects.get(**{self.pk: in_value})
+            return self.get_queryset().get(**{self.pk: in_value})
         except self.model.DoesNotExist as e:
             raise EParseError(self.error_text(u"Объект не найден"))
         except Exception as e:
             raise EParseError(self.error_text(u"Некорректный ID объекта"))
 
+    def get_key_field(self):
+        """
+            Поле модели, по которому ищутся объекты, или None, если field - не
+            уникальное поле модели (например, lookup через "__").
+        """
+        opts = self.model._meta
+        if self.pk == "pk":
+            return opts.pk
+        try:
+            field = opts.get_field(self.pk)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many or not (field.unique or field.primary_key):
+            return None
+        return field
+
+    def resolves_in_bulk(self):
+        """
+            Загрузка общим запросом возможна, если поиск - по уникальному полю и
+            разбор не переопределен в потомке: иначе проверки потомка (do_check и т.п.)
+            не выполнялись бы.
+        """
+        if self.get_key_field() is None:
+            return False
+        if any(_is_overridden(self, name) for name in ("parse", "_parse_itm", "do_check")):
+            return False
+        return not _is_overridden(self, "do_parse", ModelParam)
+
+    def value_schema(self):
+        field = self.get_key_field()
+        # pk - связь (наследование моделей) - тип ключа связанной модели
+        while field is not None and field.is_relation:
+            field = field.related_model._meta.pk
+        if field is not None and field.get_internal_type().endswith(("IntegerField", "AutoField")):
+            return {"type": "integer"}
+        return {"type": "string"}
+
+    def lookup_key(self):
+        """
+            Параметры с одинаковым ключом загружаются одним запросом.
+            Ключ включает проекцию: объекты с разными select_related / only - разные.
+        """
+        return (self.model, self.get_key_field().name, self.select_related, self.only)
+
+    def get_queryset(self):
+        qs = self.model._default_manager.all()
+        if self.select_related is True:
+            qs = qs.select_related()
+        elif self.select_related:
+            qs = qs.select_related(*self.select_related)
+        if self.only:
+            fields = list(self.only)
+            field = self.get_key_field()
+            if field is not None and field.name not in fields:
+                fields.append(field.name)
+            qs = qs.only(*fields)
+        return qs
+
+    def get_cache(self):
+        """
+            ModelCache параметра или None.
+        """
+        if not self.cache or self.get_key_field() is None:
+            return None
+        if self.cache is True:
+            return dj_model_cache.get_default_model_cache()
+        return self.cache
+
+    def compile_key(self):
+        """
+            Функция: входное значение -> значение поля (как в БД) для поиска.
+        """
+        to_python = self.get_key_field().to_python
+        bad_id = self.error_text(u"Некорректный ID объекта")
+
+        def clean_key(in_value):
+            try:
+                key = to_python(in_value)
+            except Exception as e:
+                raise EParseError(bad_id)
+            if key is None:
+                raise EParseError(bad_id)
+            return key
+        return clean_key
+
+    def compile(self):
+        """
+            Вместо объектов записывает ModelRef с ID, объекты загружает compile_params.
+        """
+        if not self.resolves_in_bulk():
+            return super(ModelParam, self).compile()
+
+        param_id = self.param_id
+        to_attribute = self.to_attribute
+        clean_key = self.compile_key()
+        not_found = self.error_text(u"не найден") if self.required else None
+
+        if self.do_multy:
+            def parse(request_dict, result):
+                if param_id in request_dict:
+                    result[to_attribute] = ModelRef(self,
+                        [clean_key(itm) for itm in request_dict.getlist(param_id)], True)
+                elif not_found is not None:
+                    raise EParamNotFound(not_found)
+                else:
+                    result[to_attribute] = []
+        else:
+            def parse(request_dict, result):
+                if param_id in request_dict:
+                    result[to_attribute] = ModelRef(self, [clean_key(request_dict[param_id])], False)
+                elif not_found is not None:
+                    raise EParamNotFound(not_found)
+                else:
+                    result[to_attribute] = None
+        return parse
+
+    def load_objects(self, keys):
+        """
+            Загружает объекты по списку ID, с cache - сначала из кеша.
+            Возвращает {ID: объект}.
+        """
+        field = self.get_key_field()
+        keys = list(keys)
+        cache = self.get_cache()
+        if cache is not None:
+            cached, generation = cache.get_many(self.lookup_key(), keys)
+            keys = [key for key in keys if key not in cached]
+        res = {}
+        for start in range(0, len(keys), self.BULK_CHUNK_SIZE):
+            chunk = keys[start:start + self.BULK_CHUNK_SIZE]
+            for obj in self.get_queryset().filter(**{field.name + "__in": chunk}):
+                res[getattr(obj, field.attname)] = obj
+        if cache is not None:
+            cache.set_many(self.lookup_key(), res, generation)
+            res.update(cached)
+        return res
+
+    def resolve_ref(self, ref, objects):
+        """
+            Значение параметра из загруженных объектов. Если каких-то нет - EParseError
+            с их списком в detail["missing"].
+        """
+        missing = [key for key in ref.keys if key not in objects]
+        if missing:
+            if not ref.multy:
+                raise EParseError(self.error_text(u"Объект не найден"), detail=dict(missing=missing))
+            listed = u", ".join("{}".format(key) for key in missing[:self.MAX_REPORTED_MISSING])
+            if len(missing) > self.MAX_REPORTED_MISSING:
+                listed += u", ..."
+            raise EParseError(self.error_text(u"Объекты не найдены ({}): {}".format(len(missing), listed)),
+                detail=dict(missing=missing))
+        if ref.multy:
+            return [objects[key] for key in ref.keys]
+        return objects[ref.keys[0]]
+
 
 class JSONParam(IncomingParamBase):
     """
-        Целое, больше 0
+        Значение в виде JSON строки.
+        Если запрос пришел JSON телом - значение уже разобрано и используется как есть.
     """
 
     def do_parse(self, in_value):
@@ -316,6 +998,8 @@ class JSONParam(IncomingParamBase):
             Собственно разбор. Возвращает разобранное значение.
             Определяется в потомках
         """
+        if not isinstance(in_value, (str, unicode)):
+            return in_value
         try:
             res = json.loads(in_value)
         except Exception as e:
@@ -324,3 +1008,76 @@ class JSONParam(IncomingParamBase):
         return res
 
 
+def compile_params(params):
+    """
+        Компилирует список параметров в одну функцию 
+            validate(request_dict, result, stop_on_error=True) -> список текстов ошибок.
+        Разобранные значения записываются в result[to_attribute]. Если stop_on_error - 
+        разбор прекращается на первой ошибке. Возвращает None для пустого списка.
+    """
+    parsers = tuple(itm.compile() for itm in params)
+    if not parsers:
+        return None
+    bulk_attributes = tuple(itm.to_attribute for itm in params if itm.resolves_in_bulk())
+
+    def validate(request_dict, result, stop_on_error=True):
+        errors = []
+        for parse in parsers:
+            try:
+                parse(request_dict, result)
+                continue
+            except EParseError as e:
+                errors.append(e.u_msg)
+            except Exception as e:
+                errors.append(str(e))
+            if stop_on_error:
+                break
+        if bulk_attributes:
+            if errors and stop_on_error:
+                drop_model_refs(result, bulk_attributes)
+            else:
+                errors.extend(resolve_model_refs(result, bulk_attributes, stop_on_error))
+        return errors
+    return validate
+
+
+def drop_model_refs(result, attributes):
+    """
+        Удаляет из result не загруженные ModelRef: разбор прерван ошибкой.
+    """
+    for attr in attributes:
+        if isinstance(result.get(attr), ModelRef):
+            del result[attr]
+
+
+def resolve_model_refs(result, attributes, stop_on_error=True):
+    """
+        Заменяет ModelRef в result[attributes] объектами моделей: ID всех параметров
+        с одинаковым lookup_key загружаются вместе. Возвращает список текстов ошибок.
+    """
+    refs = [(attr, result[attr]) for attr in attributes if isinstance(result.get(attr), ModelRef)]
+    if not refs:
+        return []
+
+    groups = OrderedDict()
+    for attr, ref in refs:
+        group = groups.get(ref.param.lookup_key())
+        if group is None:
+            group = groups[ref.param.lookup_key()] = (ref.param, OrderedDict())
+        for key in ref.keys:
+            group[1][key] = None
+
+    errors = []
+    try:
+        loaded = dict((lookup, param.load_objects(keys)) for lookup, (param, keys) in groups.items())
+    except Exception as e:
+        drop_model_refs(result, attributes)
+        return [refs[0][1].param.error_text(u"Некорректный ID объекта")]
+
+    for attr, ref in refs:
+        try:
+            result[attr] = ref.param.resolve_ref(ref, loaded[ref.param.lookup_key()])
+        except EParseError as e:
+            del result[attr]
+            errors.append(e.u_msg)
+    return errors[:1] if stop_on_error else errors
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+"""
+    RESTful easy Django extension.
+    Документ OpenAPI по параметрам RESTView (dj_schema).
+"""
+
+from __future__ import unicode_literals
+
+from .dj_rest import RESTView
+from . import dj_schema
+
+
+class OpenAPIView(RESTView):
+    """
+        Документ OpenAPI 3.0 по всем RESTView из URLconf: адреса, методы, параметры
+        и их JSON Schema. Строится один раз в процессе, выдается со строгим ETag,
+        повторный запрос с If-None-Match получает 304.
+
+        URLCONF - модуль URLconf, None - settings.ROOT_URLCONF.
+
+        Использование:
+            url(r'^api/schema/$', OpenAPIView.as_view())
+    """
+
+    http_method_names = ['get', 'head', ]
+
+    URLCONF = None
+    SCHEMA_HIDDEN = True
+
+    def process_get(self, request, *args, **kwargs):
+        """
+        """
+        return self.schema_response(request, dj_schema.get_openapi(self.URLCONF))
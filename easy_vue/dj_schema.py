@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Описание входных параметров RESTView: JSON Schema каждого view и документ
+    OpenAPI 3.0 по всем RESTView из URLconf.
+
+    Схемы строятся по спискам параметров плана обработки (COMMON_PARAMS + <METHOD>_PARAMS,
+    параметры выборки полей и страниц), тип значения - IncomingParamBase.json_schema().
+    Для view с PARAMS_FORM_CLASS параметры не описываются.
+
+    Схемы вычисляются один раз в процессе и хранятся вместе с готовым JSON и строгим
+    ETag (SchemaEntry), так что выдача - без повторного построения и кодирования.
+    Кеш сбрасывается clear_cache() и при изменении настроек ROOT_URLCONF, VUE_SCHEMA_*.
+
+    Выдача:
+        OPTIONS к любому RESTView - схема его параметров (RESTView.SCHEMA_OPTIONS).
+        dj_rest_schema.OpenAPIView - документ OpenAPI.
+
+    Настройки:
+        VUE_SCHEMA_TITLE (= "API"), VUE_SCHEMA_VERSION (= "1.0") - раздел info документа.
+"""
+
+import re
+import json
+import hashlib
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.core.urlresolvers import get_resolver
+from django.utils.regex_helper import normalize
+from django.views.generic.base import View
+
+
+SCHEMA_DIALECT = "http://json-schema.org/draft-04/schema#"
+OPENAPI_VERSION = "3.0.3"
+
+# методы, для которых схема не строится: OPTIONS - сама схема, HEAD - как GET
+SKIP_METHODS = ("OPTIONS", "HEAD")
+
+
+class SchemaEntry(namedtuple("SchemaEntry", ["data", "content", "etag"])):
+    """
+        Построенная схема: data - словарь, content - JSON (bytes), etag - строгий ETag
+        в кавычках.
+    """
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def make_entry(data):
+    content = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+        default=unicode).encode("utf-8")
+    return SchemaEntry(data, content, '"{}"'.format(hashlib.sha1(content).hexdigest()))
+
+
+def get_cached(key, build):
+    """
+        SchemaEntry из кеша процесса или построенная build() -> словарь.
+    """
+    entry = _cache.get(key)
+    if entry is None:
+        entry = make_entry(build())
+        with _lock:
+            entry = _cache.setdefault(key, entry)
+    return entry
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def view_label(view_class):
+    return "{}.{}".format(view_class.__module__, view_class.__name__)
+
+
+def view_summary(view_class):
+    """
+        Первая непустая строка описания класса.
+    """
+    for line in (view_class.__doc__ or "").splitlines():
+        line = line.strip()
+        if line:
+            return line
+    return ""
+
+
+def params_schema(params):
+    """
+        JSON Schema объекта параметров по списку IncomingParamBase.
+    """
+    res = {"type": "object", "properties": {}}
+    required = []
+    for param in params:
+        res["properties"][param.param_id] = param.json_schema()
+        if param.required and param.param_id not in required:
+            required.append(param.param_id)
+    if required:
+        res["required"] = required
+    return res
+
+
+def get_methods(view_class, plan):
+    """
+        Разрешенные методы view в порядке View.http_method_names.
+    """
+    return [method.upper() for method in View.http_method_names
+        if method.upper() in plan and plan[method.upper()].allowed]
+
+
+def build_view_schema(view_class, plan):
+    """
+        Схема view: {"$schema", "title", "allow", "methods": {<METHOD>: JSON Schema}}.
+    """
+    uses_form = view_class.PARAMS_FORM_CLASS is not None
+    methods = {}
+    for method in get_methods(view_class, plan):
+        if method in SKIP_METHODS:
+            continue
+        if uses_form:
+            methods[method] = {"type": "object", "description": "PARAMS_FORM_CLASS"}
+        else:
+            methods[method] = params_schema(plan[method].params)
+    return {
+        "$schema": SCHEMA_DIALECT,
+        "title": view_label(view_class),
+        "description": view_summary(view_class),
+        "allow": get_methods(view_class, plan),
+        "methods": methods,
+    }
+
+
+def get_view_schema(view_class, plan):
+    """
+        SchemaEntry схемы view для плана обработки plan (RESTView.get_dispatch_plan).
+    """
+    # план - один на as_view, ключ держит ссылку на него, поэтому id не переиспользуется
+    key = ("view", view_class, id(plan))
+    entry = _cache.get(key)
+    if entry is None:
+        entry = get_cached(key, lambda: build_view_schema(view_class, plan))
+        _cache[("plan", id(plan))] = plan
+    return entry
+
+
+# ==== URLconf
+
+def regex_to_path(pattern):
+    """
+        Регулярное выражение адреса -> ("/items/{pk}/", ["pk"]).
+    """
+    variants = normalize(pattern)
+    fmt, names = variants[0] if variants else ("", [])
+    if not fmt and pattern.strip("^$"):
+        # normalize не разбирает альтернативы: группы - параметры, (?:a|b) - первый вариант
+        names = re.findall(r"\(\?P<(\w+)>", pattern)
+        fmt = re.sub(r"\(\?P<(\w+)>[^)]*\)", r"%(\1)s", pattern)
+        fmt = re.sub(r"\(\?:([^|)]*)[^)]*\)\??", r"\1", fmt)
+        fmt = re.sub(r"\\(.)", r"\1", fmt.replace("^", "").replace("$", ""))
+    path = re.sub(r"%\((\w+)\)s", r"{\1}", fmt.replace("%%", "\0")).replace("\0", "%")
+    return ("/" + path, list(names))
+
+
+def iter_url_views(urlconf=None):
+    """
+        Все RESTView из URLconf: (адрес, имя url, класс view, план обработки).
+    """
+    def walk(patterns, prefix):
+        for itm in patterns:
+            regex = prefix + itm.regex.pattern
+            if hasattr(itm, "url_patterns"):
+                for res in walk(itm.url_patterns, regex):
+                    yield res
+                continue
+            view_class = getattr(itm.callback, "view_class", None)
+            if view_class is None or not hasattr(view_class, "get_dispatch_plan"):
+                continue
+            if getattr(view_class, "SCHEMA_HIDDEN", False):
+                continue
+            initkwargs = getattr(itm.callback, "view_initkwargs", None) or {}
+            plan = initkwargs.get("_dispatch_plan") or view_class.get_dispatch_plan()
+            yield (regex, itm.name, view_class, plan)
+
+    return walk(get_resolver(urlconf).url_patterns, "")
+
+
+def build_operation(view_class, plan, method, path_names, operation_id):
+    """
+        Операция OpenAPI для метода view.
+    """
+    res = {
+        "operationId": operation_id,
+        "summary": view_summary(view_class),
+        "responses": {"200": {"description": "OK", "content": {"application/json": {"schema": {}}}}},
+    }
+    parameters = [{"name": name, "in": "path", "required": True, "schema": {"type": "string"}}
+        for name in path_names]
+    params = () if view_class.PARAMS_FORM_CLASS is not None else plan[method].params
+
+    if method in view_class.DATA_POST_METHODS:
+        schema = params_schema(params)
+        res["requestBody"] = {
+            "required": bool(schema.get("required")),
+            "content": dict((content_type, {"schema": schema})
+                for content_type in ("application/json", "application/x-www-form-urlencoded")),
+        }
+    elif method in view_class.DATA_GET_METHODS:
+        for param in params:
+            schema = param.json_schema()
+            itm = {"name": param.param_id, "in": "query", "required": bool(param.required),
+                "schema": schema}
+            if schema.get("type") == "array" and not param.do_multy:
+                # список в одном значении через разделитель
+                itm["style"] = "form"
+                itm["explode"] = False
+            parameters.append(itm)
+
+    if parameters:
+        res["parameters"] = parameters
+    if params or view_class.PARAMS_FORM_CLASS is not None:
+        res["responses"]["422"] = {"description": "Ошибка в параметрах запроса"}
+    access = plan[method].access
+    if access.registered_only or access.permissions:
+        res["responses"]["403"] = {"description": "Доступ запрещен"}
+    return res
+
+
+def build_openapi(urlconf=None):
+    """
+        Документ OpenAPI по всем RESTView из URLconf.
+        Схемы параметров view - также в components/schemas под именем <модуль>.<класс>.<МЕТОД>.
+    """
+    paths = {}
+    schemas = {}
+    operation_ids = set()
+    for regex, name, view_class, plan in iter_url_views(urlconf):
+        path, path_names = regex_to_path(regex)
+        operations = paths.setdefault(path, {})
+        for method in get_methods(view_class, plan):
+            if method in SKIP_METHODS:
+                continue
+            operation_id = "{}.{}".format(name or view_label(view_class), method.lower())
+            no = 1
+            while operation_id in operation_ids:
+                no += 1
+                operation_id = "{}.{}_{}".format(name or view_label(view_class), method.lower(), no)
+            operation_ids.add(operation_id)
+            operations[method.lower()] = build_operation(view_class, plan, method, path_names,
+                operation_id)
+        for method, schema in get_view_schema(view_class, plan).data["methods"].items():
+            schemas["{}.{}".format(view_label(view_class), method)] = schema
+
+    return {
+        "openapi": OPENAPI_VERSION,
+        "info": {
+            "title": getattr(settings, "VUE_SCHEMA_TITLE", "API"),
+            "version": getattr(settings, "VUE_SCHEMA_VERSION", "1.0"),
+        },
+        "paths": paths,
+        "components": {"schemas": schemas},
+    }
+
+
+def get_openapi(urlconf=None):
+    """
+        SchemaEntry документа OpenAPI, один раз в процессе.
+    """
+    return get_cached(("openapi", urlconf), lambda: build_openapi(urlconf))
+
+
+def _on_setting_changed(setting, **kwargs):
+    if setting == "ROOT_URLCONF" or setting.startswith("VUE_SCHEMA_"):
+        clear_cache()
+
+setting_changed.connect(_on_setting_changed)
@@ -23,6 +23,17 @@ from dateutil.tz import tzlocal
 
 quartal = lambda x: ((x-1) // 3)+1
 
+# монотонные часы для сроков и интервалов: в python 2 - пакет monotonic (зависимость
+# в setup.py). Без него - time.time, и сроки (RateLimit, задачи, идемпотентность)
+# сдвигаются при переводе системных часов.
+try:
+    monotonic = time.monotonic
+except AttributeError:
+    try:
+        from monotonic import monotonic
+    except ImportError:
+        monotonic = time.time
+
 
 class EMessageError(Exception):
     """
@@ -668,6 +679,7 @@ class DecimalEncoder(json.JSONEncoder):
         Костыль для JSON. Иначе он не сериализует decimal.
         Используется в json.dumps:
             json.dumps(data, cls=DecimalEncoder)
+        Для ответов view удобнее zjson.dumps - он обрабатывает и Decimal, и прочие типы.
     """
     def default(self, o):
         if isinstance(o, Decimal):
@@ -823,3 +835,86 @@ def as_dict(arg, limit=None):
 
     return dict_proxy()
 
+
+class PhaseTimer(object):
+    """
+      Замер времени последовательных этапов обработки.
+      Используется как:
+        timer = PhaseTimer()
+        with timer.phase("load"):
+            ...
+        timer.phases -> [("load", <секунды>), ...]
+      Время меряется monotonic часами.
+    """
+
+    enabled = True
+
+    def __init__(self, clock=None):
+        """
+        """
+        self.clock = clock or monotonic
+        self.started = self.clock()
+        self.finished = None
+        self.phases = []
+
+    def phase(self, name):
+        return _TimerPhase(self, name)
+
+    def add(self, name, duration):
+        """
+          Добавить этап, замеренный отдельно. duration - секунды.
+        """
+        self.phases.append((name, duration))
+
+    def stop(self):
+        self.finished = self.clock()
+
+    @property
+    def total(self):
+        return (self.finished or self.clock()) - self.started
+
+
+class _TimerPhase(object):
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = self.timer.clock()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.timer.phases.append((self.name, self.timer.clock() - self.t0))
+        return False
+
+
+class NullTimer(object):
+    """
+      PhaseTimer, который ничего не замеряет. Для отключенного режима замеров.
+    """
+
+    enabled = False
+    phases = ()
+    total = 0
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def add(self, name, duration):
+        pass
+
+    def stop(self):
+        pass
+
+
+class _NullPhase(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+_NULL_PHASE = _NullPhase()
+NULL_TIMER = NullTimer()
@@ -246,6 +246,261 @@ function z_load_ajax(ajax_params, done_func, err_func, finall_func, params) {
 };
 
 
+const z_batch = {
+	// Клиент для RESTBatchView (easy_vue.dj_rest_batch).
+	// Вызовы z_batch.call, сделанные в одном "тике", собираются в один POST запрос.
+	// z_batch.url - адрес RESTBatchView, задается при инициализации страницы.
+	// z_batch.parallel - разрешить серверу выполнять подзапросы параллельно.
+	// z_batch.max_size - не больше вызовов в одном запросе (RESTBatchView.MAX_BATCH_SIZE),
+	//   остальные уходят следующими запросами.
+	//
+	// z_batch.call(url, method, params) возвращает Promise:
+	//   resolve(answer) - если статус подзапроса 2xx
+	//   reject({status, answer}) - иначе, или при ошибке самого пакетного запроса
+	url: "/batch/",
+	parallel: false,
+	max_size: 50,
+	_queue: [],
+	_scheduled: false,
+
+	call (url, method, params) {
+		return new Promise((resolve, reject) => {
+			z_batch._queue.push({
+				req: {url: url, method: method || "GET", params: params || {}},
+				resolve: resolve,
+				reject: reject
+			});
+			if (!z_batch._scheduled) {
+				z_batch._scheduled = true;
+				Promise.resolve().then(z_batch._flush)
+			}
+		})
+	},
+
+	_csrf_token () {
+		if (typeof Cookies !== "undefined") {
+			return Cookies.get("csrftoken")
+		}
+		let mm = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+		return mm ? decodeURIComponent(mm[1]) : null
+	},
+
+	_flush () {
+		let queue = z_batch._queue;
+		z_batch._queue = [];
+		z_batch._scheduled = false;
+		for (let start = 0; start < queue.length; start += z_batch.max_size) {
+			z_batch._send(queue.slice(start, start + z_batch.max_size))
+		}
+	},
+
+	_send (queue) {
+		$.ajax({
+			url: z_batch.url,
+			method: "POST",
+			dataType: "json",
+			headers: {"X-CSRFToken": z_batch._csrf_token()},
+			data: {
+				requests: JSON.stringify(queue.map((itm) => itm.req)),
+				parallel: JSON.stringify(z_batch.parallel)
+			}
+		})
+		.done((data) => {
+			queue.forEach((itm, no) => {
+				let res = data.results[no];
+				if (res.status >= 200 && res.status < 300) {
+					itm.resolve(res.answer)
+				} else {
+					itm.reject(res)
+				}
+			})
+		})
+		.fail((err) => {
+			queue.forEach((itm) => {
+				itm.reject({status: err.status, answer: err.responseJSON || null})
+			})
+		})
+	}
+};
+
+const z_msgpack = {
+	// Декодер MessagePack для ответов RESTView (easy_vue.zmsgpack).
+	// z_msgpack.decode(buffer) - ArrayBuffer или Uint8Array -> объект.
+	//   bin возвращается как Uint8Array, ext - как {type, data}.
+	//   64-битные целые - Number (точность до 2^53).
+	// z_msgpack.load(url, params, method) - запрос с Accept: application/msgpack,
+	//   возвращает Promise:
+	//   resolve(answer) - если статус 2xx
+	//   reject({status, answer}) - иначе
+	//   Если сервер ответил JSON - он тоже разбирается.
+
+	decode (buffer) {
+		let bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+		let view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+		let pos = 0;
+		let utf8 = typeof TextDecoder !== "undefined" ? new TextDecoder("utf-8") : null;
+
+		let str = (len) => {
+			let start = pos;
+			pos += len;
+			if (utf8 !== null) {
+				return utf8.decode(bytes.subarray(start, pos))
+			}
+			let res = "";
+			for (let i = start; i < pos; i++) {
+				res += "%" + ("0" + bytes[i].toString(16)).slice(-2)
+			}
+			return decodeURIComponent(res)
+		};
+		let bin = (len) => {
+			pos += len;
+			return bytes.slice(pos - len, pos)
+		};
+		let array = (len) => {
+			let res = new Array(len);
+			for (let i = 0; i < len; i++) {
+				res[i] = read()
+			}
+			return res
+		};
+		let map = (len) => {
+			let res = {};
+			for (let i = 0; i < len; i++) {
+				let key = read();
+				res[key] = read()
+			}
+			return res
+		};
+		let ext = (len) => {
+			let type = view.getInt8(pos);
+			pos += 1;
+			return {type: type, data: bin(len)}
+		};
+		let u8 = () => {pos += 1; return view.getUint8(pos - 1)};
+		let u16 = () => {pos += 2; return view.getUint16(pos - 2)};
+		let u32 = () => {pos += 4; return view.getUint32(pos - 4)};
+
+		let read = () => {
+			let b = u8();
+			if (b < 0x80) return b;
+			if (b < 0x90) return map(b & 0x0f);
+			if (b < 0xa0) return array(b & 0x0f);
+			if (b < 0xc0) return str(b & 0x1f);
+			if (b >= 0xe0) return b - 0x100;
+			let res;
+			switch (b) {
+				case 0xc0: return null;
+				case 0xc2: return false;
+				case 0xc3: return true;
+				case 0xc4: return bin(u8());
+				case 0xc5: return bin(u16());
+				case 0xc6: return bin(u32());
+				case 0xc7: return ext(u8());
+				case 0xc8: return ext(u16());
+				case 0xc9: return ext(u32());
+				case 0xca: res = view.getFloat32(pos); pos += 4; return res;
+				case 0xcb: res = view.getFloat64(pos); pos += 8; return res;
+				case 0xcc: return u8();
+				case 0xcd: return u16();
+				case 0xce: return u32();
+				case 0xcf: res = u32() * 4294967296; return res + u32();
+				case 0xd0: res = view.getInt8(pos); pos += 1; return res;
+				case 0xd1: res = view.getInt16(pos); pos += 2; return res;
+				case 0xd2: res = view.getInt32(pos); pos += 4; return res;
+				case 0xd3: res = view.getInt32(pos) * 4294967296; pos += 4; return res + u32();
+				case 0xd4: return ext(1);
+				case 0xd5: return ext(2);
+				case 0xd6: return ext(4);
+				case 0xd7: return ext(8);
+				case 0xd8: return ext(16);
+				case 0xd9: return str(u8());
+				case 0xda: return str(u16());
+				case 0xdb: return str(u32());
+				case 0xdc: return array(u16());
+				case 0xdd: return array(u32());
+				case 0xde: return map(u16());
+				case 0xdf: return map(u32());
+			}
+			throw new Error("MessagePack: unknown type 0x" + b.toString(16))
+		};
+
+		return read()
+	},
+
+	load (url, params, method) {
+		method = (method || "GET").toUpperCase();
+		let opts = {
+			method: method,
+			credentials: "same-origin",
+			headers: {
+				"Accept": "application/msgpack",
+				"X-Requested-With": "XMLHttpRequest"
+			}
+		};
+		let query = $.param(params || {});
+		if (method == "GET" || method == "HEAD") {
+			if (query) url += (url.indexOf("?") < 0 ? "?" : "&") + query
+		} else {
+			opts.headers["Content-Type"] = "application/x-www-form-urlencoded; charset=UTF-8";
+			opts.headers["X-CSRFToken"] = z_batch._csrf_token();
+			opts.body = query
+		}
+		return fetch(url, opts).then((resp) => resp.arrayBuffer().then((buf) => {
+			let ct = resp.headers.get("Content-Type") || "";
+			let answer = null;
+			if (buf.byteLength) {
+				if (ct.indexOf("msgpack") >= 0) {
+					answer = z_msgpack.decode(buf)
+				} else if (ct.indexOf("json") >= 0) {
+					answer = JSON.parse(new TextDecoder("utf-8").decode(buf))
+				}
+			}
+			if (resp.ok) return answer;
+			throw {status: resp.status, answer: answer}
+		}))
+	}
+};
+
+const z_id_ranges = {
+	// Сжатая запись списка ID для IdRangeParam (easy_vue.dj_rest_params):
+	// z_id_ranges.encode([1, 2, 3, 4, 730, 900, 901]) -> "1-4,730,900-901"
+	//   ID сортируются, повторы убираются, нецелые и <= 0 пропускаются.
+	// z_id_ranges.decode("1-4,730") -> [1, 2, 3, 4, 730]
+
+	encode (ids) {
+		let sorted = Array.from(ids, Number)
+			.filter((itm) => Number.isInteger(itm) && itm > 0)
+			.sort((a, b) => a - b);
+		let parts = [];
+		let i = 0;
+		while (i < sorted.length) {
+			let start = sorted[i];
+			let end = start;
+			i++;
+			while (i < sorted.length && sorted[i] <= end + 1) {
+				end = sorted[i];
+				i++
+			}
+			parts.push(start === end ? String(start) : start + "-" + end)
+		}
+		return parts.join(",")
+	},
+
+	decode (str) {
+		let res = [];
+		if (!str) return res;
+		for (let part of String(str).split(",")) {
+			let pos = part.indexOf("-");
+			let start = parseInt(pos > 0 ? part.slice(0, pos) : part, 10);
+			let end = pos > 0 ? parseInt(part.slice(pos + 1), 10) : start;
+			for (let id = start; id <= end; id++) {
+				res.push(id)
+			}
+		}
+		return res
+	}
+};
+
 const storeLoadMixin = {
 	// Vue mixin для загрузки данных через action store.
 	// определяет в data элемент data_loading
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Единый слой кодирования JSON для всех ответов easy_vue.
+
+    Бекенд выбирается настройкой settings.VUE_JSON_BACKEND:
+        "auto" (по умолчанию) - simplejson с C ускорением, если установлен,
+            иначе стандартный json с настроенным кодировщиком.
+        "simplejson", "json" - явно указанный бекенд.
+        "<путь.к.Классу>" - собственный класс бекенда (как SimpleJSONBackend).
+
+    Дополнительные настройки:
+        VUE_JSON_DECIMAL_AS_FLOAT (= False) - Decimal выдается числом, иначе строкой,
+            как в DjangoJSONEncoder.
+        VUE_JSON_COMPACT (= False) - разделители без пробелов.
+        VUE_JSON_ENSURE_ASCII (= True) - экранировать не ASCII символы.
+
+    Кроме стандартных типов кодирует: Decimal, datetime/date/time/timedelta, UUID,
+        ZMoment, ленивые строки перевода, генераторы и итераторы, QuerySet, set,
+        array.array и numpy.ndarray (как списки), любые Mapping (JSDict, ExtOrderedDict - наследники dict, кодируются как есть).
+
+    Использование:
+        zjson.dumps(data)
+        ZJsonResponse(data)
+"""
+
+import json
+import uuid
+import array
+import datetime
+from decimal import Decimal
+from collections import Iterator, Mapping
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db.models.query import QuerySet
+from django.http import HttpResponse
+from django.utils.encoding import force_text
+from django.utils.functional import Promise
+
+from .lib import ZMoment, load_class
+
+
+_django_default = DjangoJSONEncoder().default
+
+
+def _as_list(o):
+    return list(o)
+
+
+class DefaultConverter(object):
+    """
+        Функция default для кодировщиков: преобразует не JSON типы в JSON типы.
+        Обработчик выбирается по точному типу объекта и запоминается,
+        что бы не проходить цепочку isinstance для каждого значения.
+    """
+
+    def __init__(self, decimal_as_float=False):
+        """
+        """
+        self.decimal_as_float = decimal_as_float
+        self._handlers = {}
+
+    def __call__(self, o):
+        tp = type(o)
+        handler = self._handlers.get(tp)
+        if handler is None:
+            handler = self.resolve(tp)
+            if handler is None:
+                raise TypeError(repr(o) + " is not JSON serializable")
+            self._handlers[tp] = handler
+        return handler(o)
+
+    def resolve(self, tp):
+        """
+            Возвращает функцию преобразования для типа tp или None.
+            Может дополняться в потомках.
+        """
+        if issubclass(tp, ZMoment):
+            return ZMoment.to_json
+        if issubclass(tp, Decimal):
+            return float if self.decimal_as_float else str
+        if issubclass(tp, (datetime.datetime, datetime.date, datetime.time,
+                datetime.timedelta, uuid.UUID)):
+            return _django_default
+        if issubclass(tp, Promise):
+            return force_text
+        if issubclass(tp, (QuerySet, Iterator, set, frozenset)):
+            return _as_list
+        if issubclass(tp, array.array) or (numpy is not None and issubclass(tp, numpy.ndarray)):
+            return tp.tolist
+        if issubclass(tp, Mapping):
+            return dict
+        return None
+
+
+class StdJSONBackend(object):
+    """
+        Бекенд на стандартном json. Кодировщик создается один раз и
+        работает без проверки циклических ссылок.
+    """
+    name = "json"
+
+    def __init__(self, default, compact=False, ensure_ascii=True):
+        """
+        """
+        self.encoder = json.JSONEncoder(default=default, check_circular=False,
+            ensure_ascii=ensure_ascii,
+            separators=(b",", b":") if compact else (b", ", b": "))
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def dumps(self, obj):
+        return self.encoder.encode(obj)
+
+
+class SimpleJSONBackend(StdJSONBackend):
+    """
+        Бекенд на simplejson с C ускорением.
+        Decimal и namedtuple обрабатываются так же, как в StdJSONBackend,
+        что бы выдача не зависела от бекенда.
+    """
+    name = "simplejson"
+
+    def __init__(self, default, compact=False, ensure_ascii=True):
+        """
+        """
+        import simplejson
+        self.encoder = simplejson.JSONEncoder(default=default, check_circular=False,
+            ensure_ascii=ensure_ascii, use_decimal=False, namedtuple_as_object=False,
+            separators=(b",", b":") if compact else (b", ", b": "))
+
+    @classmethod
+    def available(cls):
+        try:
+            import simplejson
+            from simplejson import _speedups
+        except ImportError:
+            return False
+        return True
+
+
+BACKENDS = {
+    "json": StdJSONBackend,
+    "simplejson": SimpleJSONBackend,
+}
+
+AUTO_ORDER = ["simplejson", "json"]
+
+_backend = None
+
+
+def create_backend(name=None):
+    """
+        Создает объект бекенда согласно настройкам.
+        name - имя бекенда, путь к классу или "auto". По умолчанию - из settings.
+    """
+    if name is None:
+        name = getattr(settings, "VUE_JSON_BACKEND", "auto")
+
+    if name == "auto":
+        for itm in AUTO_ORDER:
+            if BACKENDS[itm].available():
+                backend_class = BACKENDS[itm]
+                break
+    elif name in BACKENDS:
+        backend_class = BACKENDS[name]
+    else:
+        try:
+            backend_class = load_class(name)
+        except Exception as e:
+            raise Exception("Uncorrect VUE_JSON_BACKEND '{}'.".format(name))
+
+    default = DefaultConverter(
+        decimal_as_float=getattr(settings, "VUE_JSON_DECIMAL_AS_FLOAT", False))
+    return backend_class(default,
+        compact=getattr(settings, "VUE_JSON_COMPACT", False),
+        ensure_ascii=getattr(settings, "VUE_JSON_ENSURE_ASCII", True))
+
+
+def get_backend():
+    """
+        Возвращает текущий бекенд (создается один раз на процесс).
+    """
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def reset_backend(**kwargs):
+    """
+        Сбрасывает текущий бекенд, он будет создан заново при следующем обращении.
+    """
+    global _backend
+    _backend = None
+
+
+def _on_setting_changed(setting, **kwargs):
+    if setting.startswith("VUE_JSON_"):
+        reset_backend()
+
+setting_changed.connect(_on_setting_changed)
+
+
+def dumps(obj):
+    """
+        Кодирует obj в строку JSON текущим бекендом.
+    """
+    return get_backend().dumps(obj)
+
+
+class ZJsonResponse(HttpResponse):
+    """
+        Аналог JsonResponse, кодирующий данные через zjson.
+        safe=True - разрешены только словари, как в JsonResponse.
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be '
+                'serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', 'application/json')
+        super(ZJsonResponse, self).__init__(content=dumps(data), **kwargs)
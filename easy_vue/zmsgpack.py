@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+"""
+    Компактный двоичный формат ответов, совместимый с MessagePack.
+
+    Если установлен пакет msgpack - кодирует им, иначе - собственной реализацией
+    на Python (только кодирование, декодер - z_msgpack в z_utils.js).
+    Типы, которых нет в MessagePack (Decimal, даты, ZMoment, QuerySet, array.array, ...),
+    преобразуются так же, как в zjson, поэтому ответ совпадает с JSON по содержанию.
+    Строки (str и unicode) кодируются как строки MessagePack, bytearray - как bin.
+
+    Настройка settings.VUE_MSGPACK_BACKEND:
+        "auto" (по умолчанию) - msgpack, если установлен, иначе "python".
+        "msgpack", "python" - явно.
+
+    Использование:
+        zmsgpack.packb(data)
+        MsgpackResponse(data)
+"""
+
+import struct
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.http import HttpResponse
+
+from .zjson import DefaultConverter
+
+
+CONTENT_TYPE = "application/msgpack"
+CONTENT_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+_B = struct.Struct(">B").pack
+_b = struct.Struct(">b").pack
+_H = struct.Struct(">H").pack
+_h = struct.Struct(">h").pack
+_I = struct.Struct(">I").pack
+_i = struct.Struct(">i").pack
+_Q = struct.Struct(">Q").pack
+_q = struct.Struct(">q").pack
+_d = struct.Struct(">d").pack
+
+# заранее упакованные однобайтовые значения: положительные и отрицательные fixint,
+# заголовки fixstr / fixarray / fixmap
+_FIXINT = dict((no, _B(no)) for no in range(128))
+_FIXINT.update((no, _b(no)) for no in range(-32, 0))
+_FIXSTR = [_B(0xa0 | no) for no in range(32)]
+_FIXARRAY = [_B(0x90 | no) for no in range(16)]
+_FIXMAP = [_B(0x80 | no) for no in range(16)]
+
+
+def _int_bytes(obj):
+    res = _FIXINT.get(obj)
+    if res is not None:
+        return res
+    if obj >= 0:
+        if obj <= 0xff:
+            return b"\xcc" + _B(obj)
+        if obj <= 0xffff:
+            return b"\xcd" + _H(obj)
+        if obj <= 0xffffffff:
+            return b"\xce" + _I(obj)
+        if obj <= 0xffffffffffffffff:
+            return b"\xcf" + _Q(obj)
+    else:
+        if obj >= -0x80:
+            return b"\xd0" + _b(obj)
+        if obj >= -0x8000:
+            return b"\xd1" + _h(obj)
+        if obj >= -0x80000000:
+            return b"\xd2" + _i(obj)
+        if obj >= -0x8000000000000000:
+            return b"\xd3" + _q(obj)
+    raise OverflowError("Integer value out of range")
+
+
+def _float_bytes(obj):
+    return b"\xcb" + _d(obj)
+
+
+_HOMOGENEOUS = {int: _int_bytes, long: _int_bytes, float: _float_bytes}
+
+
+class Packer(object):
+    """
+        Кодировщик MessagePack на Python.
+        default - функция преобразования неподдерживаемых типов (как в json).
+    """
+
+    def __init__(self, default=None):
+        self.default = default
+        self._dispatch = {
+            type(None): self._pack_nil,
+            bool: self._pack_bool,
+            int: self._pack_int,
+            long: self._pack_int,
+            float: self._pack_float,
+            unicode: self._pack_unicode,
+            bytes: self._pack_str,
+            bytearray: self._pack_bin,
+            list: self._pack_array,
+            tuple: self._pack_array,
+            dict: self._pack_map,
+        }
+
+    def pack(self, obj):
+        buf = []
+        self._pack(obj, buf.append)
+        return b"".join(buf)
+
+    def _pack(self, obj, write):
+        func = self._dispatch.get(type(obj))
+        if func is not None:
+            return func(obj, write)
+        # наследники стандартных типов (JSDict, OrderedDict, ...)
+        for tp in (dict, list, tuple, unicode, bytes, int, long, float):
+            if isinstance(obj, tp):
+                return self._dispatch[tp](obj, write)
+        if self.default is None:
+            raise TypeError(repr(obj) + " is not MessagePack serializable")
+        return self._pack(self.default(obj), write)
+
+    def _pack_nil(self, obj, write):
+        write(b"\xc0")
+
+    def _pack_bool(self, obj, write):
+        write(b"\xc3" if obj else b"\xc2")
+
+    def _pack_int(self, obj, write):
+        write(_int_bytes(obj))
+
+    def _pack_float(self, obj, write):
+        write(b"\xcb" + _d(obj))
+
+    def _pack_unicode(self, obj, write):
+        self._pack_str(obj.encode("utf-8"), write)
+
+    def _pack_str(self, obj, write):
+        size = len(obj)
+        if size < 32:
+            write(_FIXSTR[size])
+        elif size <= 0xff:
+            write(b"\xd9" + _B(size))
+        elif size <= 0xffff:
+            write(b"\xda" + _H(size))
+        else:
+            write(b"\xdb" + _I(size))
+        write(obj)
+
+    def _pack_bin(self, obj, write):
+        size = len(obj)
+        if size <= 0xff:
+            write(b"\xc4" + _B(size))
+        elif size <= 0xffff:
+            write(b"\xc5" + _H(size))
+        else:
+            write(b"\xc6" + _I(size))
+        write(bytes(obj))
+
+    def _pack_array(self, obj, write):
+        size = len(obj)
+        if size < 16:
+            write(_FIXARRAY[size])
+        elif size <= 0xffff:
+            write(b"\xdc" + _H(size))
+        else:
+            write(b"\xdd" + _I(size))
+        if size > 1:
+            # однородные числовые массивы кодируются без диспетчеризации по каждому элементу
+            tp = type(obj[0])
+            conv = _HOMOGENEOUS.get(tp)
+            if conv is not None and all(type(itm) is tp for itm in obj):
+                write(b"".join(map(conv, obj)))
+                return
+        pack = self._pack
+        for itm in obj:
+            pack(itm, write)
+
+    def _pack_map(self, obj, write):
+        size = len(obj)
+        if size < 16:
+            write(_FIXMAP[size])
+        elif size <= 0xffff:
+            write(b"\xde" + _H(size))
+        else:
+            write(b"\xdf" + _I(size))
+        pack = self._pack
+        for key, val in obj.iteritems():
+            pack(key, write)
+            pack(val, write)
+
+
+class PythonBackend(object):
+    name = "python"
+
+    def __init__(self, default):
+        self.packer = Packer(default)
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def packb(self, obj):
+        return self.packer.pack(obj)
+
+
+class MsgpackBackend(object):
+    name = "msgpack"
+
+    def __init__(self, default):
+        import msgpack
+        self.default = default
+        self._packb = msgpack.packb
+
+    @classmethod
+    def available(cls):
+        try:
+            import msgpack
+        except ImportError:
+            return False
+        return True
+
+    def packb(self, obj):
+        # use_bin_type=False - str и unicode кодируются одинаково, строками
+        return self._packb(obj, default=self.default, use_bin_type=False)
+
+
+BACKENDS = {
+    "msgpack": MsgpackBackend,
+    "python": PythonBackend,
+}
+
+AUTO_ORDER = ["msgpack", "python"]
+
+_backend = None
+
+
+def create_backend(name=None):
+    """
+        Создает объект бекенда согласно настройкам.
+    """
+    if name is None:
+        name = getattr(settings, "VUE_MSGPACK_BACKEND", "auto")
+
+    if name == "auto":
+        backend_class = [BACKENDS[itm] for itm in AUTO_ORDER if BACKENDS[itm].available()][0]
+    elif name in BACKENDS:
+        backend_class = BACKENDS[name]
+    else:
+        raise Exception("Uncorrect VUE_MSGPACK_BACKEND '{}'.".format(name))
+
+    return backend_class(DefaultConverter(
+        decimal_as_float=getattr(settings, "VUE_JSON_DECIMAL_AS_FLOAT", False)))
+
+
+def get_backend():
+    """
+        Возвращает текущий бекенд (создается один раз на процесс).
+    """
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def reset_backend(**kwargs):
+    global _backend
+    _backend = None
+
+
+def _on_setting_changed(setting, **kwargs):
+    if setting == "VUE_MSGPACK_BACKEND" or setting == "VUE_JSON_DECIMAL_AS_FLOAT":
+        reset_backend()
+
+setting_changed.connect(_on_setting_changed)
+
+
+def packb(obj):
+    """
+        Кодирует obj в MessagePack текущим бекендом.
+    """
+    return get_backend().packb(obj)
+
+
+def _accept_q(params):
+    for param in params:
+        param = param.strip()
+        if param.startswith("q="):
+            try:
+                return float(param[2:])
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def accepts_msgpack(accept):
+    """
+        True, если в заголовке Accept MessagePack указан явно и
+        предпочтительнее JSON (или равен ему по q).
+    """
+    if not accept or "msgpack" not in accept:
+        return False
+    q_msgpack = q_json = 0.0
+    for itm in accept.split(","):
+        parts = itm.split(";")
+        media = parts[0].strip().lower()
+        if media in CONTENT_TYPES:
+            q_msgpack = max(q_msgpack, _accept_q(parts[1:]))
+        elif media == "application/json":
+            q_json = max(q_json, _accept_q(parts[1:]))
+    return q_msgpack > 0 and q_msgpack >= q_json
+
+
+class MsgpackResponse(HttpResponse):
+    """
+        Ответ с данными в MessagePack. safe=True - разрешены только словари.
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be '
+                'serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', CONTENT_TYPE)
+        super(MsgpackResponse, self).__init__(content=packb(data), **kwargs)
@@ -38,5 +38,6 @@ setuptools.setup(
         "Topic :: Software Development :: Libraries :: Application Frameworks",
         "Topic :: Software Development :: User Interfaces",
     ],
+    install_requires=["monotonic"],
     python_requires=">2.7,<3.0",
 )
\ No newline at end of file
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Настройки Django для тестов easy_vue (python runtests.py).
+"""
+
+SECRET_KEY = "easy-vue-tests"
+DEBUG = False
+
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "easy_vue",
+]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+ROOT_URLCONF = "tests.urls"
+MIDDLEWARE_CLASSES = []
+TEMPLATES = []
+
+USE_TZ = False
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from easy_vue import dj_rest_params
+from easy_vue.dj_answer_cache import ResponseCache
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request, read_json
+
+
+class AnswerCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = calls = []
+
+        class ItemsView(RESTView):
+            ANSWER_CACHE = ResponseCache(ttl=60, beta=0)
+            GET_PARAMS = [
+                dj_rest_params.IntParam("a", required=False),
+                dj_rest_params.IntParam("b", required=False),
+            ]
+            FIELD_PROJECTION = True
+
+            def process_get(self, request, *args, **kwargs):
+                calls.append(1)
+                time.sleep(0.1)
+                if self.cleaned_params.a == 99:
+                    self.set_answer_error("bad")
+                self.set_answer_key("n", len(calls))
+                self.set_answer_key("items", iter([{"x": 1, "y": 2}]))
+
+            def process_post(self, request, *args, **kwargs):
+                calls.append(1)
+
+        self.view_class = ItemsView
+        self.view = ItemsView.as_view()
+
+    def get(self, **data):
+        return self.view(make_request("get", data=data))
+
+    def test_coalesced_and_cached(self):
+        responses = []
+        threads = [threading.Thread(target=lambda: responses.append(self.get(a=1, b=2)))
+            for no in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual([read_json(itm)["n"] for itm in responses], [1] * 5)
+
+        # порядок параметров не важен
+        self.assertEqual(read_json(self.get(b=2, a=1))["n"], 1)
+        self.assertEqual(len(self.calls), 1)
+        # дождавшиеся пересчета - тоже попадания
+        stats = self.view_class.ANSWER_CACHE.stats()
+        self.assertEqual((stats["misses"], stats["coalesced"], stats["hits"]), (1, 4, 5))
+
+    def test_projection_after_cache(self):
+        self.get(a=1)
+        data = read_json(self.get(a=1, fields="items.x"))
+        self.assertEqual(data["items"], [{"x": 1}])
+
+    def test_errors_and_post_not_cached(self):
+        self.assertEqual(self.get(a=99).status_code, 422)
+        self.get(a=99)
+        self.assertEqual(len(self.calls), 2)
+        self.view(make_request("post"))
+        self.view(make_request("post"))
+        self.assertEqual(len(self.calls), 4)
+
+    def test_vary_user(self):
+        response_cache = ResponseCache(vary="user")
+        self.assertEqual(response_cache.get_vary_key(None, make_request("get")), "anon")
+
+    def test_early_refresh(self):
+        calls = []
+
+        class EagerView(RESTView):
+            ANSWER_CACHE = ResponseCache(ttl=60, beta=1e9)
+
+            def process_get(self, request, *args, **kwargs):
+                calls.append(1)
+                # время пересчета должно быть больше разрешения часов
+                time.sleep(0.01)
+
+        view = EagerView.as_view()
+        view(make_request("get"))
+        view(make_request("get"))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(EagerView.ANSWER_CACHE.stats()["early_refreshes"], 1)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+import logging
+
+from django.test import SimpleTestCase
+
+from easy_vue.dj_rest_batch import RESTBatchView
+
+from .utils import make_request, read_json
+
+
+class BatchTest(SimpleTestCase):
+
+    def call(self, requests, parallel=False, view=RESTBatchView):
+        response = view.as_view()(make_request("post", data={
+            "requests": json.dumps(requests), "parallel": json.dumps(parallel)}))
+        self.assertEqual(response.status_code, 200)
+        return read_json(response)["results"]
+
+    def test_results_in_order(self):
+        for parallel in (False, True):
+            results = self.call([
+                {"url": "/items/1/?a=3"},
+                {"url": "/items/2/", "method": "post", "params": {"x": [1, 2]}},
+                {"url": "/private/"},
+                {"url": "/nope/"},
+                {"url": "/items/1/", "params": {"a": "q"}},
+                {"url": "/batch/"},
+                "bad",
+            ], parallel)
+            self.assertEqual([itm["status"] for itm in results], [200, 200, 403, 404, 422, 403, 422])
+            self.assertEqual(results[0]["answer"], {"a": 3})
+            self.assertEqual(results[1]["answer"], {"x": ["1", "2"]})
+
+    def test_sub_request_exception_isolated(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        for parallel in (False, True):
+            results = self.call([{"url": "/items/1/?a=1"}, {"url": "/failing/"},
+                {"url": "/items/1/?a=2"}], parallel)
+            self.assertEqual([itm["status"] for itm in results], [200, 500, 200])
+            self.assertEqual(results[1]["answer"]["answer"], "error")
+            self.assertEqual(results[2]["answer"], {"a": 2})
+
+    def test_max_batch_size(self):
+        response = RESTBatchView.as_view(MAX_BATCH_SIZE=2)(make_request("post", data={
+            "requests": json.dumps([{"url": "/items/1/?a=1"}] * 3)}))
+        self.assertEqual(response.status_code, 422)
+
+    def test_allowed_views(self):
+        class OnlyPrivate(RESTBatchView):
+            ALLOWED_VIEWS = []
+        results = self.call([{"url": "/items/1/?a=1"}], view=OnlyPrivate)
+        self.assertEqual(results[0]["status"], 403)
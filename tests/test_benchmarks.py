@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+from django.test import SimpleTestCase
+
+from benchmarks import common
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CommonTest(SimpleTestCase):
+
+    def test_percentile(self):
+        vals = list(range(101))
+        self.assertEqual(common.percentile(vals, 50), 50)
+        self.assertEqual(common.percentile(vals, 99), 99)
+        self.assertIsNone(common.percentile([], 50))
+
+    def test_measure(self):
+        calls = []
+        res = common.measure(lambda: calls.append(1), number=10, repeat=2, warmup=1)
+        self.assertEqual(len(calls), 21)
+        self.assertEqual(res["calls"], 20)
+        self.assertLessEqual(res["p50_us"], res["p99_us"])
+
+    def test_save_and_load(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "res.json")
+        common.save_results(path, {"a": {"ops_per_sec": 1.5}})
+        self.assertEqual(common.load_results(path), {"a": {"ops_per_sec": 1.5}})
+
+
+class SuiteTest(SimpleTestCase):
+
+    def test_run_and_compare(self):
+        # suite настраивает Django сам, поэтому - в отдельном процессе
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "res.json")
+        env = dict(os.environ)
+        env.pop("DJANGO_SETTINGS_MODULE", None)
+        args = [sys.executable, "-m", "benchmarks.suite", "--only", "dispatch.", "--only", "params.",
+            "--number", "2", "--repeat", "1", "--no-allocs"]
+        subprocess.check_output(args + ["--json", path], cwd=ROOT, env=env, stderr=subprocess.STDOUT)
+        results = common.load_results(path)
+        self.assertTrue(any(name.startswith("dispatch.") for name in results))
+        self.assertTrue(all(itm["ops_per_sec"] > 0 for itm in results.values()))
+
+        output = subprocess.check_output(args + ["--compare", path], cwd=ROOT, env=env,
+            stderr=subprocess.STDOUT)
+        self.assertIn(b"baseline", output)
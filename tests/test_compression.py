@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import io
+import gzip
+import json
+import zlib
+
+from django.test import SimpleTestCase
+
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request
+
+
+class RowsView(RESTView):
+    COMPRESS_ANSWER = True
+    ETAG_BY_BODY = True
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("rows", [{"id": no, "name": "name {}".format(no)}
+            for no in range(int(request.GET.get("n", 500)))])
+
+
+class StreamView(RowsView):
+    STREAM_ANSWER = True
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("rows", ({"id": no} for no in range(3000)))
+
+
+class CompressionTest(SimpleTestCase):
+
+    def setUp(self):
+        self.view = RowsView.as_view()
+
+    def test_gzip(self):
+        response = self.view(make_request("get", HTTP_ACCEPT_ENCODING="gzip, deflate"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        data = json.loads(gzip.GzipFile(fileobj=io.BytesIO(response.content)).read().decode("utf-8"))
+        self.assertEqual(len(data["rows"]), 500)
+
+        response = self.view(make_request("get", HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=response["ETag"]))
+        self.assertEqual(response.status_code, 304)
+
+    def test_q_values(self):
+        response = self.view(make_request("get", HTTP_ACCEPT_ENCODING="gzip;q=0.5, deflate"))
+        self.assertEqual(response["Content-Encoding"], "deflate")
+        json.loads(zlib.decompress(response.content).decode("utf-8"))
+
+    def test_not_compressed(self):
+        response = self.view(make_request("get", data={"n": 2}, HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        response = self.view(make_request("get"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_stream(self):
+        response = StreamView.as_view()(make_request("get", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content = zlib.decompress(b"".join(response.streaming_content), 31)
+        self.assertEqual(len(json.loads(content.decode("utf-8"))["rows"]), 3000)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+import threading
+
+from django.test import SimpleTestCase
+
+from easy_vue import dj_rest, dj_pool
+
+from .utils import make_request, read_json
+
+
+class OverlapView(dj_rest.RESTView):
+
+    def process_get(self, request, *args, **kwargs):
+        lock = threading.Lock()
+        arrived = []
+        everyone = threading.Event()
+
+        def meet(no):
+            with lock:
+                arrived.append(no)
+                if len(arrived) == 5:
+                    everyone.set()
+            # дождаться остальных можно, только если вызовы выполняются одновременно
+            return no if everyone.wait(5) else None
+        self.set_answer_key("res", self.run_concurrent([(meet, (no,), {}) for no in range(5)]))
+
+
+class AnswerChangesView(dj_rest.RESTView):
+
+    def process_get(self, request, *args, **kwargs):
+        def change(no):
+            # первые вызовы завершаются последними
+            time.sleep(0.01 * (3 - no))
+            self.set_answer_key("last", no)
+            self.append_answer_key({"k{}".format(no): no})
+            return "k{}".format(no) in self._answer
+        self.set_answer_key("seen", self.run_concurrent([(change, (no,), {}) for no in range(3)]))
+
+
+class FailingView(dj_rest.RESTView):
+
+    def process_get(self, request, *args, **kwargs):
+        def fail():
+            self.set_answer_error("upstream failed")
+        self.run_concurrent([lambda: 1, fail])
+
+
+class RunConcurrentTest(SimpleTestCase):
+
+    def test_results_in_order(self):
+        res = dj_pool.run_concurrent([
+            lambda: threading.current_thread().name,
+            (lambda a, b=0: a + b, (1,), {"b": 2}),
+        ])
+        self.assertEqual(res[1], 3)
+
+    def test_error_raised_after_all(self):
+        done = []
+
+        def fail():
+            raise ValueError("x")
+
+        def slow():
+            time.sleep(0.05)
+            done.append(1)
+
+        with self.assertRaises(ValueError):
+            dj_pool.run_concurrent([fail, slow])
+        self.assertEqual(done, [1])
+
+    def test_view_runs_in_parallel(self):
+        response = OverlapView.as_view()(make_request("get"))
+        self.assertEqual(read_json(response), {"res": [0, 1, 2, 3, 4]})
+
+    def test_answer_changes_applied_in_call_order(self):
+        data = read_json(AnswerChangesView.as_view()(make_request("get")))
+        # изменения ответа не видны в потоках пула и выполняются в порядке вызовов
+        self.assertEqual(data, {"seen": [False, False, False], "last": 2, "k0": 0, "k1": 1, "k2": 2})
+
+    def test_view_error(self):
+        response = FailingView.as_view()(make_request("get"))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(read_json(response)["error"], "upstream failed")
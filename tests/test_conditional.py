@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import datetime
+
+from django.test import SimpleTestCase
+
+from easy_vue import dj_rest
+
+from .utils import make_request, read_json
+
+
+class VersionedView(dj_rest.RESTView):
+    calls = 0
+
+    def get_etag(self, request, *args, **kwargs):
+        return "v1"
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return datetime.datetime(2020, 1, 1)
+
+    def process_get(self, request, *args, **kwargs):
+        type(self).calls += 1
+        self.set_answer_key("x", 1)
+
+
+class BodyEtagView(dj_rest.RESTView):
+    ETAG_BY_BODY = True
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("x", 1)
+
+
+class ConditionalTest(SimpleTestCase):
+
+    def setUp(self):
+        VersionedView.calls = 0
+        self.view = VersionedView.as_view()
+
+    def test_validators_sent(self):
+        response = self.view(make_request("get"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"v1"')
+        self.assertEqual(response["Last-Modified"], "Wed, 01 Jan 2020 00:00:00 GMT")
+        self.assertEqual(read_json(response), {"x": 1})
+
+    def test_if_none_match(self):
+        response = self.view(make_request("get", HTTP_IF_NONE_MATCH='"v1"'))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(VersionedView.calls, 0)
+
+    def test_etag_mismatch_wins(self):
+        response = self.view(make_request("get", HTTP_IF_NONE_MATCH='W/"v0"',
+            HTTP_IF_MODIFIED_SINCE="Wed, 01 Jan 2020 00:00:00 GMT"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_head_if_modified_since(self):
+        response = self.view(make_request("head",
+            HTTP_IF_MODIFIED_SINCE="Wed, 01 Jan 2020 00:00:00 GMT"))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.view(make_request("head")).status_code, 200)
+        self.assertEqual(VersionedView.calls, 1)
+
+    def test_etag_by_body(self):
+        view = BodyEtagView.as_view()
+        etag = view(make_request("get"))["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertEqual(view(make_request("get", HTTP_IF_NONE_MATCH=etag)).status_code, 304)
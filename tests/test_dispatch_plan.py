@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test import SimpleTestCase, override_settings
+
+from easy_vue import dj_compress, dj_rest, dj_rest_params
+
+from .utils import make_request, read_json
+
+
+class ItemView(dj_rest.RESTView):
+    GET_PARAMS = [dj_rest_params.IntParam("a", min_val=1)]
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("a", self.cleaned_params.a)
+
+
+class AccessView(ItemView):
+    http_method_names = ["get", "post"]
+    access_params = {
+        "post": dj_rest.ViewAccessParams(registered_only=True),
+        "put": dj_rest.UseAccessParams("post"),
+    }
+
+    def process(self, request, *args, **kwargs):
+        self.set_answer_key("p", 1)
+
+
+class DispatchPlanTest(SimpleTestCase):
+
+    def test_plan_cached_per_class(self):
+        plan = ItemView.get_dispatch_plan()
+        self.assertIs(plan, ItemView.get_dispatch_plan())
+        self.assertIsNot(plan, AccessView.get_dispatch_plan())
+        self.assertTrue(plan["GET"].allowed)
+        self.assertEqual([param.param_id for param in plan["GET"].params], ["a"])
+        self.assertEqual(plan["GET"].handler, ItemView.process_get)
+
+    def test_get(self):
+        response = ItemView.as_view()(make_request("get", data={"a": "5"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(read_json(response), {"a": 5})
+
+    def test_param_error(self):
+        response = ItemView.as_view()(make_request("get", data={"a": "x"}))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(read_json(response)["answer"], "error")
+
+    def test_method_not_allowed(self):
+        response = ItemView.as_view()(make_request("trace"))
+        self.assertEqual(response.status_code, 405)
+
+    def test_access_params(self):
+        view = AccessView.as_view()
+        self.assertEqual(view(make_request("post")).status_code, 403)
+        self.assertEqual(read_json(view(make_request("get", data={"a": "2"}))), {"a": 2})
+        # put нет в http_method_names
+        self.assertEqual(view(make_request("put")).status_code, 405)
+        self.assertTrue(AccessView.get_dispatch_plan()["PUT"].access.registered_only)
+
+    def test_initkwargs_plan(self):
+        view = ItemView.as_view(ajax_only=True)
+        self.assertEqual(view(make_request("get", data={"a": "2"})).status_code, 405)
+        response = view(make_request("get", data={"a": "2"}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"))
+        self.assertEqual(response.status_code, 200)
+        # план класса не изменился
+        self.assertFalse(ItemView.get_dispatch_plan()["GET"].access.ajax_only)
+
+    def test_request_settings_resolved_once(self):
+        calls = []
+        get_settings = dj_compress.get_settings
+
+        def counting_get_settings(*args):
+            calls.append(args)
+            return get_settings(*args)
+
+        # свой план - настройки еще не вычислены
+        view = ItemView.as_view(ajax_only=False)
+        dj_compress.get_settings = counting_get_settings
+        try:
+            for no in range(3):
+                response = view(make_request("get", data={"a": "1"}))
+                self.assertNotIn("Server-Timing", response)
+        finally:
+            dj_compress.get_settings = get_settings
+        self.assertEqual(len(calls), 1)
+
+        # при изменении настроек план вычисляет их заново
+        with override_settings(VUE_SERVER_TIMING=True):
+            self.assertIn("Server-Timing", view(make_request("get", data={"a": "1"})))
+        self.assertNotIn("Server-Timing", view(make_request("get", data={"a": "1"})))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test import SimpleTestCase
+
+from easy_vue.dj_rest import RESTView
+from easy_vue.dj_rest_fields import Projection, parse_fields
+
+from .utils import make_request, read_json
+
+
+class RowsView(RESTView):
+    FIELD_PROJECTION = True
+
+    def process_get(self, request, *args, **kwargs):
+        projection = self.projection
+        self.set_answer_key("seen", projection.fields_for("rows",
+            ["id", "name", "author__name", "author__email"]) if projection else None)
+        self.set_answer_key("rows", [{"id": no, "name": "n{}".format(no),
+            "author": {"name": "a", "email": "e"}} for no in range(2)])
+        self.set_answer_key("total", 2)
+        self.set_answer_success()
+
+
+class ProjectionTest(SimpleTestCase):
+
+    def get(self, **data):
+        return read_json(RowsView.as_view()(make_request("get", data=data)))
+
+    def test_fields(self):
+        data = self.get(fields="rows.id,rows.author.name,seen")
+        self.assertEqual(data["rows"], [{"id": 0, "author": {"name": "a"}}, {"id": 1, "author": {"name": "a"}}])
+        self.assertNotIn("total", data)
+        self.assertEqual(data["answer"], "success")
+        self.assertEqual(sorted(data["seen"]), ["author__name", "id"])
+
+    def test_exclude(self):
+        data = self.get(exclude="rows.author.email,total")
+        self.assertEqual(data["rows"][0], {"id": 0, "name": "n0", "author": {"name": "a"}})
+        self.assertNotIn("total", data)
+        self.assertEqual(sorted(data["seen"]), ["author__name", "id", "name"])
+
+    def test_no_projection(self):
+        data = self.get()
+        self.assertEqual(data["total"], 2)
+        self.assertIsNone(data["seen"])
+
+    def test_bad_path(self):
+        response = RowsView.as_view()(make_request("get", data={"fields": "a..b"}))
+        self.assertEqual(response.status_code, 422)
+
+    def test_is_requested(self):
+        projection = Projection(parse_fields("rows.author"), parse_fields("rows.author.email"))
+        self.assertTrue(projection.is_requested("rows.author.name"))
+        self.assertFalse(projection.is_requested("rows.author.email"))
+        self.assertFalse(projection.is_requested("total"))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Group
+from django.test import SimpleTestCase, TestCase
+
+from easy_vue import dj_rest_params
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request, read_json
+
+
+class SelectedGroupsView(RESTView):
+    GET_PARAMS = [dj_rest_params.IdRangeParam("sel")]
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("n", self.cleaned_params.sel.filter(Group.objects.all()).count())
+
+
+class IdRangeSetTest(SimpleTestCase):
+
+    def test_merge(self):
+        ids = dj_rest_params.IdRangeSet([(900, 1200), (1, 500), (730, 730), (501, 502), (1000, 1300)])
+        self.assertEqual(ids.ranges(), [(1, 502), (730, 730), (900, 1300)])
+        self.assertEqual(ids.encode(), "1-502,730,900-1300")
+        self.assertEqual(ids.count(), 904)
+
+    def test_contains(self):
+        ids = dj_rest_params.IdRangeSet([(1, 502), (730, 730), (900, 1300)])
+        for value in (1, 502, 730, 900, 1300, "1000"):
+            self.assertIn(value, ids)
+        for value in (0, 503, 729, 1301, "x", None):
+            self.assertNotIn(value, ids)
+
+    def test_from_ids(self):
+        ids = dj_rest_params.IdRangeSet.from_ids([5, 1, 2, 3, 9, 10])
+        self.assertEqual(ids.encode(), "1-3,5,9-10")
+        self.assertEqual(list(ids), [1, 2, 3, 5, 9, 10])
+        self.assertEqual(ids, dj_rest_params.IdRangeSet([(1, 3), (5, 5), (9, 10)]))
+
+    def test_huge_range(self):
+        # диапазон не разворачивается
+        ids = dj_rest_params.IdRangeSet([(1, 2 ** 62)])
+        self.assertEqual(ids.count(), 2 ** 62)
+        self.assertIn(2 ** 61, ids)
+
+    def test_count(self):
+        self.assertIsInstance(dj_rest_params.IdRangeSet([(1, 2)]).count(), long)
+        self.assertEqual(dj_rest_params.IdRangeSet().count(), 0)
+        self.assertFalse(dj_rest_params.IdRangeSet())
+        self.assertTrue(dj_rest_params.IdRangeSet([(5, 5)]))
+
+
+class IdRangeParamTest(SimpleTestCase):
+
+    def assertParseError(self, param, value, index=None):
+        with self.assertRaises(dj_rest_params.EParseError) as ctx:
+            param.parse({param.param_id: value}, {})
+        self.assertEqual((ctx.exception.detail or {}).get("index"), index, value)
+
+    def test_parse(self):
+        param = dj_rest_params.IdRangeParam("ids")
+        res = param.parse({"ids": "900-1200,1-500,730,501-502,1000-1300"}, {})
+        self.assertIsInstance(res, dj_rest_params.IdRangeSet)
+        self.assertEqual(res.encode(), "1-502,730,900-1300")
+
+    def test_open_range(self):
+        param = dj_rest_params.IdRangeParam("ids")
+        res = param.parse({"ids": "5-"}, {})
+        self.assertEqual(res.ranges(), [(5, param.MAX_ID)])
+        self.assertEqual(res.count(), param.MAX_ID - 4)
+        self.assertIn(param.MAX_ID, res)
+        self.assertEqual(param.parse({"ids": "1,5-"}, {}).count(), param.MAX_ID - 3)
+        self.assertParseError(param, "-5", 0)
+        self.assertParseError(dj_rest_params.IdRangeParam("ids", max_count=100), "5-")
+
+    def test_json_list(self):
+        param = dj_rest_params.IdRangeParam("ids")
+        self.assertEqual(param.parse({"ids": [1, "5-10", 20]}, {}).encode(), "1,5-10,20")
+        self.assertParseError(param, [1, None], 1)
+        self.assertParseError(param, [1, True], 1)
+
+    def test_errors(self):
+        param = dj_rest_params.IdRangeParam("ids", max_count=100000, max_ranges=3)
+        self.assertParseError(param, "1-x", 0)
+        self.assertParseError(param, "1,5-2", 1)
+        self.assertParseError(param, "0", 0)
+        self.assertParseError(param, "1,,2", 1)
+        self.assertParseError(param, "1-99999999999999999999999", 0)
+        self.assertParseError(param, "1-200000")
+        self.assertParseError(param, "1,2,3,4")
+
+
+class IdRangeFilterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.groups = [Group.objects.create(name="g{}".format(no)) for no in range(30)]
+
+    def test_filter(self):
+        pks = [group.pk for group in self.groups]
+        ids = dj_rest_params.IdRangeSet.from_ids(pks[:2] + pks[4:10] + pks[19:20])
+        qs = ids.filter(Group.objects.all())
+        self.assertIn("BETWEEN", str(qs.query))
+        self.assertEqual(sorted(qs.values_list("pk", flat=True)), sorted(ids))
+
+    def test_empty(self):
+        self.assertEqual(list(dj_rest_params.IdRangeSet().filter(Group.objects.all())), [])
+
+    def test_view(self):
+        view = SelectedGroupsView.as_view()
+        first = self.groups[0].pk
+        sel = "{}-{},{}".format(first, first + 9, first + 20)
+        self.assertEqual(read_json(view(make_request("get", data={"sel": sel}))), {"n": 11})
+        self.assertEqual(view(make_request("get", data={"sel": "1-10,a"})).status_code, 422)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+import threading
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+
+from easy_vue.dj_idempotency import Idempotency
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request, read_json
+
+
+def make_view(idempotency, calls):
+
+    class CounterView(RESTView):
+        IDEMPOTENCY = idempotency
+
+        def process_post(self, request, *args, **kwargs):
+            calls.append(1)
+            time.sleep(0.1)
+            self.set_answer_key("n", len(calls))
+
+    return CounterView.as_view()
+
+
+class IdempotencyTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def check_view(self, idempotency):
+        calls = []
+        view = make_view(idempotency, calls)
+        post = lambda key, data={"a": 1}: view(make_request("post", data=data, HTTP_IDEMPOTENCY_KEY=key))
+
+        responses = []
+        threads = [threading.Thread(target=lambda: responses.append(post("k1"))) for no in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(itm.get("Idempotent-Replayed") for itm in responses), [None, "true", "true"])
+        self.assertEqual([read_json(itm)["n"] for itm in responses], [1, 1, 1])
+
+        response = post("k1")
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(len(calls), 1)
+        # тот же ключ с другими параметрами
+        self.assertEqual(post("k1", {"a": 2}).status_code, 422)
+        self.assertEqual(read_json(post("k2"))["n"], 2)
+        # без ключа - без дедупликации
+        self.assertEqual(read_json(view(make_request("post", data={"a": 1})))["n"], 3)
+
+    def test_memory(self):
+        self.check_view(Idempotency())
+
+    def test_cache(self):
+        self.check_view(Idempotency(cache="default"))
+
+    def test_cache_lock_between_instances(self):
+        calls = []
+        responses = []
+
+        def run(idempotency):
+            responses.append(make_view(idempotency, calls)(
+                make_request("post", data={"x": 1}, HTTP_IDEMPOTENCY_KEY="z")))
+
+        threads = [threading.Thread(target=run, args=(Idempotency(cache="default"),)) for no in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([itm.status_code for itm in responses], [200, 200])
+
+    def check_transient(self, idempotency):
+        calls = []
+
+        class BusyOnceView(RESTView):
+            IDEMPOTENCY = idempotency
+
+            def process_post(self, request, *args, **kwargs):
+                calls.append(1)
+                if len(calls) == 1:
+                    return HttpResponse(status=429)
+                self.set_answer_key("n", len(calls))
+
+        view = BusyOnceView.as_view()
+        post = lambda: view(make_request("post", data={"a": 1}, HTTP_IDEMPOTENCY_KEY="busy"))
+        self.assertEqual(post().status_code, 429)
+        # отказ не запомнен - повтор доходит до обработчика, его ответ уже запоминается
+        self.assertEqual(read_json(post())["n"], 2)
+        response = post()
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(len(calls), 2)
+
+    def test_transient_memory(self):
+        self.check_transient(Idempotency())
+
+    def test_transient_cache(self):
+        self.check_transient(Idempotency(cache="default"))
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+import threading
+
+from django.test import SimpleTestCase
+from django.views.generic import View
+
+from easy_vue.dj import FilePostMixin
+from easy_vue.dj_jobs import JobQueue, MemoryJobStore, answer_result, find_job
+from easy_vue.dj_rest import RESTView
+from easy_vue.dj_rest_jobs import JobStatusView
+
+from .utils import make_request, read_json
+
+
+LIMITED = JobQueue("tests_limited", workers=2, per_user=2, max_queue=3)
+WIDE = JobQueue("tests_wide", workers=8, per_user=100, max_queue=100)
+PROCESS = JobQueue("tests_process", workers=1, kind="process")
+EVICTING = JobQueue("tests_evicting", workers=1, per_user=1)
+FULL = JobQueue("tests_full", max_queue=0)
+
+
+class EvictingStore(MemoryJobStore):
+    """
+        Хранилище, из которого запись задачи сразу вытесняется.
+    """
+
+    def get(self, job_id):
+        return None
+
+
+EVICTING.store = EvictingStore(EVICTING.result_ttl)
+
+release = threading.Event()
+
+
+class WaitingView(RESTView):
+    BACKGROUND_JOB = LIMITED
+
+    def process_post(self, request, *args, **kwargs):
+        self.set_job_progress(10, "started")
+        release.wait(5)
+        if request.POST.get("bad"):
+            self.set_answer_error("bad")
+        if request.POST.get("boom"):
+            raise ValueError("boom")
+        self.set_answer_key("x", 42)
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("x", 1)
+
+
+class ManyKeysView(RESTView):
+    BACKGROUND_JOB = WIDE
+
+    def process_post(self, request, *args, **kwargs):
+        for no in range(200):
+            self.set_answer_key("k{}".format(no), no)
+
+
+def square(n):
+    return answer_result({"answer": "success", "sq": n * n})
+
+
+def unpicklable_result(n):
+    return answer_result({"answer": "success", "f": lambda: n})
+
+
+class ProcessView(RESTView):
+    BACKGROUND_JOB = PROCESS
+
+    def get_background_call(self, request, *args, **kwargs):
+        return (square, (int(request.POST["n"]),), {})
+
+
+class FileView(FilePostMixin, View):
+    BACKGROUND_JOB = WIDE
+    DEF_FILE_NAME = "a.txt"
+    CONTENT_TYPE = "text/plain"
+
+    def get_output_data(self, request, *args, **kwargs):
+        return "hello file"
+
+
+class FullQueueFileView(FileView):
+    BACKGROUND_JOB = FULL
+    BACKGROUND_RETRY_AFTER = 7
+
+
+class FullQueueView(WaitingView):
+    BACKGROUND_JOB = FULL
+    BACKGROUND_RETRY_AFTER = 7
+
+
+status_view = JobStatusView.as_view()
+
+
+def job_status(job_id, **data):
+    data["job"] = job_id
+    return status_view(make_request("get", data=data))
+
+
+def submit(view_class, **data):
+    response = view_class.as_view()(make_request("post", data=data))
+    if response.status_code != 202:
+        return response, None
+    return response, read_json(response)["job"]["id"]
+
+
+class JobsTestMixin(object):
+
+    def wait(self, job_id):
+        for no in range(100):
+            data = read_json(job_status(job_id))
+            if data["job"]["state"] in ("done", "error"):
+                return data
+            time.sleep(0.05)
+        self.fail("job {} timed out".format(job_id))
+
+
+class RESTViewJobsTest(JobsTestMixin, SimpleTestCase):
+
+    def test_queue_and_results(self):
+        release.clear()
+        response, first = submit(WaitingView)
+        self.assertEqual(read_json(response)["job"]["state"], "queued")
+        response, second = submit(WaitingView, bad=1)
+        self.assertIsNotNone(second)
+        response, rejected = submit(WaitingView)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "5")
+
+        time.sleep(0.2)
+        data = read_json(job_status(first))
+        self.assertEqual((data["job"]["state"], data["job"]["progress"]), ("running", 10))
+        # задача другого владельца не видна
+        other = make_request("get", data={"job": first}, REMOTE_ADDR="1.2.3.4")
+        self.assertEqual(status_view(other).status_code, 404)
+
+        release.set()
+        data = self.wait(first)
+        self.assertEqual((data["result"]["x"], data["result_status"]), (42, 200))
+        data = self.wait(second)
+        self.assertEqual((data["result"]["answer"], data["result_status"]), ("error", 422))
+
+        response, failed = submit(WaitingView, boom=1)
+        data = self.wait(failed)
+        self.assertEqual(data["job"]["state"], "error")
+        self.assertNotIn("result", data)
+
+        self.assertEqual(WaitingView.as_view()(make_request("get")).status_code, 200)
+        self.assertEqual(job_status("nope.1").status_code, 404)
+
+    def test_answer_isolated_from_202(self):
+        jobs = []
+        for no in range(30):
+            response, job_id = submit(ManyKeysView)
+            self.assertEqual(list(read_json(response)), ["job"])
+            jobs.append(job_id)
+        for job_id in jobs:
+            result = self.wait(job_id)["result"]
+            self.assertNotIn("job", result)
+            self.assertEqual(len(result), 200)
+
+    def test_process_pool(self):
+        response, job_id = submit(ProcessView, n=7)
+        self.assertEqual(self.wait(job_id)["result"]["sq"], 49)
+
+
+class FileJobsTest(JobsTestMixin, SimpleTestCase):
+
+    def test_file(self):
+        response, job_id = submit(FileView)
+        self.assertEqual(self.wait(job_id)["job"]["file"]["filename"], "a.txt")
+        response = job_status(job_id, download=1)
+        self.assertEqual(response.content, b"hello file")
+        self.assertIn("a.txt", response["Content-Disposition"])
+
+    def test_queue_full(self):
+        for view_class in (FullQueueFileView, FullQueueView):
+            response = submit(view_class)[0]
+            self.assertEqual((response.status_code, response["Retry-After"]), (429, "7"))
+
+
+class JobQueueTest(JobsTestMixin, SimpleTestCase):
+
+    def wait_released(self, queue):
+        for no in range(100):
+            if queue._active == 0:
+                return
+            time.sleep(0.05)
+        self.fail("queue {} still busy".format(queue.name))
+
+    def test_evicted_job_releases_owner(self):
+        for no in range(2):
+            EVICTING.submit(make_request("post"), lambda job_id: answer_result({}))
+            self.wait_released(EVICTING)
+        self.assertEqual(EVICTING._user_active, {})
+
+    def test_unpicklable_process_jobs(self):
+        with self.assertRaises(Exception):
+            PROCESS.submit(make_request("post"), (square, (lambda: 1,), {}))
+        self.assertEqual(PROCESS._active, 0)
+
+        state = PROCESS.submit(make_request("post"), (unpicklable_result, (1,), {}))
+        self.assertEqual(self.wait(state["id"])["job"]["state"], "error")
+        self.wait_released(PROCESS)
+
+    def test_non_dict_result_fails(self):
+        state = WIDE.submit(make_request("post"), lambda job_id: [1, 2])
+        self.assertEqual(self.wait(state["id"])["job"]["state"], "error")
+        self.assertEqual(WIDE._active, 0)
+
+    def test_queue_names(self):
+        with self.assertRaises(Exception):
+            JobQueue("tests.dotted")
+        with self.assertRaises(Exception):
+            JobQueue("tests_wide")
+        state = WIDE.submit(make_request("post"), lambda job_id: answer_result({}))
+        self.assertIs(find_job(state["id"])[0], WIDE)
+        self.assertEqual(find_job("tests_missing.1"), (None, None))
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+
+from django import forms
+from django.test import SimpleTestCase
+from django.views.generic.base import View
+
+from easy_vue import dj_rest, dj_rest_params, dj_json_body
+from easy_vue.dj import JSONPostMixin, PostViewMixin, JSONViewBase
+from easy_vue.dj_form import JSONField
+
+from .utils import make_request, read_json
+
+
+def json_request(body, **extra):
+    if not isinstance(body, (bytes, type(""))):
+        body = json.dumps(body)
+    return make_request("post", data=body, content_type="application/json", **extra)
+
+
+class ParamsView(dj_rest.RESTView):
+    POST_PARAMS = [
+        dj_rest_params.IntParam("a"),
+        dj_rest_params.JSONParam("j"),
+        dj_rest_params.CommaListParam(dj_rest_params.IntParam("l")),
+        dj_rest_params.IntParam("m", do_multy=True),
+    ]
+
+    def process_post(self, request, *args, **kwargs):
+        self.set_answer_key("c", self.cleaned_params)
+
+
+class JForm(forms.Form):
+    j = JSONField()
+
+
+class FormView(dj_rest.RESTView):
+    PARAMS_FORM_CLASS = JForm
+
+    def process_post(self, request, *args, **kwargs):
+        self.set_answer_key("j", self.cleaned_params.j)
+
+
+class MixinView(JSONPostMixin, View):
+
+    def get_output_data(self, request, *args, **kwargs):
+        return {"x": self.request_params.get("x")}
+
+
+class PostView(PostViewMixin, View):
+
+    def get_output_data(self, request, *args, **kwargs):
+        return self.request_params.get("x")
+
+
+class FieldsView(JSONViewBase, JSONPostMixin, View):
+    json_fields = ["x"]
+
+    def get_output_data(self, request, *args, **kwargs):
+        return {"x": self.post_data.x}
+
+
+class JSONBodyTest(SimpleTestCase):
+
+    def test_params(self):
+        response = ParamsView.as_view()(json_request({"a": 5, "j": {"x": [1]}, "l": [1, "2"], "m": 3}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(read_json(response)["c"], {"a": 5, "j": {"x": [1]}, "l": [1, 2], "m": [3]})
+
+    def test_body_parsed_once(self):
+        request = json_request({"a": 1})
+        self.assertIs(dj_json_body.get_json_body(request), dj_json_body.get_json_body(request))
+
+    def test_params_interface(self):
+        params = dj_json_body.JSONBodyParams(json_request({"a": 1, "b": [1, 2]}))
+        self.assertIn("a", params)
+        self.assertEqual(params.getlist("a"), [1])
+        self.assertEqual(params.getlist("b"), [1, 2])
+        self.assertIsNone(params.get("c"))
+
+    def test_errors(self):
+        view = ParamsView.as_view()
+        self.assertEqual(view(json_request('{"a": 5')).status_code, 422)
+        self.assertEqual(view(json_request("[" * 40 + "]" * 40)).status_code, 422)
+        self.assertEqual(view(json_request("[1, 2]")).status_code, 422)
+        response = ParamsView.as_view(JSON_BODY_MAX_SIZE=10)(
+            json_request({"a": 5, "j": 1, "l": [], "m": 1}))
+        self.assertEqual(response.status_code, 413)
+
+    def test_form(self):
+        response = FormView.as_view()(json_request({"j": {"q": 1}}))
+        self.assertEqual(read_json(response), {"j": {"q": 1}})
+        self.assertEqual(FormView.as_view()(json_request("{bad")).status_code, 422)
+
+    def test_mixins(self):
+        self.assertEqual(read_json(MixinView.as_view()(json_request({"x": 5}))), {"x": 5})
+        self.assertEqual(read_json(FieldsView.as_view()(json_request({"x": [1]}))), {"x": [1]})
+
+    def test_mixins_bad_body(self):
+        for view_class in (MixinView, PostView, FieldsView):
+            for body in ("{bad", "[1, 2]"):
+                response = view_class.as_view()(json_request(body))
+                self.assertEqual(response.status_code, 422, (view_class, body))
+                self.assertIn("Error", read_json(response))
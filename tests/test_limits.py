@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from easy_vue.dj import FilePostMixin
+from easy_vue.dj_limits import RateLimit
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request
+
+
+class RateLimitTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rate(self):
+        class LimitedView(RESTView):
+            RATE_LIMIT = RateLimit(rate=1, burst=2)
+        view = LimitedView.as_view()
+        codes = [view(make_request("get")).status_code for no in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+        self.assertEqual(view(make_request("get"))["Retry-After"], "1")
+
+    def test_rate_per_user(self):
+        class LimitedView(RESTView):
+            RATE_LIMIT = RateLimit(rate=1, burst=1)
+        view = LimitedView.as_view()
+        self.assertEqual(view(make_request("get", REMOTE_ADDR="10.0.0.1")).status_code, 200)
+        self.assertEqual(view(make_request("get", REMOTE_ADDR="10.0.0.2")).status_code, 200)
+        self.assertEqual(view(make_request("get", REMOTE_ADDR="10.0.0.1")).status_code, 429)
+
+    def test_concurrent(self):
+        release = threading.Event()
+
+        class BusyView(RESTView):
+            RATE_LIMIT = RateLimit(concurrent=1)
+
+            def process_get(self, request, *args, **kwargs):
+                release.wait(5)
+
+        view = BusyView.as_view()
+        thread = threading.Thread(target=lambda: view(make_request("get")))
+        thread.start()
+        time.sleep(0.1)
+        try:
+            self.assertEqual(view(make_request("get")).status_code, 429)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(view(make_request("get")).status_code, 200)
+
+    def test_shared_cache(self):
+        class SharedView(RESTView):
+            RATE_LIMIT = RateLimit(rate=1, burst=2, cache="default")
+        view = SharedView.as_view()
+        codes = [view(make_request("get")).status_code for no in range(2)]
+        self.assertEqual(codes, [200, 200])
+
+    def test_file_post_mixin(self):
+        class FileView(FilePostMixin):
+            RATE_LIMIT = RateLimit(rate=1, burst=1)
+
+            def get_output_data(self, request, *args, **kwargs):
+                return "x"
+
+        view = FileView.as_view()
+        self.assertEqual(view(make_request("get")).status_code, 200)
+        response = view(make_request("get"))
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response["Retry-After"])
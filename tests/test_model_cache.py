@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from easy_vue import dj_rest_params
+from easy_vue.dj_model_cache import ModelCache, get_default_model_cache
+
+
+def query(**data):
+    res = QueryDict(mutable=True)
+    for key, val in data.items():
+        if isinstance(val, list):
+            res.setlist(key, val)
+        else:
+            res[key] = val
+    return res
+
+
+class CachedModelParamTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.groups = [Group.objects.create(name="g{}".format(no)) for no in range(10)]
+        cls.ids = [itm.pk for itm in cls.groups]
+
+    def setUp(self):
+        self.cache = ModelCache(ttl=60, max_size=5)
+        self.validate = dj_rest_params.compile_params([
+            dj_rest_params.ModelParam("g", model=Group, do_multy=True, cache=self.cache),
+            dj_rest_params.ModelParam("h", model=Group, cache=self.cache, only=["id"]),
+        ])
+
+    def run_validate(self, g, h):
+        result = {}
+        with CaptureQueriesContext(connection) as queries:
+            errors = self.validate(query(g=[str(itm) for itm in g], h=str(h)), result)
+        return errors, result, len(queries.captured_queries)
+
+    def test_hits(self):
+        ids = self.ids
+        self.assertEqual(self.run_validate(ids[:3], ids[0])[2], 2)
+        errors, result, count = self.run_validate(ids[:3], ids[0])
+        self.assertEqual((errors, count), ([], 0))
+        self.assertEqual([itm.pk for itm in result["g"]], ids[:3])
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (4, 4))
+
+    def test_copies(self):
+        result = self.run_validate(self.ids[:3], self.ids[0])[1]
+        result["g"][0].name = "changed"
+        result = self.run_validate(self.ids[:3], self.ids[0])[1]
+        self.assertEqual(result["g"][0].name, "g0")
+
+    def test_invalidated_on_save_and_delete(self):
+        ids = self.ids
+        self.run_validate(ids[:3], ids[0])
+        group = Group.objects.get(pk=ids[1])
+        group.name = "new"
+        group.save()
+        errors, result, count = self.run_validate(ids[:3], ids[0])
+        self.assertEqual(count, 2)
+        self.assertEqual(result["g"][1].name, "new")
+
+        Group.objects.filter(pk=ids[2]).delete()
+        errors, result, count = self.run_validate(ids[:3], ids[0])
+        self.assertEqual(len(errors), 1)
+
+    def test_max_size(self):
+        self.run_validate(self.ids[:6], self.ids[0])
+        stats = self.cache.stats()
+        self.assertEqual(stats["size"], 5)
+        self.assertGreater(stats["evictions"], 0)
+
+    def test_projection(self):
+        result = self.run_validate([self.ids[0]], self.ids[3])[1]
+        self.assertEqual(result["h"].pk, self.ids[3])
+        self.assertIn("name", result["h"].get_deferred_fields())
+        self.assertNotIn("name", result["g"][0].get_deferred_fields())
+
+    @override_settings(VUE_MODEL_CACHE={"ttl": 10})
+    def test_default_cache(self):
+        default = get_default_model_cache()
+        self.assertEqual(default.ttl, 10)
+        param = dj_rest_params.ModelParam("x", model=Group, cache=True)
+        param.parse(query(x=str(self.ids[4])), {})
+        with self.assertNumQueries(0):
+            self.assertEqual(param.parse(query(x=str(self.ids[4])), {}).name, "g4")
+        with self.assertRaises(dj_rest_params.EParseError):
+            param.parse(query(x="9999"), {})
+
+    def test_select_related(self):
+        param = dj_rest_params.ModelParam("perm", model=Permission, select_related=["content_type"])
+        pk = str(Permission.objects.all()[0].pk)
+        with self.assertNumQueries(1):
+            param.parse(query(perm=pk), {}).content_type.app_label
+
+
+class RelatedInvalidationTest(TestCase):
+
+    def setUp(self):
+        self.cache = ModelCache(ttl=60)
+        self.perm = Permission.objects.all()[0]
+
+    def check_related(self, param):
+        pk = str(self.perm.pk)
+        param.parse(query(perm=pk), {})
+        with self.assertNumQueries(0):
+            param.parse(query(perm=pk), {})
+
+        content_type = ContentType.objects.get(pk=self.perm.content_type_id)
+        content_type.model = "changed"
+        content_type.save()
+        # связанный объект изменился - запись модели Permission недействительна
+        with self.assertNumQueries(1):
+            self.assertEqual(param.parse(query(perm=pk), {}).content_type.model, "changed")
+
+    def test_select_related_list(self):
+        self.check_related(dj_rest_params.ModelParam("perm", model=Permission,
+            select_related=["content_type"], cache=self.cache))
+
+    def test_select_related_all(self):
+        self.check_related(dj_rest_params.ModelParam("perm", model=Permission,
+            select_related=True, cache=self.cache))
+
+    def test_invalidate_all_rejects_loading(self):
+        param = dj_rest_params.ModelParam("perm", model=Permission, cache=self.cache)
+        key = param.lookup_key()
+        generation = self.cache.get_many(key, [self.perm.pk])[1]
+        self.cache.invalidate()
+        # объект загружен до сброса кеша
+        self.cache.set_many(key, {self.perm.pk: self.perm}, generation)
+        self.assertEqual(self.cache.stats()["size"], 0)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from easy_vue import dj_rest_params
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request, read_json
+
+
+def query(**data):
+    res = QueryDict(mutable=True)
+    for key, val in data.items():
+        if isinstance(val, list):
+            res.setlist(key, val)
+        else:
+            res[key] = val
+    return res
+
+
+class OwnedParam(dj_rest_params.ModelParam):
+    owner_pk = None
+
+    def do_check(self, value):
+        if value.pk != self.owner_pk:
+            return "чужой объект"
+
+
+class FailingLoadParam(dj_rest_params.ModelParam):
+
+    def load_objects(self, keys):
+        raise ValueError("db")
+
+
+class BulkModelParamTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.groups = [Group.objects.create(name="g{}".format(no)) for no in range(10)]
+        cls.ids = [itm.pk for itm in cls.groups]
+
+    def setUp(self):
+        self.validate = dj_rest_params.compile_params([
+            dj_rest_params.ModelParam("g", model=Group, do_multy=True),
+            dj_rest_params.CommaListParam(dj_rest_params.ModelParam("cl", model=Group)),
+            dj_rest_params.ModelParam("one", model="auth.Group"),
+            dj_rest_params.ModelParam("byname", model=Group, field="name"),
+        ])
+
+    def test_one_query_per_model_field(self):
+        ids = self.ids
+        result = {}
+        with CaptureQueriesContext(connection) as queries:
+            errors = self.validate(query(g=[str(ids[3]), str(ids[1]), str(ids[3])],
+                cl="{},{}".format(ids[5], ids[0]), one=str(ids[2]), byname="g7"), result)
+        self.assertEqual(errors, [])
+        # pk - один запрос на все параметры, name - второй
+        self.assertEqual(len(queries.captured_queries), 2)
+        self.assertEqual([itm.pk for itm in result["g"]], [ids[3], ids[1], ids[3]])
+        self.assertEqual([itm.pk for itm in result["cl"]], [ids[5], ids[0]])
+        self.assertEqual(result["one"].pk, ids[2])
+        self.assertEqual(result["byname"].name, "g7")
+
+    def test_missing_ids(self):
+        result = {}
+        errors = self.validate(query(g=[str(self.ids[0]), "999", "998"], cl="1", one="1",
+            byname="g1"), result)
+        self.assertIn("999", errors[0])
+        self.assertNotIn("g", result)
+
+    def test_bad_id(self):
+        errors = self.validate(query(g=["abc"], cl="1", one="1", byname="g1"), {})
+        self.assertIn("Некорректный ID", errors[0])
+
+    def test_optional(self):
+        validate = dj_rest_params.compile_params([
+            dj_rest_params.ModelParam("o", model=Group, required=False, do_multy=True),
+            dj_rest_params.ModelParam("p", model=Group, required=False),
+        ])
+        result = {}
+        self.assertEqual(validate(query(), result), [])
+        self.assertEqual(result, {"o": [], "p": None})
+
+    def test_non_unique_field(self):
+        User.objects.create(username="a", first_name="X")
+        param = dj_rest_params.ModelParam("u", model=User, field="first_name")
+        self.assertFalse(param.resolves_in_bulk())
+        result = {}
+        self.assertEqual(dj_rest_params.compile_params([param])(query(u="X"), result), [])
+        self.assertEqual(result["u"].username, "a")
+
+    def test_view(self):
+        class GroupsView(RESTView):
+            GET_PARAMS = [dj_rest_params.CommaListParam(dj_rest_params.ModelParam("ids", model=Group))]
+
+            def process_get(self, request, *args, **kwargs):
+                self.set_answer_key("names", [itm.name for itm in self.cleaned_params.ids])
+
+        view = GroupsView.as_view()
+        data = read_json(view(make_request("get", data={"ids": "{},{}".format(self.ids[4], self.ids[9])})))
+        self.assertEqual(data["names"], ["g4", "g9"])
+        response = view(make_request("get", data={"ids": "{},5000".format(self.ids[4])}))
+        self.assertEqual(response.status_code, 422)
+
+
+class SubclassHooksTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username="owner")
+        cls.other = User.objects.create(username="other")
+
+    def make_param(self, param_id, **kwargs):
+        param = OwnedParam(param_id, model=User, **kwargs)
+        param.owner_pk = self.owner.pk
+        return param
+
+    def test_do_check_kept(self):
+        param = self.make_param("u")
+        self.assertFalse(param.resolves_in_bulk())
+
+        class OwnedView(RESTView):
+            GET_PARAMS = [param]
+
+            def process_get(self, request, *args, **kwargs):
+                self.set_answer_key("u", self.cleaned_params.u.username)
+
+        view = OwnedView.as_view()
+        self.assertEqual(view(make_request("get", data={"u": self.other.pk})).status_code, 422)
+        self.assertEqual(read_json(view(make_request("get", data={"u": self.owner.pk}))), {"u": "owner"})
+
+    def test_do_check_kept_in_list(self):
+        validate = dj_rest_params.compile_params([
+            dj_rest_params.CommaListParam(self.make_param("u"))])
+        errors = validate(query(u="{},{}".format(self.owner.pk, self.other.pk)), {})
+        self.assertEqual(len(errors), 1)
+
+    def test_refs_dropped_on_error(self):
+        validate = dj_rest_params.compile_params([
+            dj_rest_params.ModelParam("a", model=User), dj_rest_params.IntParam("b")])
+        result = {}
+        self.assertEqual(len(validate(query(a=str(self.owner.pk)), result)), 1)
+        self.assertNotIn("a", result)
+
+    def test_refs_dropped_on_load_error(self):
+        result = {}
+        errors = dj_rest_params.compile_params([FailingLoadParam("a", model=User)])(
+            query(a="1"), result, False)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(result, {})
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import datetime
+import unittest
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from easy_vue import zmsgpack
+from easy_vue.dj_rest import RESTView
+from easy_vue.zjson import DefaultConverter
+
+from .utils import make_request
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class RowsView(RESTView):
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("rows", [1.5, 2])
+
+
+class PackerTest(SimpleTestCase):
+
+    def setUp(self):
+        self.packer = zmsgpack.Packer(DefaultConverter())
+
+    def test_ints(self):
+        cases = [
+            (0, b"\x00"), (127, b"\x7f"), (128, b"\xcc\x80"), (256, b"\xcd\x01\x00"),
+            (65536, b"\xce\x00\x01\x00\x00"), (2 ** 32, b"\xcf\x00\x00\x00\x01\x00\x00\x00\x00"),
+            (-1, b"\xff"), (-32, b"\xe0"), (-33, b"\xd0\xdf"), (-129, b"\xd1\xff\x7f"),
+        ]
+        for value, expected in cases:
+            self.assertEqual(self.packer.pack(value), expected, value)
+
+    def test_containers(self):
+        self.assertEqual(self.packer.pack({"a": [1, 2]}), b"\x81\xa1a\x92\x01\x02")
+        self.assertEqual(self.packer.pack([0.5, 1.0]),
+            b"\x92\xcb\x3f\xe0\x00\x00\x00\x00\x00\x00\xcb\x3f\xf0\x00\x00\x00\x00\x00\x00")
+        self.assertEqual(self.packer.pack(list(range(16)))[:3], b"\xdc\x00\x10")
+        self.assertEqual(self.packer.pack([None, True, False]), b"\x93\xc0\xc3\xc2")
+
+    def test_strings(self):
+        self.assertEqual(self.packer.pack("ж"), b"\xa2\xd0\xb6")
+        self.assertEqual(self.packer.pack("x" * 40)[:2], b"\xd9\x28")
+        self.assertEqual(self.packer.pack(bytearray(b"ab")), b"\xc4\x02ab")
+
+    def test_converted_types(self):
+        self.assertEqual(self.packer.pack(Decimal("1.5")), self.packer.pack("1.5"))
+        self.assertEqual(self.packer.pack(datetime.date(2020, 1, 2)), self.packer.pack("2020-01-02"))
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_round_trip(self):
+        data = {"i": [0, 2 ** 40, -2 ** 40], "f": [0.5], "s": ["", "привет", "z" * 70000],
+            "m": dict(("k{}".format(no), no) for no in range(20))}
+        self.assertEqual(msgpack.unpackb(self.packer.pack(data), raw=False), data)
+
+
+class NegotiationTest(SimpleTestCase):
+
+    def test_accept(self):
+        response = RowsView.as_view()(make_request("get", HTTP_ACCEPT="application/msgpack"))
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertIn("Accept", response["Vary"])
+        self.assertEqual(response.content, zmsgpack.packb({"rows": [1.5, 2]}))
+
+    def test_json_preferred(self):
+        response = RowsView.as_view()(make_request("get",
+            HTTP_ACCEPT="application/json, application/msgpack;q=0.5"))
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertFalse(zmsgpack.accepts_msgpack("*/*"))
+        self.assertFalse(zmsgpack.accepts_msgpack("application/json, text/javascript, */*; q=0.01"))
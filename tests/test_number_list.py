@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import array
+import json
+
+from django.http import QueryDict
+from django.test import SimpleTestCase
+
+from easy_vue import dj_rest_params, zjson, zmsgpack
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request, read_json
+
+
+class PointsView(RESTView):
+    GET_PARAMS = [dj_rest_params.NumberListParam("pts", kind="float", min_val=-180, max_val=180,
+        use_numpy=False)]
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("pts", self.cleaned_params.pts)
+
+
+class NumberListParamTest(SimpleTestCase):
+
+    def assertItemError(self, param, value, index):
+        with self.assertRaises(dj_rest_params.EParseError) as ctx:
+            param.parse({param.param_id: value}, {})
+        self.assertEqual((ctx.exception.detail or {}).get("index"), index, value)
+
+    def test_int(self):
+        param = dj_rest_params.NumberListParam("v", min_val=0, max_val=100, use_numpy=False)
+        res = param.parse({"v": "1,2,3,100"}, {})
+        self.assertIsInstance(res, array.array)
+        self.assertEqual(list(res), [1, 2, 3, 100])
+        self.assertItemError(param, "1,2,x,4", 2)
+        self.assertItemError(param, "1,-1,5", 1)
+        self.assertItemError(param, "1,2,101", 2)
+        self.assertItemError(param, "1,1.9", 1)
+
+    def test_int_json_list(self):
+        param = dj_rest_params.NumberListParam("v", use_numpy=False)
+        self.assertEqual(list(param.parse({"v": [1, "2", 3]}, {})), [1, 2, 3])
+        # дробные и логические значения не усекаются до целых
+        self.assertItemError(param, [1, 1.9, 3], 1)
+        self.assertItemError(param, [1, 2, True], 2)
+
+    def test_float(self):
+        param = dj_rest_params.NumberListParam("f", kind="float", max_count=3, use_numpy=False)
+        self.assertEqual(list(param.parse({"f": "1.5,2e3,-4"}, {})), [1.5, 2000.0, -4.0])
+        self.assertItemError(param, "1,nan,2", 1)
+        self.assertItemError(param, "1e400", 0)
+        with self.assertRaises(dj_rest_params.EParseError):
+            param.parse({"f": "1,2,3,4"}, {})
+
+    def test_default_array(self):
+        # тип результата не зависит от того, установлен ли numpy
+        param = dj_rest_params.NumberListParam("v")
+        self.assertFalse(param.use_numpy)
+        self.assertIsInstance(param.parse({"v": "1,2"}, {}), array.array)
+        if dj_rest_params.numpy is None:
+            with self.assertRaises(dj_rest_params.EUncorrectDefenition):
+                dj_rest_params.NumberListParam("v", use_numpy=True)
+
+    def test_typecode(self):
+        param = dj_rest_params.NumberListParam("i", typecode="i", use_numpy=False)
+        self.assertEqual(param.parse({"i": [1, 2, 3]}, {}).typecode, "i")
+        with self.assertRaises(dj_rest_params.EParseError):
+            param.parse({"i": "1,3000000000"}, {})
+
+    def test_compiled(self):
+        validate = dj_rest_params.compile_params([
+            dj_rest_params.NumberListParam("v", required=False),
+            dj_rest_params.NumberListParam("w", min_val=1),
+        ])
+        result = {}
+        self.assertEqual(validate(QueryDict("w=3,4,5"), result), [])
+        self.assertIsNone(result["v"])
+        self.assertEqual(list(result["w"]), [3, 4, 5])
+
+    def test_encoders(self):
+        values = dj_rest_params.NumberListParam("v", use_numpy=False).parse({"v": "1,2,3"}, {})
+        self.assertEqual(json.loads(zjson.dumps({"v": values})), {"v": [1, 2, 3]})
+        self.assertEqual(zmsgpack.packb({"v": values}), zmsgpack.packb({"v": [1, 2, 3]}))
+
+    def test_view(self):
+        view = PointsView.as_view()
+        self.assertEqual(read_json(view(make_request("get", data={"pts": "1,2,3.5"}))),
+            {"pts": [1.0, 2.0, 3.5]})
+        response = view(make_request("get", data={"pts": "1,2,300"}))
+        self.assertEqual(response.status_code, 422)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+
+from easy_vue.dj_rest import RESTView
+from easy_vue.dj_rest_paging import KeysetPaginationMixin
+
+from .utils import make_request, read_json
+
+
+def make_view(ordering):
+
+    class PermissionsView(KeysetPaginationMixin, RESTView):
+        PAGE_ORDERING = ordering
+        PAGE_SIZE = 5
+
+        def process_get(self, request, *args, **kwargs):
+            rows = self.paginate(Permission.objects.values("pk", "codename", "content_type_id"))
+            self.set_answer_key("rows", [itm["pk"] for itm in rows])
+
+    return PermissionsView.as_view()
+
+
+class KeysetPaginationTest(TestCase):
+
+    ORDERINGS = [("codename",), ("-content_type_id", "codename"), ("-pk",)]
+
+    def expected(self, ordering):
+        tie = "-pk" if ordering[-1].startswith("-") else "pk"
+        return list(Permission.objects.order_by(*(list(ordering) + [tie])).values_list("pk", flat=True))
+
+    def test_forward_and_back(self):
+        for ordering in self.ORDERINGS:
+            view = make_view(ordering)
+            pages = []
+            cursor = None
+            while True:
+                data = read_json(view(make_request("get", data={"cursor": cursor} if cursor else {})))
+                pages.append(data)
+                cursor = data["next"]
+                if not cursor:
+                    break
+            expected = self.expected(ordering)
+            self.assertGreater(len(pages), 2)
+            self.assertEqual(sum((page["rows"] for page in pages), []), expected, ordering)
+
+            back = []
+            cursor = pages[-1]["prev"]
+            while cursor:
+                data = read_json(view(make_request("get", data={"cursor": cursor})))
+                back = data["rows"] + back
+                cursor = data["prev"]
+            self.assertEqual(back + pages[-1]["rows"], expected, ordering)
+
+    def test_bad_params(self):
+        view = make_view(("codename",))
+        self.assertEqual(view(make_request("get", data={"cursor": "junk"})).status_code, 422)
+        self.assertEqual(view(make_request("get", data={"page_size": "1000"})).status_code, 422)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.http import QueryDict
+from django.test import SimpleTestCase
+
+from easy_vue import dj_rest_params
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request, read_json
+
+
+def make_params():
+    return [
+        dj_rest_params.UnicodeParam("u"),
+        dj_rest_params.IntParam("i", min_val=0, max_val=10),
+        dj_rest_params.IdParam("id", required=False),
+        dj_rest_params.JSONParam("j", required=False),
+        dj_rest_params.CommaListParam(dj_rest_params.IntParam("cl", max_val=100)),
+        dj_rest_params.IntParam("m", do_multy=True, required=False),
+        dj_rest_params.IntParam("opt", required=False),
+    ]
+
+
+CASES = [
+    "u=a&i=5&cl=1,2,3&m=1&m=2",
+    "u=a&i=50&cl=1",
+    "u=a&i=x&cl=1",
+    "i=1&cl=1",
+    "u=a&i=1",
+    "u=a&i=1&cl=1,x",
+    "u=a&i=1&cl=1,500",
+    "u=a&i=1&cl=1&id=-1&j=bad",
+    "u=a&i=1&cl=1&j=%7B%22a%22:1%7D&id=3",
+]
+
+
+def parse_each(request_dict, params):
+    result = {}
+    errors = []
+    for param in params:
+        try:
+            param.parse(request_dict, result)
+        except dj_rest_params.EParseError as e:
+            errors.append(e.u_msg)
+        except Exception as e:
+            errors.append(str(e))
+    return result, errors
+
+
+class EvenParam(dj_rest_params.IntParam):
+
+    def do_check(self, value):
+        if value % 2:
+            return "odd"
+
+
+class ParamsView(RESTView):
+    GET_PARAMS = make_params()
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("p", dict(self.cleaned_params))
+
+
+class CollectErrorsView(ParamsView):
+    CLEAN_RAISE_ERROR = False
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("e", self.input_errors)
+
+
+class CompileParamsTest(SimpleTestCase):
+
+    def test_same_as_parse(self):
+        for case in CASES:
+            request_dict = QueryDict(case)
+            expected, expected_errors = parse_each(request_dict, make_params())
+            result = {}
+            errors = dj_rest_params.compile_params(make_params())(request_dict, result, False)
+            self.assertEqual((result, errors), (expected, expected_errors), case)
+
+    def test_stop_on_error(self):
+        validate = dj_rest_params.compile_params(make_params())
+        self.assertEqual(len(validate(QueryDict("i=50&cl=1,x"), {})), 1)
+        self.assertEqual(len(validate(QueryDict("i=50&cl=1,x"), {}, False)), 3)
+        self.assertIsNone(dj_rest_params.compile_params([]))
+
+    def test_do_check_message(self):
+        validate = dj_rest_params.compile_params([EvenParam("e")])
+        self.assertEqual(validate(QueryDict("e=3"), {}), ["'e' odd."])
+
+    def test_parsed_once(self):
+        calls = []
+
+        class CountingParam(dj_rest_params.IntParam):
+            def do_parse(self, in_value):
+                calls.append(in_value)
+                return super(CountingParam, self).do_parse(in_value)
+
+        dj_rest_params.compile_params([CountingParam("c")])(QueryDict("c=1"), {})
+        CountingParam("c").parse(QueryDict("c=1"), {})
+        self.assertEqual(calls, ["1", "1"])
+
+    def test_view(self):
+        data = read_json(ParamsView.as_view()(make_request("get", "/?u=a&i=5&cl=1,2")))
+        self.assertEqual(data["p"], {"u": "a", "i": 5, "id": None, "j": None, "cl": [1, 2],
+            "m": [], "opt": None})
+        self.assertEqual(ParamsView.as_view()(make_request("get", "/?u=a&i=50&cl=1,2")).status_code, 422)
+        data = read_json(CollectErrorsView.as_view()(make_request("get", "/?i=50&cl=1,x")))
+        self.assertEqual(len(data["e"]), 3)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User, Group, Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from easy_vue import dj_perms
+
+from .utils import make_request
+
+
+PERMS = ["auth.add_user"]
+
+
+class PermsTestMixin(object):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("user")
+        self.group = Group.objects.create(name="group")
+        self.user.groups.add(self.group)
+        self.perm = Permission.objects.get(codename="add_user")
+
+    def fresh_user(self):
+        # новый экземпляр - без кеша прав самого ModelBackend
+        return User.objects.get(pk=self.user.pk)
+
+    def check(self, request=None):
+        return dj_perms.check_user_permissions(self.fresh_user(), PERMS, request)
+
+
+class RequestCacheTest(PermsTestMixin, TestCase):
+
+    def test_shared_cache_off_by_default(self):
+        self.assertIsNone(dj_perms.get_perms_cache())
+
+    def test_anonymous_and_empty(self):
+        request = make_request("get")
+        self.assertFalse(dj_perms.check_user_permissions(request.user, PERMS, request))
+        self.assertTrue(dj_perms.check_user_permissions(self.fresh_user(), None))
+
+    def test_cached_in_request(self):
+        request = make_request("get")
+        user = self.fresh_user()
+        self.assertFalse(dj_perms.check_user_permissions(user, PERMS, request))
+        self.group.permissions.add(self.perm)
+        with self.assertNumQueries(0):
+            self.assertFalse(dj_perms.check_user_permissions(user, PERMS, request))
+        # следующий запрос видит изменение
+        self.assertTrue(self.check(make_request("get")))
+
+
+@override_settings(VUE_PERMS_CACHE_TTL=300)
+class SharedCacheTest(PermsTestMixin, TestCase):
+
+    def test_cached_between_requests(self):
+        self.group.permissions.add(self.perm)
+        self.assertTrue(self.check())
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(dj_perms.check_user_permissions(user, PERMS))
+
+    def test_invalidated_by_signals(self):
+        self.assertFalse(self.check())
+        self.group.permissions.add(self.perm)
+        self.assertTrue(self.check())
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.check())
+        self.user.user_permissions.add(self.perm)
+        self.assertTrue(self.check())
+
+    def test_stale_save_after_invalidation(self):
+        self.user.user_permissions.add(self.perm)
+        # проверка прав началась до того, как их отозвали (сигнал - invalidate_user)
+        user_perms = dj_perms.load_user_perms(self.user.pk)
+        self.user.user_permissions.remove(self.perm)
+        user_perms.perms[PERMS[0]] = True
+        dj_perms.save_user_perms(user_perms)
+        self.assertFalse(self.check())
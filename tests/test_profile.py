@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import glob
+import time
+import json
+import shutil
+import pstats
+import signal
+import socket
+import tempfile
+import threading
+import unittest
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.views.generic import View
+
+from easy_vue.dj import JSONPostMixin
+from easy_vue.dj_profile import Profiler, StackSampler
+from easy_vue.dj_rest import RESTView
+
+from .utils import make_request
+
+
+def burn():
+    started = time.time()
+    while time.time() - started < 0.1:
+        sum(no * no for no in range(1000))
+
+
+class ProfilerTestMixin(object):
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.out_dir)
+
+    def files(self, pattern):
+        return glob.glob(os.path.join(self.out_dir, pattern))
+
+
+class ProfilerTest(ProfilerTestMixin, SimpleTestCase):
+
+    def test_header_token(self):
+        class TokenView(RESTView):
+            PROFILER = Profiler(header="X-Profile", token="s3", out_dir=self.out_dir)
+
+            def process_get(self, request, *args, **kwargs):
+                burn()
+                self.set_answer_key("x", 1)
+
+        view = TokenView.as_view()
+        self.assertEqual(view(make_request("get")).status_code, 200)
+        view(make_request("get", HTTP_X_PROFILE="bad"))
+        self.assertEqual(os.listdir(self.out_dir), [])
+
+        response = view(make_request("get", HTTP_X_PROFILE="s3"))
+        self.assertEqual(json.loads(response.content.decode("utf-8")), {"x": 1})
+        files = self.files("*.prof")
+        self.assertEqual(len(files), 1)
+        self.assertIn("TokenView.GET", files[0])
+        pstats.Stats(files[0])
+
+    def test_sample_mode(self):
+        class SampledView(RESTView):
+            PROFILER = Profiler(every=1, mode="sample", out_dir=self.out_dir, interval=0.002)
+
+            def process_get(self, request, *args, **kwargs):
+                burn()
+
+        SampledView.as_view()(make_request("get"))
+        # в другом потоке - снимки из вспомогательного потока
+        thread = threading.Thread(target=lambda: SampledView.as_view()(make_request("get")))
+        thread.start()
+        thread.join()
+        files = self.files("*SampledView.GET*.folded")
+        self.assertEqual(len(files), 2)
+        for path in files:
+            with open(path) as ff:
+                self.assertIn("burn", ff.read())
+
+    def test_bad_mode(self):
+        with self.assertRaises(Exception):
+            Profiler(mode="nope")
+
+
+class ProfilerUsersTest(ProfilerTestMixin, TestCase):
+
+    def test_users(self):
+        class UserView(JSONPostMixin, View):
+            PROFILER = Profiler(users=["bob"], out_dir=self.out_dir)
+
+            def get_output_data(self, request, *args, **kwargs):
+                return {"a": 1}
+
+        UserView.as_view()(make_request("post"))
+        self.assertEqual(self.files("*.prof"), [])
+        UserView.as_view()(make_request("post", user=User.objects.create(username="bob")))
+        self.assertEqual(len(self.files("*UserView.POST*.prof")), 1)
+
+
+@unittest.skipUnless(hasattr(signal, "setitimer") and isinstance(threading.current_thread(),
+    threading._MainThread), "SIGPROF sampling needs setitimer and the main thread")
+class StackSamplerSignalTest(SimpleTestCase):
+
+    def test_system_calls_restarted(self):
+        reader, writer = socket.socketpair()
+        self.addCleanup(reader.close)
+        self.addCleanup(writer.close)
+
+        def send_later():
+            # сигнал процессу доставляется главному потоку, ждущему в recv
+            time.sleep(0.1)
+            os.kill(os.getpid(), signal.SIGPROF)
+            time.sleep(0.1)
+            writer.send(b"x")
+
+        thread = threading.Thread(target=send_later)
+        sampler = StackSampler(60)
+        sampler.start()
+        try:
+            thread.start()
+            # без siginterrupt(SIGPROF, False) - socket.error EINTR
+            self.assertEqual(reader.recv(1), b"x")
+        finally:
+            sampler.stop()
+            thread.join()
+        self.assertTrue(sampler.counts)  # снимок по сигналу сделан
+        self.assertEqual(signal.getsignal(signal.SIGPROF), signal.SIG_DFL)
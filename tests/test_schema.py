@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+
+from django.contrib.auth.models import Group
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from easy_vue import dj_rest_params, dj_schema
+from easy_vue.dj_rest import RESTView
+from easy_vue.dj_rest_schema import OpenAPIView
+
+from .utils import make_request
+
+
+class GroupsView(RESTView):
+    """
+        Список групп.
+    """
+    COMMON_PARAMS = [dj_rest_params.UnicodeParam("token")]
+    GET_PARAMS = [
+        dj_rest_params.IntParam("limit", required=False, min_val=1, ex_max_val=501),
+        dj_rest_params.NumberListParam("pts", kind="float", min_val=-1, max_count=10, required=False),
+        dj_rest_params.IdRangeParam("sel", required=False),
+    ]
+    POST_PARAMS = [dj_rest_params.ModelParam("group", model=Group)]
+    http_method_names = ["get", "post", "options"]
+
+
+class OwnOptionsView(RESTView):
+
+    def process_options(self, request, *args, **kwargs):
+        self.set_answer_key("own", 1)
+
+
+class TestsOpenAPIView(OpenAPIView):
+    URLCONF = "tests.urls"
+
+
+def read_schema(response):
+    return json.loads(response.content.decode("utf-8"))
+
+
+class SchemaTest(SimpleTestCase):
+
+    def setUp(self):
+        dj_schema.clear_cache()
+
+    def test_regex_to_path(self):
+        self.assertEqual(dj_schema.regex_to_path(r"^items/(?P<pk>\d+)/$"), ("/items/{pk}/", ["pk"]))
+        self.assertEqual(dj_schema.regex_to_path(r"^api/^paged/(?P<kind>[a-z]+)/$"),
+            ("/api/paged/{kind}/", ["kind"]))
+        self.assertEqual(dj_schema.regex_to_path(r"^alt/(?:x|y)/(?P<n>\d+)$"), ("/alt/x/{n}", ["n"]))
+
+    def test_value_schema(self):
+        self.assertEqual(dj_rest_params.IntParam("v", min_val=1, ex_max_val=501).json_schema(),
+            {"type": "integer", "minimum": 1, "maximum": 500})
+        self.assertEqual(
+            dj_rest_params.NumberListParam("v", kind="float", min_val=-1, max_count=10).json_schema(),
+            {"type": "array", "items": {"type": "number", "minimum": -1}, "maxItems": 10})
+        self.assertEqual(dj_rest_params.IdRangeParam("v").json_schema()["type"], "string")
+
+    def test_options(self):
+        view = GroupsView.as_view()
+        response = view(make_request("options"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Allow"], "GET, POST, OPTIONS")
+        data = read_schema(response)
+        self.assertEqual(data["title"], "tests.test_schema.GroupsView")
+        self.assertEqual(data["description"], "Список групп.")
+        self.assertEqual(sorted(data["methods"]), ["GET", "POST"])
+        self.assertEqual(sorted(data["methods"]["GET"]["properties"]), ["limit", "pts", "sel", "token"])
+        self.assertEqual(data["methods"]["GET"]["required"], ["token"])
+        self.assertEqual(sorted(data["methods"]["POST"]["required"]), ["group", "token"])
+
+        response = view(make_request("options", HTTP_IF_NONE_MATCH=response["ETag"]))
+        self.assertEqual(response.status_code, 304)
+
+    def test_options_cached(self):
+        plan = GroupsView.get_dispatch_plan()
+        entry = dj_schema.get_view_schema(GroupsView, plan)
+        self.assertIs(dj_schema.get_view_schema(GroupsView, plan), entry)
+        dj_schema.clear_cache()
+        self.assertIsNot(dj_schema.get_view_schema(GroupsView, plan), entry)
+        self.assertEqual(dj_schema.get_view_schema(GroupsView, plan).etag, entry.etag)
+
+    def test_own_options(self):
+        response = OwnOptionsView.as_view()(make_request("options"))
+        self.assertEqual(json.loads(response.content.decode("utf-8")), {"own": 1})
+
+    def test_openapi(self):
+        view = TestsOpenAPIView.as_view()
+        response = view(make_request("get", "/schema/"))
+        self.assertEqual(response.status_code, 200)
+        doc = read_schema(response)
+        self.assertEqual(doc["openapi"], dj_schema.OPENAPI_VERSION)
+        self.assertEqual(doc["info"], {"title": "API", "version": "1.0"})
+
+        item = doc["paths"]["/items/{pk}/"]["get"]
+        self.assertEqual(item["operationId"], "item.get")
+        self.assertEqual(item["summary"], "Элемент по номеру.")
+        self.assertEqual([(itm["name"], itm["in"]) for itm in item["parameters"]],
+            [("pk", "path"), ("a", "query")])
+        self.assertIn("422", item["responses"])
+        self.assertIn("403", doc["paths"]["/private/"]["get"]["responses"])
+        self.assertIn("requestBody", doc["paths"]["/batch/"]["post"])
+        self.assertIn("tests.urls.ItemView.GET", doc["components"]["schemas"])
+
+        response = view(make_request("get", "/schema/", HTTP_IF_NONE_MATCH=response["ETag"]))
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(VUE_SCHEMA_TITLE="Tests")
+    def test_openapi_settings(self):
+        doc = read_schema(TestsOpenAPIView.as_view()(make_request("get", "/schema/")))
+        self.assertEqual(doc["info"]["title"], "Tests")
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Group
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+
+from easy_vue import dj_rest
+
+from .utils import make_request, read_json
+
+
+class RowsView(dj_rest.RESTView):
+    STREAM_ANSWER = True
+    STREAM_CHUNK_ITEMS = 3
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("rows", ({"i": no} for no in range(7)))
+        self.set_answer_key("groups", Group.objects.order_by("name").values_list("name", flat=True))
+        self.set_answer_key("n", 7)
+
+
+class StreamingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.bulk_create([Group(name="g{}".format(no)) for no in range(4)])
+
+    def test_stream(self):
+        response = RowsView.as_view()(make_request("get"))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response.status_code, 200)
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 1)
+        response.streaming_content = iter(parts)
+        self.assertEqual(read_json(response), {
+            "rows": [{"i": no} for no in range(7)],
+            "groups": ["g0", "g1", "g2", "g3"],
+            "n": 7,
+        })
+
+    def test_not_streamed(self):
+        response = RowsView.as_view(STREAM_ANSWER=False)(make_request("get"))
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(read_json(response)["rows"][:2], [{"i": 0}, {"i": 1}])
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.test import SimpleTestCase
+
+from easy_vue import dj_rest, dj_rest_params
+from easy_vue.lib import PhaseTimer
+
+from .utils import make_request
+
+
+collected = []
+
+
+def collect(view, request, response, timings):
+    collected.append([name for name, duration in timings])
+
+
+class TimedView(dj_rest.RESTView):
+    SERVER_TIMING = True
+    TIMING_SINK = collect
+    GET_PARAMS = [dj_rest_params.IntParam("a")]
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("x", list(range(100)))
+
+
+class PlainView(dj_rest.RESTView):
+
+    def process_get(self, request, *args, **kwargs):
+        pass
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class PhaseTimerTest(SimpleTestCase):
+
+    def test_phases(self):
+        clock = FakeClock()
+        timer = PhaseTimer(clock)
+        with timer.phase("load"):
+            clock.now += 0.5
+        timer.add("db", 0.25)
+        clock.now += 1
+        timer.stop()
+        self.assertEqual(timer.phases, [("load", 0.5), ("db", 0.25)])
+        self.assertEqual(timer.total, 1.5)
+
+
+class ServerTimingTest(SimpleTestCase):
+
+    def setUp(self):
+        del collected[:]
+
+    def test_header_and_sink(self):
+        response = TimedView.as_view()(make_request("get", data={"a": "1"}))
+        self.assertEqual(response.status_code, 200)
+        names = [itm.split(";")[0] for itm in response["Server-Timing"].split(", ")]
+        self.assertEqual(names, ["access", "params", "validators", "process", "encode", "total"])
+        self.assertEqual(collected, [names])
+
+    def test_error_answer_timed(self):
+        response = TimedView.as_view()(make_request("get", data={"a": "x"}))
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("params;dur=", response["Server-Timing"])
+
+    def test_off_by_default(self):
+        response = PlainView.as_view()(make_request("get"))
+        self.assertFalse(response.has_header("Server-Timing"))
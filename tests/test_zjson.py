@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+import datetime
+from decimal import Decimal
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.translation import ugettext_lazy
+
+from easy_vue import zjson
+from easy_vue.lib import JSDict, ExtOrderedDict
+
+
+DATA = {
+    "decimal": Decimal("1.5"),
+    "datetime": datetime.datetime(2020, 1, 2, 3, 4, 5),
+    "lazy": ugettext_lazy("Hello"),
+    "jsdict": JSDict(x=1),
+    "ordered": ExtOrderedDict([("b", 1), ("a", 2)]),
+    "text": "ж",
+    "set": set([1]),
+}
+
+EXPECTED = {
+    "decimal": "1.5",
+    "datetime": "2020-01-02T03:04:05",
+    "lazy": "Hello",
+    "jsdict": {"x": 1},
+    "ordered": {"b": 1, "a": 2},
+    "text": "ж",
+    "set": [1],
+    "generator": [0, 1, 2],
+}
+
+
+class ZJsonTest(SimpleTestCase):
+
+    def test_backends_match(self):
+        for name in ("json", "simplejson"):
+            if not zjson.BACKENDS[name].available():
+                continue
+            backend = zjson.create_backend(name)
+            res = backend.dumps(dict(DATA, generator=(no for no in range(3))))
+            self.assertEqual(json.loads(res), EXPECTED, name)
+
+    def test_unknown_type(self):
+        with self.assertRaises(TypeError):
+            zjson.dumps({"x": object()})
+
+    @override_settings(VUE_JSON_BACKEND="json", VUE_JSON_DECIMAL_AS_FLOAT=True, VUE_JSON_COMPACT=True)
+    def test_settings(self):
+        self.assertEqual(zjson.get_backend().name, "json")
+        self.assertEqual(zjson.dumps({"a": Decimal("1.5"), "b": [1, 2]}), '{"a":1.5,"b":[1,2]}')
+
+    def test_response(self):
+        response = zjson.ZJsonResponse({"a": Decimal("2")})
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(response.content.decode("utf-8")), {"a": "2"})
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.conf.urls import url
+
+from easy_vue.dj_rest import RESTView
+from easy_vue.dj_rest_batch import RESTBatchView
+from easy_vue import dj_rest_params
+
+
+class ItemView(RESTView):
+    """
+        Элемент по номеру.
+    """
+    GET_PARAMS = [dj_rest_params.IntParam("a")]
+
+    def process_get(self, request, *args, **kwargs):
+        self.set_answer_key("a", self.cleaned_params.a)
+
+    def process_post(self, request, *args, **kwargs):
+        self.set_answer_key("x", request.POST.getlist("x"))
+
+
+class FailingView(RESTView):
+
+    def process_get(self, request, *args, **kwargs):
+        raise ValueError("failed")
+
+
+class PrivateView(RESTView):
+    registered_only = True
+
+
+urlpatterns = [
+    url(r'^items/(?P<pk>\d+)/$', ItemView.as_view(), name="item"),
+    url(r'^failing/$', FailingView.as_view(), name="failing"),
+    url(r'^private/$', PrivateView.as_view(), name="private"),
+    url(r'^batch/$', RESTBatchView.as_view(), name="batch"),
+]
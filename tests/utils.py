@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+
+factory = RequestFactory()
+
+
+def make_request(method, path="/", data=None, user=None, **extra):
+    """
+        Запрос RequestFactory с пользователем (по умолчанию - анонимный).
+    """
+    request = getattr(factory, method.lower())(path, data or {}, **extra)
+    request.user = user if user is not None else AnonymousUser()
+    return request
+
+
+def read_json(response):
+    """
+        Разобранный JSON ответа, обычного или потокового.
+    """
+    if response.streaming:
+        return json.loads(b"".join(response.streaming_content).decode("utf-8"))
+    return json.loads(response.content.decode("utf-8"))